@@ -0,0 +1 @@
+"""Load tests and micro-benchmarks for the Spotlight member API (see README.md)."""
@@ -0,0 +1,216 @@
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# ======================================================
+# SHARED BENCHMARK HELPERS
+# ======================================================
+# Every benchmark runs against its own throwaway SQLite file. DATABASE_PATH
+# must be set before spotlight_app.app is imported, because the app runs
+# init_db() at import time, so scripts call use_database() first and
+# load_app() second.
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_TOLERANCE = 0.25
+GATED_LATENCY_METRICS = ("p50_ms", "p95_ms", "wall_ms")
+MIN_GATED_SAMPLES = 200
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def use_database(path=None) -> str:
+    """Point the app at `path` (or a fresh temp file) and return the path."""
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(prefix="spotlight-bench-"), "bench.db")
+    os.environ["DATABASE_PATH"] = path
+    return path
+
+
+def load_app():
+    """Import the app after use_database(); returns (app_module, db_module)."""
+    from spotlight_app import app as app_module
+    from spotlight_app import db
+
+    app_module.app.testing = True
+    return app_module, db
+
+
+def login(app, uid):
+    """A Flask test client already logged in as `uid`."""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = uid
+    return client
+
+
+def admin_client(app):
+    """A Flask test client with an admin session."""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["is_admin"] = True
+    return client
+
+
+def session_cookie(app, uid) -> str:
+    """Signed session cookie value for `uid`, for driving a real server."""
+    serializer = app.session_interface.get_signing_serializer(app)
+    return serializer.dumps({"user_id": uid})
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(p * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(samples, wall_seconds=None) -> dict:
+    """p50/p95/p99/mean in ms (and rps when the wall time is known) for latency samples in seconds."""
+    ordered = sorted(samples)
+    result = {
+        "count": len(ordered),
+        "p50_ms": _ms(percentile(ordered, 0.50)),
+        "p95_ms": _ms(percentile(ordered, 0.95)),
+        "p99_ms": _ms(percentile(ordered, 0.99)),
+        "mean_ms": _ms(sum(ordered) / len(ordered)) if ordered else None,
+    }
+    if wall_seconds:
+        result["rps"] = round(len(ordered) / wall_seconds, 1)
+    return result
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    """Run fn `repeat` times; returns (last result, list of durations in seconds)."""
+    durations = []
+    result = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        durations.append(time.perf_counter() - started)
+    return result, durations
+
+
+def max_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def current_rss_mb() -> float:
+    """
+    Anonymous resident memory right now (Linux RssAnon). File-backed pages,
+    such as SQLite's mmap of the database, are left out so reading a big
+    table does not look like a leak. Falls back to the peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return max_rss_mb()
+
+
+def print_table(results) -> None:
+    """Print {label: {metric: value}} as an aligned table."""
+    if not results:
+        return
+    columns = []
+    for metrics in results.values():
+        for key in metrics:
+            if key not in columns:
+                columns.append(key)
+    width = max(len("name"), *(len(label) for label in results))
+    widths = [max(12, len(col) + 2) for col in columns]
+    print("name".ljust(width) + "".join(col.rjust(w) for col, w in zip(columns, widths)))
+    for label, metrics in results.items():
+        cells = "".join(_cell(metrics.get(col)).rjust(w) for col, w in zip(columns, widths))
+        print(label.ljust(width) + cells)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}" if value < 100 else f"{value:.1f}"
+    return str(value)
+
+
+# ======================================================
+# BASELINES
+# ======================================================
+def baseline_path(name) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE) -> list:
+    """
+    Regressions of `results` against `baseline`. Latency metrics (p50/p95,
+    wall_ms) regress when they grow by more than `tolerance`; throughput
+    (rps, *_per_s) when it drops by more than `tolerance`. p99 and means
+    are reported but not gated, and rows with fewer than MIN_GATED_SAMPLES
+    samples are skipped: both are too noisy to fail a run on.
+    """
+    regressions = []
+    for label, metrics in results.items():
+        old = baseline.get("results", {}).get(label)
+        if not old or metrics.get("count", MIN_GATED_SAMPLES) < MIN_GATED_SAMPLES:
+            continue
+        for key, value in metrics.items():
+            before = old.get(key)
+            if value is None or not before:
+                continue
+            if key in GATED_LATENCY_METRICS and value > before * (1 + tolerance):
+                regressions.append(f"{label} {key}: {before} -> {value}")
+            elif (key == "rps" or key.endswith("_per_s")) and value < before * (1 - tolerance):
+                regressions.append(f"{label} {key}: {before} -> {value}")
+    return regressions
+
+
+def add_baseline_args(parser) -> None:
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--no-compare", action="store_true", help="Skip the comparison with the stored baseline.")
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help="Allowed relative slowdown before a metric counts as a regression.",
+    )
+
+
+def report(name, results, args, params=None) -> int:
+    """Print results, then save or compare against benchmarks/baselines/<name>.json; returns an exit code."""
+    print_table(results)
+    path = baseline_path(name)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"params": params or {}, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {os.path.relpath(path, ROOT)}")
+        return 0
+    if args.no_compare or not os.path.exists(path):
+        return 0
+
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("params") and params and baseline["params"] != params:
+        print(f"note: baseline was recorded with {baseline['params']}")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS vs {os.path.relpath(path, ROOT)} (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"no regressions vs {os.path.relpath(path, ROOT)}")
+    return 0
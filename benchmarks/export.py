@@ -0,0 +1,100 @@
+import argparse
+import random
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+# ======================================================
+# REPORTS EXPORT MEMORY CEILING
+# ======================================================
+# Streams /admin/reports/export over --rows reports (1M by default) in each
+# format and checks that resident memory stays flat while the body is
+# consumed: the export must fail this benchmark (exit 1) if RSS grows by
+# more than --rss-ceiling-mb over its starting point.
+
+FORMATS = (
+    ("csv", ""),
+    ("csv_gzip", "gzip=1"),
+    ("ndjson", "format=ndjson"),
+)
+RSS_SAMPLE_EVERY = 256  # response chunks between RSS samples
+
+
+def _reports(user_ids, count, seed_value, now):
+    rng = random.Random(seed_value)
+    for i in range(count):
+        kind = "user" if i % 3 else "app"
+        yield (
+            rng.choice(user_ids),
+            rng.choice(user_ids) if kind == "user" else None,
+            kind,
+            f"Report #{i}: something went wrong near the meetup point.",
+            "open",
+            now - rng.uniform(0, 365 * 86400),
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stream the reports export and check its memory ceiling.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rss-ceiling-mb", type=float, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    common.use_database()
+    app_module, db = common.load_app()
+    conn = db.connect()
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, is_active, created_at) VALUES (?, ?, 'x', 1, ?)",
+        [(f"reporter{i}", f"reporter{i}@example.test", now) for i in range(1000)],
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+    started = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO reports (reporter_id, target_user_id, type, message, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        _reports(user_ids, args.rows, args.seed, now),
+    )
+    conn.commit()
+    conn.close()
+    print(f"seeded {args.rows} reports in {time.perf_counter() - started:.1f}s")
+
+    client = common.admin_client(app_module.app)
+    results = {}
+    failed = []
+    for name, query in FORMATS:
+        baseline_rss = common.current_rss_mb()
+        peak_rss = baseline_rss
+        size = 0
+        started = time.perf_counter()
+        response = client.get(f"/admin/reports/export?{query}", buffered=False)
+        for i, chunk in enumerate(response.response):
+            size += len(chunk)
+            if i % RSS_SAMPLE_EVERY == 0:
+                peak_rss = max(peak_rss, common.current_rss_mb())
+        response.close()
+        wall = time.perf_counter() - started
+        peak_rss = max(peak_rss, common.current_rss_mb())
+        growth = round(peak_rss - baseline_rss, 1)
+        results[name] = {
+            "wall_ms": round(wall * 1000, 1),
+            "rows_per_s": round(args.rows / wall),
+            "mb": round(size / (1024 * 1024), 1),
+            "rss_growth_mb": growth,
+        }
+        if growth > args.rss_ceiling_mb:
+            failed.append(f"{name}: RSS grew {growth} MB (ceiling {args.rss_ceiling_mb} MB)")
+
+    params = {"rows": args.rows}
+    status = common.report("export", results, args, params)
+    for line in failed:
+        print(f"FAIL {line}")
+    return 1 if failed else status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+import argparse
+import random
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+# ======================================================
+# KEYSET PAGINATION AT DEPTH
+# ======================================================
+# One member with --rows reviews (1M by default). /api/user_feedback pages
+# with a (created_at, id) cursor, so a page deep in the history should cost
+# the same as the first one. The same page fetched with LIMIT/OFFSET is
+# timed alongside for contrast.
+
+DEPTHS = (0.0, 0.01, 0.1, 0.5, 0.99)
+
+
+def _rows(reviewed_id, reviewers, count, seed_value, now):
+    rng = random.Random(seed_value)
+    for _ in range(count):
+        yield (rng.choice(reviewers), reviewed_id, rng.randint(1, 10), "ok", now - rng.uniform(0, 365 * 86400))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Page latency at increasing depth in a 1M-row review history.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20, help="Page size.")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    common.use_database()
+    app_module, db = common.load_app()
+    conn = db.connect()
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, is_active, created_at) VALUES (?, ?, 'x', 1, ?)",
+        [(f"reviewer{i}", f"reviewer{i}@example.test", now) for i in range(101)],
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+    target, reviewers = user_ids[0], user_ids[1:]
+    started = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO reviews (reviewer_id, reviewed_id, rating, comment, created_at) VALUES (?, ?, ?, ?, ?)",
+        _rows(target, reviewers, args.rows, args.seed, now),
+    )
+    db.rebuild_review_stats(conn, [target])
+    conn.commit()
+    print(f"seeded {args.rows} reviews in {time.perf_counter() - started:.1f}s")
+
+    client = common.login(app_module.app, reviewers[0])
+    results = {}
+    for depth in DEPTHS:
+        offset = int(args.rows * depth)
+        cursor = None
+        if offset:
+            row = conn.execute(
+                """
+                SELECT created_at, id FROM reviews WHERE reviewed_id=?
+                ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?
+                """,
+                (target, offset - 1),
+            ).fetchone()
+            cursor = app_module._encode_cursor(row["created_at"], row["id"])
+        url = f"/api/user_feedback/{target}?limit={args.limit}" + (f"&cursor={cursor}" if cursor else "")
+        response, durations = common.timed(client.get, url, repeat=args.repeat)
+        if len(response.get_json()["reviews"]) != min(args.limit, args.rows - offset):
+            print(f"short page at offset {offset}")
+            return 1
+        results[f"keyset@{offset}"] = common.summarize(durations)
+
+        _, durations = common.timed(
+            lambda: conn.execute(
+                """
+                SELECT r.id, r.rating, r.comment, r.created_at, u.username
+                FROM reviews r JOIN users u ON u.id = r.reviewer_id
+                WHERE r.reviewed_id=?
+                ORDER BY r.created_at DESC, r.id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (target, args.limit, offset),
+            ).fetchall(),
+            repeat=max(1, args.repeat // 10),
+        )
+        results[f"offset@{offset}"] = common.summarize(durations)
+    conn.close()
+
+    params = {"rows": args.rows, "limit": args.limit}
+    return common.report("keyset", results, args, params)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,253 @@
+import argparse
+import heapq
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.parse
+
+try:
+    from . import common
+    from . import seed
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+    import seed  # type: ignore
+
+# ======================================================
+# CLIENT MIX LOAD TEST
+# ======================================================
+# Each virtual member replays the timers in static/script.js on a virtual
+# clock: MIXES maps every endpoint to its polling interval (seconds). The
+# "sync" mix is today's client without an event stream (one /api/sync every
+# 3s with ETag revalidation); "legacy" is the pre-sync client with its four
+# separate pollers. Nearby refreshes follow GPS updates, and a few writes
+# (send_request, profile views) are sprinkled in. Events run in virtual-time
+# order as fast as the server answers, or at --time-scale x real time.
+
+MIXES = {
+    "sync": {
+        "sync": 3,
+        "nearby": 10,
+        "user_feedback": 30,
+        "send_request": 60,
+    },
+    "legacy": {
+        "match_status": 3,
+        "check_requests": 5,
+        "notifications": 7,
+        "user_info": 8,
+        "nearby": 10,
+        "user_feedback": 30,
+        "send_request": 60,
+    },
+}
+
+NEARBY_RADIUS_KM = 10
+
+
+class Member:
+    """One simulated member: their user id, live position and ETag state."""
+
+    def __init__(self, uid, lat, lon, rng):
+        self.uid = uid
+        self.lat = lat
+        self.lon = lon
+        self.rng = rng
+        self.etag = None
+
+
+def build_request(action, member, live_ids):
+    """(method, path, json_body, extra_headers) for one client action."""
+    if action == "sync":
+        headers = {"If-None-Match": member.etag} if member.etag else {}
+        return "GET", "/api/sync", None, headers
+    if action == "nearby":
+        # GPS jitter of a few metres, like watchPosition updates
+        lat = member.lat + member.rng.uniform(-0.0003, 0.0003)
+        lon = member.lon + member.rng.uniform(-0.0003, 0.0003)
+        return "GET", f"/api/nearby?lat={lat:.6f}&lon={lon:.6f}&radius_km={NEARBY_RADIUS_KM}", None, {}
+    if action == "user_feedback":
+        return "GET", f"/api/user_feedback/{member.rng.choice(live_ids)}", None, {}
+    if action == "send_request":
+        return "POST", "/api/send_request", {"receiver_id": member.rng.choice(live_ids)}, {}
+    return "GET", f"/api/{action}", None, {}
+
+
+class TestClientTransport:
+    """Drive the app in-process through Flask's test client."""
+
+    def __init__(self, app):
+        self.app = app
+        self._clients = {}
+
+    def send(self, member, method, path, body, headers):
+        client = self._clients.get(member.uid)
+        if client is None:
+            client = self._clients[member.uid] = common.login(self.app, member.uid)
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code, response.headers.get("ETag")
+
+
+class HttpTransport:
+    """Drive a running server (e.g. a local gunicorn) over keep-alive HTTP."""
+
+    def __init__(self, app, base_url):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.app = app
+        self._cookies = {}
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return conn
+
+    def send(self, member, method, path, body, headers):
+        cookie = self._cookies.get(member.uid)
+        if cookie is None:
+            cookie = self._cookies[member.uid] = common.session_cookie(self.app, member.uid)
+        headers = dict(headers, Cookie=f"session={cookie}")
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        conn = self._conn()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (ConnectionError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status, response.getheader("ETag")
+
+
+def schedule(members, mix, duration, rng):
+    """All (virtual_time, seq, member, action) events for the run, in time order."""
+    events = []
+    seq = 0
+    for member in members:
+        for action, interval in mix.items():
+            t = rng.uniform(0, interval)  # clients start out of phase
+            while t < duration:
+                events.append((t, seq, member, action))
+                seq += 1
+                t += interval
+    heapq.heapify(events)
+    return [heapq.heappop(events) for _ in range(len(events))]
+
+
+def run(transport, members, live_ids, mix, duration, threads, time_scale, rng):
+    """
+    Execute the schedule. Returns ({action: [latency seconds]},
+    {action: {"errors": n, "4xx": n}}, wall seconds); errors are transport
+    failures and 5xx responses.
+    """
+    events = schedule(members, mix, duration, rng)
+    # a member's requests always go through the same thread, like one browser tab
+    lanes = [[] for _ in range(max(1, threads))]
+    for event in events:
+        lanes[event[2].uid % len(lanes)].append(event)
+
+    samples = {action: [] for action in mix}
+    errors = {action: {"errors": 0, "4xx": 0} for action in mix}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def worker(lane):
+        local = {action: [] for action in mix}
+        local_errors = {action: {"errors": 0, "4xx": 0} for action in mix}
+        for virtual_t, _seq, member, action in lane:
+            if time_scale:
+                delay = started + virtual_t / time_scale - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            method, path, body, headers = build_request(action, member, live_ids)
+            t0 = time.perf_counter()
+            try:
+                status, etag = transport.send(member, method, path, body, headers)
+            except Exception:
+                local_errors[action]["errors"] += 1
+                continue
+            local[action].append(time.perf_counter() - t0)
+            if status >= 500:
+                local_errors[action]["errors"] += 1
+            elif status >= 400:
+                local_errors[action]["4xx"] += 1
+            if etag and action == "sync":
+                member.etag = etag
+        with lock:
+            for action in mix:
+                samples[action].extend(local[action])
+                for key, count in local_errors[action].items():
+                    errors[action][key] += count
+
+    pool = [threading.Thread(target=worker, args=(lane,)) for lane in lanes]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, errors, time.perf_counter() - started
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay the script.js client mix against the member API.")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="sync")
+    parser.add_argument("--users", type=int, default=2000, help="Seeded members.")
+    parser.add_argument("--clients", type=int, default=100, help="Concurrently active members.")
+    parser.add_argument("--duration", type=float, default=60, help="Virtual seconds of client activity.")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--time-scale", type=float, default=0, help="Replay at N x real time (0 = flat out).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="Use (and seed) this SQLite file instead of a temp one.")
+    parser.add_argument("--url", help="Drive a running server (e.g. http://127.0.0.1:8000) instead of the test client.")
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    common.use_database(args.db)
+    app_module, db = common.load_app()
+    conn = db.connect()
+    counts = seed.seed_dataset(conn, users=args.users, seed=args.seed)
+    positions = {
+        row["user_id"]: (row["lat"], row["lon"])
+        for row in conn.execute("SELECT user_id, lat, lon FROM spotlights")
+    }
+    conn.close()
+
+    rng = random.Random(args.seed)
+    live_ids = counts["live_ids"]
+    active = rng.sample(live_ids, min(args.clients, len(live_ids)))
+    members = [Member(uid, *positions[uid], random.Random(args.seed + uid)) for uid in active]
+
+    if args.url:
+        transport = HttpTransport(app_module.app, args.url)
+    else:
+        transport = TestClientTransport(app_module.app)
+
+    mix = MIXES[args.mix]
+    samples, errors, wall = run(transport, members, live_ids, mix, args.duration, args.threads, args.time_scale, rng)
+
+    results = {}
+    for action in mix:
+        results[action] = common.summarize(samples[action], wall)
+        results[action].update(errors[action])
+    results["all"] = common.summarize([s for values in samples.values() for s in values], wall)
+    for key in ("errors", "4xx"):
+        results["all"][key] = sum(counts[key] for counts in errors.values())
+
+    params = {
+        "mix": args.mix, "users": args.users, "clients": len(members),
+        "duration": args.duration, "threads": args.threads, "target": "http" if args.url else "test_client",
+    }
+    print(f"{params} wall={wall:.2f}s")
+    return common.report(f"load_{args.mix}", results, args, params)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+import argparse
+import threading
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+# ======================================================
+# MATCH ACCEPT RACE (stress)
+# ======================================================
+# Each round gives one sender a pending request to --receivers members,
+# then has every receiver accept at the same instant from its own
+# connection. Exactly one accept may win per round, and the users/matches
+# state must pass db.check_active_matches afterwards. Exits 1 on any
+# violation; also reports accept latency under contention.
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Race concurrent accepts of one sender's requests.")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--receivers", type=int, default=16)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    common.use_database()
+    _app_module, db = common.load_app()
+    from spotlight_app import match_service
+
+    conn = db.connect()
+    samples = []
+    violations = []
+    for round_no in range(args.rounds):
+        now = time.time()
+        names = [f"race{round_no}_s"] + [f"race{round_no}_r{i}" for i in range(args.receivers)]
+        conn.executemany(
+            "INSERT INTO users (username, email, password_hash, is_active, is_matched, created_at) VALUES (?, ?, 'x', 1, 0, ?)",
+            [(name, f"{name}@example.test", now) for name in names],
+        )
+        ids = {
+            row["username"]: row["id"]
+            for row in conn.execute(
+                f"SELECT id, username FROM users WHERE username IN ({','.join('?' * len(names))})", names,
+            )
+        }
+        sender = ids[names[0]]
+        receivers = [ids[name] for name in names[1:]]
+        conn.executemany(
+            "INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, 'pending', ?)",
+            [(sender, receiver, now) for receiver in receivers],
+        )
+        conn.commit()
+        request_ids = {
+            row["receiver_id"]: row["id"]
+            for row in conn.execute("SELECT id, receiver_id FROM requests WHERE sender_id=?", (sender,))
+        }
+
+        outcomes = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(receivers))
+
+        def accept(receiver):
+            own = db.connect()
+            try:
+                barrier.wait()
+                started = time.perf_counter()
+                result = match_service.accept_request(own, request_ids[receiver], receiver, 0)
+                elapsed = time.perf_counter() - started
+            finally:
+                own.close()
+            with lock:
+                outcomes.append(result.status)
+                samples.append(elapsed)
+
+        threads = [threading.Thread(target=accept, args=(receiver,)) for receiver in receivers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        wins = outcomes.count(match_service.MATCHED)
+        matches = conn.execute(
+            "SELECT COUNT(*) FROM matches WHERE user1_id=? OR user2_id=?", (sender, sender)
+        ).fetchone()[0]
+        if wins != 1 or matches != 1:
+            violations.append(f"round {round_no}: {wins} accepts won, {matches} matches for sender {sender}")
+
+    issues = db.check_active_matches(conn)
+    conn.close()
+    violations.extend(issues)
+
+    results = {"accept": common.summarize(samples)}
+    params = {"rounds": args.rounds, "receivers": args.receivers}
+    status = common.report("match_race", results, args, params)
+    for line in violations:
+        print(f"FAIL {line}")
+    if not violations:
+        print(f"{args.rounds} rounds: exactly one match each, match state consistent")
+    return 1 if violations else status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
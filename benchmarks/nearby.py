@@ -0,0 +1,110 @@
+import argparse
+import random
+
+try:
+    from . import common
+    from . import seed
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+    import seed  # type: ignore
+
+# ======================================================
+# NEARBY SCALING
+# ======================================================
+# /api/nearby latency as the number of live spotlights worldwide grows,
+# for both backends: the in-process live grid and the R*Tree query
+# (SPOTLIGHT_LIVE_GRID=0). The home city always holds --city-size
+# spotlights; every size past that is filler cities of the same density
+# placed far away, so the rows within the radius stay fixed and the timings
+# show how the index copes with the total, not a growing result. Radius
+# queries ask for the top --limit, keeping JSON encoding out of it. The
+# dataset grows in place between sizes, so each step only seeds the
+# difference. A city-wide map viewport at --cluster-zoom is timed too:
+# per-tile cached clusters on the grid, aggregated per request on the R*Tree.
+
+FILLER_MIN_DEG = 5.0  # filler cities keep at least this far from the home city, in lat and lon
+
+
+def _filler_centers(rng, count, home):
+    centers = []
+    while len(centers) < count:
+        lat, lon = rng.uniform(-60.0, 60.0), rng.uniform(-179.0, 179.0)
+        if abs(lat - home[0]) >= FILLER_MIN_DEG or abs(lon - home[1]) >= FILLER_MIN_DEG:
+            centers.append((lat, lon))
+    return centers
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure /api/nearby latency against live spotlight count.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Comma-separated live spotlight counts.")
+    parser.add_argument("--city-size", type=int, default=1000, help="Live spotlights in the home city (and each filler city).")
+    parser.add_argument("--limit", type=int, default=50, help="limit= on radius queries.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per size and backend.")
+    parser.add_argument("--radius-km", type=float, default=10)
+    parser.add_argument("--cluster-zoom", type=int, default=11)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    if sizes[0] < args.city_size:
+        parser.error("every size must hold at least --city-size spotlights")
+    common.use_database()
+    app_module, db = common.load_app()
+    conn = db.connect()
+    me = seed.seed_dataset(conn, users=1, live_ratio=0, pending_requests=0, reviews=0, seed=args.seed)["user_ids"][0]
+    client = common.login(app_module.app, me)
+    rng = random.Random(args.seed)
+    lat0, lon0 = seed.CITY_CENTER
+
+    results = {}
+    seed.seed_dataset(conn, users=args.city_size, live_ratio=1.0, pending_requests=0, reviews=0, seed=args.seed)
+    seeded = args.city_size
+    for size in sizes:
+        filler = size - seeded
+        if filler:
+            centers = _filler_centers(rng, -(-filler // args.city_size), seed.CITY_CENTER)
+            seed.seed_dataset(
+                conn, users=filler, live_ratio=1.0, pending_requests=0, reviews=0, seed=args.seed + size,
+                centers=centers,
+            )
+        seeded = size
+        for backend, grid_enabled in (("grid", True), ("rtree", False)):
+            app_module.LIVE_GRID_ENABLED = grid_enabled
+            if grid_enabled:
+                with app_module.app.app_context():
+                    app_module._refresh_live_grid(db.get_db_connection())
+            samples = []
+            for _ in range(args.requests):
+                lat = lat0 + rng.uniform(-0.05, 0.05)
+                lon = lon0 + rng.uniform(-0.05, 0.05)
+                _, durations = common.timed(
+                    client.get,
+                    f"/api/nearby?lat={lat:.6f}&lon={lon:.6f}&radius_km={args.radius_km}&limit={args.limit}",
+                )
+                samples.extend(durations)
+            # unlimited once, to show the in-radius count holds still across sizes
+            response = client.get(f"/api/nearby?lat={lat0}&lon={lon0}&radius_km={args.radius_km}")
+            results[f"{backend}@{size}"] = common.summarize(samples)
+            results[f"{backend}@{size}"]["rows"] = len(response.get_json())
+
+            # the whole seeded city, padded like the client pads its viewport
+            span = seed.CITY_SPREAD_DEG * 1.2
+            bbox = f"{lon0 - span:.4f},{lat0 - span:.4f},{lon0 + span:.4f},{lat0 + span:.4f}"
+            response, durations = common.timed(
+                client.get, f"/api/nearby?bbox={bbox}&zoom={args.cluster_zoom}", repeat=args.requests,
+            )
+            payload = response.get_json()
+            results[f"{backend}-clusters@{size}"] = common.summarize(durations)
+            results[f"{backend}-clusters@{size}"]["rows"] = len(payload["clusters"])
+    conn.close()
+
+    params = {
+        "sizes": sizes, "city_size": args.city_size, "requests": args.requests, "radius_km": args.radius_km,
+        "limit": args.limit, "cluster_zoom": args.cluster_zoom,
+    }
+    return common.report("nearby", results, args, params)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
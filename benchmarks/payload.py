@@ -0,0 +1,101 @@
+import argparse
+import gc
+import gzip
+import random
+import sqlite3
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+# ======================================================
+# NEARBY PAYLOAD SERIALISATION (micro)
+# ======================================================
+# --rows live spotlights (10k by default) as /api/nearby would answer them:
+# rows read from SQLite and turned into grid entries, then encoded as one
+# dict per record (the default) or as one columnar block (format=compact),
+# and rendered to JSON through the app's own provider. Reports the time of
+# each stage and the response size, raw and gzipped.
+
+CITY_CENTER = (12.9716, 77.5946)
+INTENTS = ["Coffee", "Movie", "Dinner", "Walk", "Drinks", "Study", "Networking"]
+PLACES = ["Cafe", "Park", "Mall", "Bookstore", "Food court", "Metro station"]
+VIBES = ["Chill", "DeepTalks", "Exploring", "Drinks", "Coffee", "Foodie", "Music", "Books"]
+BIO = "Here for good coffee, long walks and whatever the city has on tonight. Ask me about books. " * 3
+
+
+def _rows(count, seed_value, now):
+    rng = random.Random(seed_value)
+    for i in range(count):
+        gender = "male" if i % 2 else "female"
+        yield (
+            i + 1,
+            CITY_CENTER[0] + rng.uniform(-0.1, 0.1),
+            CITY_CENTER[1] + rng.uniform(-0.1, 0.1),
+            rng.choice(PLACES),
+            rng.choice(INTENTS),
+            "2026-10-17T19:30",
+            "Red jacket, by the window",
+            now + rng.uniform(60, 5400),
+            f"member{i}",
+            rng.randint(40, 100),
+            BIO[: rng.randint(0, len(BIO))],
+            ",".join(rng.sample(VIBES, 3)),
+            f"/profileimg/{rng.randint(1, 20)}.png",
+            gender,
+            0,
+            None,
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time /api/nearby record serialisation, dicts vs compact.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    common.use_database()
+    app_module, _db = common.load_app()
+    lat0, lon0 = CITY_CENTER
+
+    # the same columns the app selects, read back as sqlite3.Row like the app does
+    source = sqlite3.connect(":memory:")
+    source.row_factory = sqlite3.Row
+    columns = [part.strip().split(".")[1] for part in app_module.live_grid.LIVE_SPOTLIGHT_COLUMNS.split(",")]
+    source.execute(f"CREATE TABLE live ({', '.join(columns)})")
+    source.executemany(
+        f"INSERT INTO live VALUES ({', '.join('?' * len(columns))})", _rows(args.rows, args.seed, time.time()),
+    )
+    rows = source.execute("SELECT * FROM live").fetchall()
+
+    results = {}
+    entries, durations = common.timed(lambda: [app_module._live_grid_entry(row) for row in rows], repeat=args.repeat)
+    results["entries"] = common.summarize(durations)
+    ranked = app_module.ranking.rank(entries, lat0, lon0, time.time(), distance_scale_km=15.0)
+
+    with app_module.app.app_context():
+        for name, compact_format in (("dicts", False), ("compact", True)):
+            # drop the previous format's objects so they do not slow this one's GC passes
+            payload = body = None
+            gc.collect()
+            payload, durations = common.timed(
+                app_module._nearby_records, ranked, compact_format, repeat=args.repeat,
+            )
+            results[f"{name}_encode"] = common.summarize(durations)
+            body, durations = common.timed(
+                lambda: app_module.app.json.response(payload).get_data(), repeat=args.repeat,
+            )
+            results[f"{name}_json"] = common.summarize(durations)
+            results[f"{name}_json"]["kb"] = round(len(body) / 1024, 1)
+            results[f"{name}_json"]["gzip_kb"] = round(len(gzip.compress(body, 6)) / 1024, 1)
+
+    params = {"rows": args.rows, "repeat": args.repeat}
+    return common.report("payload", results, args, params)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
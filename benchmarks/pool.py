@@ -0,0 +1,103 @@
+import argparse
+import random
+import threading
+import time
+
+try:
+    from . import common
+    from . import seed
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+    import seed  # type: ignore
+
+# ======================================================
+# CONNECTION POOL THROUGHPUT
+# ======================================================
+# Mixed read/write operations from concurrent threads, each op borrowing a
+# connection the way a request does: from db.ConnectionPool, or by opening
+# (and tuning) a fresh connection per op as the app did before pooling.
+# Writes take the write lock with BEGIN IMMEDIATE like the match service.
+
+
+def _read(conn, uid):
+    conn.execute("SELECT id, username, trust_score, is_matched FROM users WHERE id=?", (uid,)).fetchone()
+    conn.execute(
+        "SELECT COUNT(*) FROM requests WHERE receiver_id=? AND status='pending'", (uid,)
+    ).fetchone()
+
+
+def _write(conn, uid):
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("UPDATE users SET sync_version=COALESCE(sync_version, 0) + 1 WHERE id=?", (uid,))
+    conn.execute(
+        "INSERT INTO app_notifications (user_id, title, message, kind, created_at) VALUES (?, 'bench', 'bench', 'bench', ?)",
+        (uid, time.time()),
+    )
+    conn.commit()
+
+
+def run(acquire, release, user_ids, threads, ops, write_ratio, seed_value):
+    samples = []
+    lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(seed_value + n)
+        local = []
+        for _ in range(ops):
+            uid = rng.choice(user_ids)
+            started = time.perf_counter()
+            conn = acquire()
+            try:
+                if rng.random() < write_ratio:
+                    _write(conn, uid)
+                else:
+                    _read(conn, uid)
+            finally:
+                release(conn)
+            local.append(time.perf_counter() - started)
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare pooled and per-request SQLite connections.")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per thread.")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    path = common.use_database()
+    from spotlight_app import db
+
+    db.init_db()
+    conn = db.connect()
+    user_ids = seed.seed_dataset(conn, users=args.users, seed=args.seed)["user_ids"]
+    conn.close()
+
+    pool = db.ConnectionPool(path, size=args.threads)
+    variants = {
+        "pooled": (pool.acquire, pool.release),
+        "per_request": (lambda: db.connect(path), lambda conn: conn.close()),
+    }
+    results = {}
+    for name, (acquire, release) in variants.items():
+        samples, wall = run(acquire, release, user_ids, args.threads, args.ops, args.write_ratio, args.seed)
+        results[name] = common.summarize(samples, wall)
+
+    params = {"users": args.users, "threads": args.threads, "ops": args.ops, "write_ratio": args.write_ratio}
+    return common.report("pool", results, args, params)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+import argparse
+import os
+import random
+import threading
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+from spotlight_app import outbox, push_dispatch
+
+# ======================================================
+# PUSH BROADCAST FAN-OUT
+# ======================================================
+# An admin broadcast to --subscriptions browsers, delivered by the outbox
+# worker through a stand-in sender instead of the real push services: each
+# send sleeps --send-latency-ms and a --gone-ratio share answers "gone"
+# (pruned). Measures the admin request itself (it only enqueues) and the
+# worker's drain time and sends per second.
+
+
+def stand_in_sender(latency_seconds, gone_ratio, seed_value):
+    rng = random.Random(seed_value)
+    lock = threading.Lock()
+
+    def send(subscription_info, data):
+        time.sleep(latency_seconds)
+        with lock:
+            gone = rng.random() < gone_ratio
+        return push_dispatch.OUTCOME_GONE if gone else push_dispatch.OUTCOME_SENT
+
+    return send
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time an admin push broadcast through the outbox worker.")
+    parser.add_argument("--subscriptions", type=int, default=10000)
+    parser.add_argument("--send-latency-ms", type=float, default=20)
+    parser.add_argument("--gone-ratio", type=float, default=0.02)
+    parser.add_argument("--push-workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    # the worker is driven explicitly below; push only needs keys to look configured
+    os.environ["SPOTLIGHT_OUTBOX_EMBEDDED_WORKER"] = "0"
+    os.environ.setdefault("VAPID_PUBLIC_KEY", "bench-public-key")
+    os.environ.setdefault("VAPID_PRIVATE_KEY", "bench-private-key")
+    common.use_database()
+    app_module, db = common.load_app()
+    app_module.push_dispatcher = push_dispatch.PushDispatcher(
+        stand_in_sender(args.send_latency_ms / 1000, args.gone_ratio, args.seed),
+        max_workers=args.push_workers,
+    )
+
+    conn = db.connect()
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, is_active, created_at) VALUES (?, ?, 'x', 1, ?)",
+        [(f"push{i}", f"push{i}@example.test", now) for i in range(args.subscriptions)],
+    )
+    conn.executemany(
+        """
+        INSERT INTO push_subscriptions (user_id, endpoint, p256dh, auth, created_at, updated_at)
+        SELECT id, 'https://push.example.test/' || id, 'p256dh', 'auth', ?, ? FROM users
+        """,
+        [(now, now)],
+    )
+    conn.commit()
+    conn.close()
+
+    client = common.admin_client(app_module.app)
+    started = time.perf_counter()
+    response = client.post("/admin/push/send", json={"title": "Bench", "message": "Load test", "target_type": "all"})
+    enqueue_seconds = time.perf_counter() - started
+    if response.status_code != 202:
+        print(f"push send failed: {response.status_code} {response.get_data(as_text=True)}")
+        return 1
+    job_id = response.get_json()["job_id"]
+
+    worker = outbox.OutboxWorker(
+        db.connect, app_module.outbox_handlers, batch_size=args.batch_size, group_sizes=app_module.outbox_group_sizes
+    )
+    started = time.perf_counter()
+    totals = worker.run(once=True)
+    drain_seconds = time.perf_counter() - started
+
+    conn = db.connect()
+    job = push_dispatch.job_status(conn, job_id)
+    conn.close()
+    print(f"job {job_id}: {job}")
+    print(f"worker totals: {totals}")
+
+    results = {
+        "enqueue": {"wall_ms": round(enqueue_seconds * 1000, 2)},
+        "drain": {
+            "wall_ms": round(drain_seconds * 1000, 1),
+            "sends_per_s": round(args.subscriptions / drain_seconds, 1),
+        },
+    }
+    params = {
+        "subscriptions": args.subscriptions, "send_latency_ms": args.send_latency_ms,
+        "push_workers": args.push_workers, "batch_size": args.batch_size,
+    }
+    status = common.report("push", results, args, params)
+    if job["status"] != "done":
+        print(f"FAIL broadcast finished as {job['status']!r}")
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
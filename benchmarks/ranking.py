@@ -0,0 +1,102 @@
+import argparse
+import math
+import random
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+from spotlight_app import db, live_grid, ranking
+
+# ======================================================
+# NEARBY RANKING (micro)
+# ======================================================
+# Scores --candidates live spotlights (100k by default) around CITY_CENTER
+# for one viewer and keeps the top --limit, as /api/nearby does with
+# `limit=`: with numpy (arrays) and with the plain-loop fallback, plus the
+# full ordering of every candidate. The old distance-only sort is timed
+# next to them for reference.
+
+CITY_CENTER = (12.9716, 77.5946)
+CITY_SPREAD_DEG = 0.15
+
+
+def _entries(count, seed_value, now):
+    rng = random.Random(seed_value)
+    vibes = list(db.VIBE_BITS)
+    meet_times = [time.strftime("%Y-%m-%dT%H:%M", time.localtime(now + m * 60)) for m in range(-120, 240)]
+    return [
+        live_grid.LiveSpotlight(
+            i + 1,
+            CITY_CENTER[0] + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG),
+            CITY_CENTER[1] + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG),
+            "Cafe", "Coffee", rng.choice(meet_times), "Blue jacket", now + 3600,
+            f"member{i}", rng.randint(50, 150), "", "",
+            "/profileimg/1.png", db.vibe_mask(rng.sample(vibes, rng.randint(1, 5))), 1,
+        )
+        for i in range(count)
+    ]
+
+
+def _distance_sort(entries, lat, lon):
+    # what /api/nearby did before ranking: haversine per candidate, then sort
+    def haversine(entry):
+        d_lat = math.radians(entry.lat - lat)
+        d_lon = math.radians(entry.lon - lon)
+        a = (
+            math.sin(d_lat / 2) ** 2
+            + math.cos(math.radians(lat)) * math.cos(math.radians(entry.lat)) * math.sin(d_lon / 2) ** 2
+        )
+        return 2 * ranking.EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+    return sorted(((haversine(entry), entry) for entry in entries), key=lambda item: item[0])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time nearby compatibility ranking over many candidates.")
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    now = time.time()
+    entries = _entries(args.candidates, args.seed, now)
+    lat, lon = CITY_CENTER
+    viewer_mask = db.vibe_mask(["Coffee", "Music", "Books"])
+
+    def run(limit):
+        return ranking.rank(entries, lat, lon, now, vibe_mask=viewer_mask, distance_scale_km=10.0, limit=limit)
+
+    results = {}
+    numpy_module = ranking.numpy
+    paths = [("arrays", numpy_module), ("loop", None)] if numpy_module is not None else [("loop", None)]
+    if numpy_module is None:
+        print("numpy is not installed: timing the plain-loop fallback only")
+    top = {}
+    try:
+        for name, module in paths:
+            ranking.numpy = module
+            top[name], durations = common.timed(run, args.limit, repeat=args.repeat)
+            results[f"{name}_top{args.limit}"] = common.summarize(durations)
+            _, durations = common.timed(run, None, repeat=max(1, args.repeat // 4))
+            results[f"{name}_all"] = common.summarize(durations)
+    finally:
+        ranking.numpy = numpy_module
+    _, durations = common.timed(_distance_sort, entries, lat, lon, repeat=max(1, args.repeat // 4))
+    results["distance_sort_all"] = common.summarize(durations)
+
+    params = {"candidates": args.candidates, "limit": args.limit, "repeat": args.repeat}
+    status = common.report("ranking", results, args, params)
+    picked = {name: [r.entry.user_id for r in ranked] for name, ranked in top.items()}
+    if len({tuple(ids) for ids in picked.values()}) > 1:
+        print("FAIL arrays and loop picked different top lists")
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+import argparse
+import random
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+from spotlight_app import db
+
+# ======================================================
+# SYNTHETIC DATASET
+# ======================================================
+# A deterministic (per --seed) city's worth of members: profiles, live
+# spotlights scattered around CITY_CENTER (or dealt round-robin across
+# `centers`), pending requests between live users and a review history. Everything goes in with executemany inside
+# one transaction.
+
+CITY_CENTER = (12.9716, 77.5946)
+CITY_SPREAD_DEG = 0.15  # roughly +-16 km
+VIBES = ["Chill", "DeepTalks", "Exploring", "Drinks", "Coffee", "Foodie",
+         "Fitness", "Movies", "Music", "Gaming", "Books", "Networking"]
+INTENTS = ["Coffee", "Movie", "Dinner", "Walk", "Drinks", "Networking", "Gym buddy"]
+PLACES = ["Third Wave Coffee", "Cubbon Park", "Church Street", "Indiranagar 100ft Rd",
+          "Koramangala Social", "Lalbagh Gate", "Orion Mall"]
+COMMENTS = ["Great chat!", "Showed up on time.", "Friendly and fun.", "Bit late but nice.", ""]
+
+
+def seed_dataset(conn, users=2000, live_ratio=0.3, pending_requests=500, reviews=5000, seed=42, now=None,
+                 centers=(CITY_CENTER,)) -> dict:
+    """Insert the synthetic dataset into an initialised DB and commit. Returns row counts."""
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    base_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+
+    user_rows = []
+    for i in range(users):
+        gender = rng.choice(("male", "female"))
+        user_rows.append((
+            f"bench_{base_id + i + 1}",
+            f"bench_{base_id + i + 1}@example.test",
+            "x",
+            gender,
+            f"{rng.randint(1975, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "Here for good conversations.",
+            ",".join(rng.sample(VIBES, rng.randint(1, 5))),
+            "9000000000",
+            rng.randint(60, 140),
+            f"/profileimg/{rng.randint(1, 20)}.png",
+            now - rng.uniform(0, 365 * 86400),
+        ))
+
+    conn.execute("BEGIN")
+    conn.executemany(
+        """
+        INSERT INTO users
+        (username, email, password_hash, gender, dob, bio, vibe_tags, phone,
+         trust_score, avatar_url, is_active, is_matched, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 0, ?)
+        """,
+        user_rows,
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE id > ? ORDER BY id", (base_id,))]
+
+    live_ids = rng.sample(user_ids, int(users * live_ratio))
+    conn.executemany(
+        """
+        INSERT INTO spotlights
+        (user_id, lat, lon, place, intent, meet_time, clue, timestamp, expiry)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                uid,
+                centers[i % len(centers)][0] + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG),
+                centers[i % len(centers)][1] + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG),
+                rng.choice(PLACES),
+                rng.choice(INTENTS),
+                time.strftime("%Y-%m-%dT%H:%M", time.localtime(now + rng.uniform(600, 7200))),
+                "Blue jacket",
+                now - rng.uniform(0, 1800),
+                now + rng.uniform(1800, 5400),
+            )
+            for i, uid in enumerate(live_ids)
+        ],
+    )
+    # the intent code /api/checkin stores next to the free text
+    for intent in INTENTS:
+        conn.execute("UPDATE spotlights SET intent_code=? WHERE intent=?", (db.intent_code(conn, intent), intent))
+
+    pairs = set()
+    pending_requests = min(pending_requests, len(live_ids) * (len(live_ids) - 1))
+    while len(pairs) < pending_requests:
+        sender, receiver = rng.sample(live_ids, 2)
+        pairs.add((sender, receiver))
+    conn.executemany(
+        "INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, 'pending', ?)",
+        [(sender, receiver, now - rng.uniform(0, 1800)) for sender, receiver in pairs],
+    )
+
+    conn.executemany(
+        "INSERT INTO reviews (reviewer_id, reviewed_id, rating, comment, created_at) VALUES (?, ?, ?, ?, ?)",
+        [
+            (*rng.sample(user_ids, 2), rng.randint(1, 10), rng.choice(COMMENTS), now - rng.uniform(0, 180 * 86400))
+            for _ in range(reviews if users > 1 else 0)
+        ],
+    )
+    conn.commit()
+
+    db.rebuild_review_stats(conn)
+    conn.commit()
+    return {
+        "users": users,
+        "spotlights": len(live_ids),
+        "requests": len(pairs),
+        "reviews": reviews if users > 1 else 0,
+        "user_ids": user_ids,
+        "live_ids": live_ids,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a synthetic Spotlight database for benchmarking.")
+    parser.add_argument("--db", help="SQLite file to create or extend (default: a temp file).")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--live-ratio", type=float, default=0.3)
+    parser.add_argument("--pending-requests", type=int, default=500)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    path = common.use_database(args.db)
+    db.init_db()
+    conn = db.connect()
+    started = time.perf_counter()
+    counts = seed_dataset(
+        conn, args.users, args.live_ratio, args.pending_requests, args.reviews, args.seed,
+    )
+    conn.close()
+    print(
+        f"seeded {path}: {counts['users']} users, {counts['spotlights']} spotlights, "
+        f"{counts['requests']} requests, {counts['reviews']} reviews "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+import argparse
+import time
+
+try:
+    from . import common
+except ImportError:  # allow running as a plain script
+    import common  # type: ignore
+
+# ======================================================
+# UNIQUE USERNAME PICKING
+# ======================================================
+# Google sign-ups derive a username from the display name, so popular
+# first names pile up ("alex", "alex2", ... "alex10000"). This times
+# _build_unique_username for the next "alex" once --taken of them exist,
+# next to a few unrelated names so the range scan has neighbours.
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time unique-username selection for a crowded base name.")
+    parser.add_argument("--base", default="alex")
+    parser.add_argument("--taken", type=int, default=10000, help="Existing users sharing the base name.")
+    parser.add_argument("--noise", type=int, default=50000, help="Unrelated users around it in the index.")
+    parser.add_argument("--repeat", type=int, default=200)
+    common.add_baseline_args(parser)
+    args = parser.parse_args(argv)
+
+    common.use_database()
+    app_module, db = common.load_app()
+    conn = db.connect()
+    now = time.time()
+    names = [args.base] + [f"{args.base}{i}" for i in range(2, args.taken + 1)]
+    names += [f"{args.base}_{i}" for i in range(args.noise // 2)]
+    names += [f"{args.base[:-1]}{chr(ord(args.base[-1]) + 1)}{i}" for i in range(args.noise - args.noise // 2)]
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, is_active, created_at) VALUES (?, ?, 'x', 1, ?)",
+        [(name, f"{name}@example.test", now) for name in names],
+    )
+    conn.commit()
+
+    picked, durations = common.timed(app_module._build_unique_username, conn, args.base, repeat=args.repeat)
+    conn.close()
+    expected = f"{args.base}{args.taken + 1}"
+    if picked != expected:
+        print(f"unexpected username {picked!r} (expected {expected!r})")
+        return 1
+
+    results = {f"{args.base}_taken_{args.taken}": common.summarize(durations)}
+    params = {"taken": args.taken, "noise": args.noise}
+    return common.report("usernames", results, args, params)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ======================================================
+# ACTIVE-USER CACHE (per worker, TTL + shared signal file)
+# ======================================================
+# Caches the is_active state that enforce_active_user_session checks on
+# every member request. Admin actions touch a signal file next to the
+# database; every worker stats it at most once per `check_interval` and
+# drops its whole cache when it changes, so blocks reach all gunicorn
+# workers within that interval. The TTL bounds staleness for writes that
+# bypass the admin endpoints. Entries are dropped once expired and the
+# least recently used go first past `max_entries`, so the cache stays
+# bounded however many members a worker has seen.
+#
+# A lookup that misses reads the database and then put()s the result. If
+# the cache was flushed in between (an admin blocked the user meanwhile),
+# that result may predate the block, so put() takes the `generation` read
+# before the query and drops the write when a flush has happened since.
+
+STATE_ACTIVE = "active"
+STATE_BLOCKED = "blocked"
+STATE_MISSING = "missing"
+
+
+def bump_signal(path) -> None:
+    """Atomically replace the signal file so its inode/mtime always change."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as fh:
+        fh.write(str(time.time_ns()))
+    os.replace(tmp_path, path)
+
+
+class ActiveUserCache:
+    def __init__(self, signal_path_fn, ttl_seconds=30.0, check_interval=1.0, max_entries=50000):
+        self.signal_path_fn = signal_path_fn
+        self.ttl_seconds = ttl_seconds
+        self.check_interval = check_interval
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._signal = None
+        self._checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every flush; read it before the query whose result goes to put()."""
+        with self._lock:
+            return self._generation
+
+    def _flush_locked(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+
+    def _read_signal(self):
+        try:
+            st = os.stat(self.signal_path_fn())
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _check_signal_locked(self, now) -> None:
+        if self._checked_at and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        signal = self._read_signal()
+        if signal != self._signal:
+            if self._entries:
+                self.invalidations += 1
+            self._flush_locked()
+            self._signal = signal
+
+    def get(self, user_id):
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._check_signal_locked(now)
+            cached = self._entries.get(user_id)
+            if cached is not None:
+                if now - cached[1] < self.ttl_seconds:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return cached[0]
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, state, generation=None) -> None:
+        """Cache `state`, unless the cache was flushed since `generation` was read."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[user_id] = (state, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Flush this worker's cache and signal every other worker to do the same."""
+        try:
+            bump_signal(self.signal_path_fn())
+        except OSError:
+            pass
+        with self._lock:
+            self._flush_locked()
+            self.invalidations += 1
+            # our own bump should not flush this worker's cache a second time
+            self._signal = self._read_signal()
+            self._checked_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl_seconds,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+            }
@@ -1,9 +1,18 @@
 import time
 import os
 import logging
+import math
 import re
+import sqlite3
 import json
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory, abort
+import base64
+import hmac
+import zlib
+import threading
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+import click
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory, abort, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 import csv
 import io
@@ -14,9 +23,25 @@ except ImportError:
     OAuth = None  # type: ignore
 
 try:
+    from . import compact
     from . import db
+    from . import instrumentation
+    from . import live_grid
+    from . import match_service
+    from . import outbox
+    from . import push_dispatch
+    from . import ranking
+    from .active_user_cache import ActiveUserCache, STATE_ACTIVE, STATE_BLOCKED, STATE_MISSING
 except ImportError:  # allow running as standalone script
+    import compact  # type: ignore
     import db  # type: ignore
+    import instrumentation  # type: ignore
+    import live_grid  # type: ignore
+    import match_service  # type: ignore
+    import outbox  # type: ignore
+    import push_dispatch  # type: ignore
+    import ranking  # type: ignore
+    from active_user_cache import ActiveUserCache, STATE_ACTIVE, STATE_BLOCKED, STATE_MISSING  # type: ignore
 
 try:
     from pywebpush import webpush, WebPushException
@@ -70,23 +95,40 @@ else:
 # DB INIT
 # ======================================================
 db.init_app(app)
+instrumentation.init_app(app)
 try:
     db.init_db()
 except Exception:
     pass
 
 
+USERNAME_INSERT_ATTEMPTS = 5
+
+
 def _build_unique_username(conn, preferred: str) -> str:
     base = re.sub(r"[^A-Za-z0-9_]", "", preferred or "")[:20]
     if not base:
         base = "user"
 
-    candidate = base
+    # one range scan over the username index: every `base` + digits name
+    # sorts in [base, base + ":") because ":" follows "9". Only names this
+    # function can produce count: bare `base` is suffix 1, then base2,
+    # base3, ...; "alex01" or "alex1" never collide with those.
+    suffix_re = re.compile(re.escape(base) + r"([2-9]|[1-9]\d+)?")
+    taken = set()
+    for row in conn.execute(
+        "SELECT username FROM users WHERE username >= ? AND username < ?",
+        (base, base + ":"),
+    ):
+        match = suffix_re.fullmatch(row["username"])
+        if match:
+            digits = match.group(1)
+            taken.add(int(digits) if digits else 1)
+
     suffix = 1
-    while conn.execute("SELECT 1 FROM users WHERE username=?", (candidate,)).fetchone():
+    while suffix in taken:
         suffix += 1
-        candidate = f"{base}{suffix}"
-    return candidate
+    return base if suffix == 1 else f"{base}{suffix}"
 
 
 def _is_profile_complete(user) -> bool:
@@ -105,22 +147,28 @@ def _is_profile_complete(user) -> bool:
     return True
 
 
-REQUEST_PENDING_TTL_SECONDS = 60 * 60  # 1 hour
+REQUEST_PENDING_TTL_SECONDS = db.REQUEST_PENDING_TTL_SECONDS
+NEARBY_DEFAULT_RADIUS_KM = 10.0
+NEARBY_MAX_RADIUS_KM = 50.0
+EARTH_RADIUS_KM = 6371.0088
+LIVE_GRID_ENABLED = os.environ.get("SPOTLIGHT_LIVE_GRID", "1").strip() != "0"
+LIVE_GRID_REFRESH_SECONDS = float(os.environ.get("SPOTLIGHT_LIVE_GRID_REFRESH_SECONDS", "5"))
+LIVE_GRID_CATCH_UP_MAX = 2000  # logged changes past this rebuild the grid instead
+nearby_grid = live_grid.LiveGrid()
+# one rebuild or catch-up at a time, so the grid's version matches its entries
+live_grid_refresh_lock = threading.Lock()
+EVENTS_POLL_SECONDS = float(os.environ.get("SPOTLIGHT_EVENTS_POLL_SECONDS", "1.5"))
+EVENTS_STREAM_SECONDS = float(os.environ.get("SPOTLIGHT_EVENTS_STREAM_SECONDS", "55"))
+EVENTS_RESYNC_SECONDS = 30
+EVENTS_KEEPALIVE_SECONDS = 15
+# each open stream holds a worker thread for up to EVENTS_STREAM_SECONDS;
+# past this many per process new streams get a 503 and the client polls
+# /api/sync instead, so the remaining threads keep serving other requests
+EVENTS_MAX_STREAMS = int(os.environ.get("SPOTLIGHT_EVENTS_MAX_STREAMS", "16"))
+events_stream_slots = threading.BoundedSemaphore(max(0, EVENTS_MAX_STREAMS) or 1)
+SYNC_ETAG_BUCKET_SECONDS = 60
 MAX_PROFILE_VIBES = 5
-PROFILE_VIBE_OPTIONS = [
-    ("Chill", "Chill"),
-    ("DeepTalks", "Deep Talks"),
-    ("Exploring", "Exploring"),
-    ("Drinks", "Drinks"),
-    ("Coffee", "Coffee"),
-    ("Foodie", "Foodie"),
-    ("Fitness", "Fitness"),
-    ("Movies", "Movies"),
-    ("Music", "Music"),
-    ("Gaming", "Gaming"),
-    ("Books", "Books"),
-    ("Networking", "Networking"),
-]
+PROFILE_VIBE_OPTIONS = db.PROFILE_VIBE_OPTIONS
 PROFILE_VIBE_ALLOWED = {value for value, _ in PROFILE_VIBE_OPTIONS}
 PROFILE_IMAGE_DIR = os.path.join(os.path.dirname(__file__), "profileimg")
 PROFILE_IMAGE_FILENAMES = {f"{i}.png" for i in range(1, 21)}
@@ -143,6 +191,18 @@ PROFILE_AVATAR_PRESETS = [
 ]
 PROFILE_AVATAR_ALLOWED = {item["url"] for item in PROFILE_AVATAR_PRESETS}
 DEFAULT_PROFILE_AVATAR_URL = PROFILE_AVATAR_PRESETS[0]["url"]
+# per avatar group (None: no gender set), built once; sanitising runs for every nearby row
+PROFILE_AVATAR_OPTIONS_BY_GROUP = {
+    None: PROFILE_AVATAR_PRESETS,
+    **{
+        group: [item for item in PROFILE_AVATAR_PRESETS if item["group"] == group]
+        for group in ("boy", "girl")
+    },
+}
+PROFILE_AVATAR_ALLOWED_BY_GROUP = {
+    group: frozenset(item["url"] for item in options)
+    for group, options in PROFILE_AVATAR_OPTIONS_BY_GROUP.items()
+}
 
 
 def _avatar_group_for_gender(gender_value):
@@ -155,14 +215,11 @@ def _avatar_group_for_gender(gender_value):
 
 
 def _avatar_options_for_gender(gender_value):
-    group = _avatar_group_for_gender(gender_value)
-    if not group:
-        return PROFILE_AVATAR_PRESETS
-    return [item for item in PROFILE_AVATAR_PRESETS if item["group"] == group]
+    return PROFILE_AVATAR_OPTIONS_BY_GROUP[_avatar_group_for_gender(gender_value)]
 
 
 def _allowed_avatar_urls_for_gender(gender_value):
-    return {item["url"] for item in _avatar_options_for_gender(gender_value)}
+    return PROFILE_AVATAR_ALLOWED_BY_GROUP[_avatar_group_for_gender(gender_value)]
 
 
 def _default_avatar_for_gender(gender_value):
@@ -188,14 +245,182 @@ def _sanitize_avatar_url(value, gender_value=None) -> str:
     return _default_avatar_for_gender(gender_value)
 
 
-def _expire_stale_pending_requests(conn) -> None:
-    cutoff = time.time() - REQUEST_PENDING_TTL_SECONDS
-    conn.execute(
-        """
-        DELETE FROM requests
-        WHERE status='pending' AND created_at < ?
+def _pending_request_cutoff() -> float:
+    # expired rows are pruned by `flask sweep-expired`; reads just filter them out
+    return time.time() - REQUEST_PENDING_TTL_SECONDS
+
+
+def _encode_cursor(*values) -> str:
+    """Opaque keyset cursor for the last row of a page, e.g. (created_at, id)."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_cursor(token, arity):
+    """Inverse of _encode_cursor; None when absent, ValueError when malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("invalid_cursor")
+    if (
+        not isinstance(values, list)
+        or len(values) != arity
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+    ):
+        raise ValueError("invalid_cursor")
+    return values
+
+
+def _haversine_km(lat1, lon1, lat2, lon2) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _bounding_box(lat, lon, radius_km):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a radius around a point."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(-90.0, lat - d_lat)
+    max_lat = min(90.0, lat + d_lat)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9:
+        return min_lat, max_lat, -180.0, 180.0
+    d_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    min_lon = lon - d_lon
+    max_lon = lon + d_lon
+    if min_lon < -180.0 or max_lon > 180.0:
+        # box crosses the antimeridian; fall back to the full longitude band
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def _live_grid_entry(row):
+    # avatar_url and gender sit at 12 and 13 in LIVE_SPOTLIGHT_COLUMNS
+    return live_grid.entry_from_row(row, _sanitize_avatar_url(row[12], row[13]))
+
+
+def _rebuild_live_grid_locked(conn) -> None:
+    # caller holds live_grid_refresh_lock
+    # read before the rows: changes landing in between are replayed, not lost
+    version = db.spotlight_changes_version(conn)
+    rows = conn.execute(
+        f"""
+        SELECT {live_grid.LIVE_SPOTLIGHT_COLUMNS}
+        FROM spotlights s
+        JOIN users u ON u.id = s.user_id
+        WHERE s.expiry > ?
+          AND u.is_matched = 0
+        """,
+        (time.time(),),
+    ).fetchall()
+    nearby_grid.rebuild((_live_grid_entry(r) for r in rows), version=version)
+
+
+def _refresh_live_grid(conn) -> None:
+    with live_grid_refresh_lock:
+        _rebuild_live_grid_locked(conn)
+
+
+def _acquire_live_grid_refresh() -> bool:
+    # single flight: while one request rebuilds or catches up, the others
+    # keep serving the current snapshot instead of queueing behind it (or
+    # redoing the work). Only a grid that was never loaded is worth waiting for.
+    return live_grid_refresh_lock.acquire(blocking=not nearby_grid.loaded_at)
+
+
+def _ensure_live_grid(conn) -> None:
+    """Rebuild the grid if it is older than LIVE_GRID_REFRESH_SECONDS."""
+    if not nearby_grid.is_stale(LIVE_GRID_REFRESH_SECONDS) or not _acquire_live_grid_refresh():
+        return
+    try:
+        # someone else may have rebuilt it while we checked
+        if nearby_grid.is_stale(LIVE_GRID_REFRESH_SECONDS):
+            _rebuild_live_grid_locked(conn)
+    finally:
+        live_grid_refresh_lock.release()
+
+
+def _catch_up_live_grid(conn) -> int:
+    """
+    Bring the grid up to the current spotlight change log version by
+    reloading only the members logged since its last rebuild or catch-up
+    (writes from other workers included). Returns the version the grid is
+    now current to, for delta tokens. If another request is already
+    refreshing the grid, returns the snapshot's version as it stands: the
+    version never runs ahead of the entries, so such a token only makes the
+    next delta replay a few changes.
+    """
+    if not _acquire_live_grid_refresh():
+        return nearby_grid.version
+    try:
+        changed, current = db.spotlight_changes_since(conn, nearby_grid.version, -90.0, 90.0, -180.0, 180.0)
+        if changed is None or len(changed) > LIVE_GRID_CATCH_UP_MAX:
+            # pruned log or a burst of writes: a full reload is cheaper
+            _rebuild_live_grid_locked(conn)
+        elif changed:
+            ids = [row["user_id"] for row in changed]
+            found = {}
+            for start in range(0, len(ids), NEARBY_DELTA_CHUNK):
+                chunk = ids[start:start + NEARBY_DELTA_CHUNK]
+                rows = conn.execute(
+                    f"""
+                    SELECT {live_grid.LIVE_SPOTLIGHT_COLUMNS}
+                    FROM spotlights s
+                    JOIN users u ON u.id = s.user_id
+                    WHERE s.user_id IN ({",".join("?" * len(chunk))})
+                      AND s.expiry > ?
+                      AND u.is_matched = 0
+                    """,
+                    (*chunk, time.time()),
+                ).fetchall()
+                found.update((row["user_id"], _live_grid_entry(row)) for row in rows)
+            nearby_grid.catch_up(found.values(), [uid for uid in ids if uid not in found], current)
+        else:
+            nearby_grid.catch_up((), (), current)
+        return nearby_grid.version
+    finally:
+        live_grid_refresh_lock.release()
+
+
+def _sync_live_grid_user(conn, user_id) -> None:
+    """Write-through: mirror one user's committed spotlight into the live grid."""
+    if not LIVE_GRID_ENABLED:
+        return
+    row = conn.execute(
+        f"""
+        SELECT {live_grid.LIVE_SPOTLIGHT_COLUMNS}
+        FROM spotlights s
+        JOIN users u ON u.id = s.user_id
+        WHERE s.user_id = ?
+          AND s.expiry > ?
+          AND u.is_matched = 0
+        ORDER BY s.id DESC
+        LIMIT 1
         """,
-        (cutoff,),
+        (user_id, time.time()),
+    ).fetchone()
+    if row:
+        nearby_grid.upsert(_live_grid_entry(row))
+    else:
+        nearby_grid.remove(user_id)
+
+
+def _bump_sync_version(conn, *user_ids) -> None:
+    """Mark member-visible state as changed so event streams push it out."""
+    ids = sorted({int(uid) for uid in user_ids if uid})
+    if not ids:
+        return
+    conn.executemany(
+        "UPDATE users SET sync_version=COALESCE(sync_version, 0) + 1 WHERE id=?",
+        [(uid,) for uid in ids],
     )
 
 
@@ -212,7 +437,306 @@ def _push_ready() -> bool:
     return bool(webpush and cfg["public_key"] and cfg["private_key"])
 
 
+PUSH_SEND_TIMEOUT_SECONDS = 10
+
+
+def _webpush_sender(subscription_info, data) -> str:
+    cfg = _push_config()
+    try:
+        webpush(  # type: ignore[misc]
+            subscription_info=subscription_info,
+            data=data,
+            vapid_private_key=cfg["private_key"],
+            vapid_claims={"sub": cfg["subject"]},
+            timeout=PUSH_SEND_TIMEOUT_SECONDS,
+        )
+        return push_dispatch.OUTCOME_SENT
+    except WebPushException as exc:  # type: ignore[misc]
+        response = getattr(exc, "response", None)
+        if getattr(response, "status_code", None) in (404, 410):
+            return push_dispatch.OUTCOME_GONE
+        return push_dispatch.OUTCOME_FAILED
+
+
+push_dispatcher = push_dispatch.PushDispatcher(
+    _webpush_sender,
+    max_workers=int(os.environ.get("SPOTLIGHT_PUSH_WORKERS", "8")),
+)
+
+
+# ======================================================
+# NOTIFICATION OUTBOX (handlers run by `flask worker`)
+# ======================================================
+OUTBOX_KIND_NOTIFY = "notify"
+OUTBOX_KIND_WEB_PUSH = "web_push"
+# deliveries run in one dedicated `flask --app spotlight_app.app worker`
+# process. SPOTLIGHT_OUTBOX_EMBEDDED_WORKER=1 drains the outbox from a thread
+# in the web process instead, for single-process deploys that can't run a
+# second process; every gunicorn worker would start one, so keep it to one.
+OUTBOX_EMBEDDED_WORKER = os.environ.get("SPOTLIGHT_OUTBOX_EMBEDDED_WORKER", "0").strip() == "1"
+# a notification for every active user is split into jobs of this many recipients
+OUTBOX_FANOUT_CHUNK = int(os.environ.get("SPOTLIGHT_OUTBOX_FANOUT_CHUNK", "500"))
+
+
+def _enqueue_notification(conn, dedupe_key, title, message, kind, user_ids=None, push_job_id=None) -> bool:
+    """Queue an in-app + web-push notification; `user_ids=None` targets every active user."""
+    return outbox.enqueue(
+        conn,
+        OUTBOX_KIND_NOTIFY,
+        {
+            "title": title,
+            "message": message,
+            "kind": kind,
+            "user_ids": user_ids,
+            "push_job_id": push_job_id,
+            "sent_at": int(time.time()),
+        },
+        dedupe_key=dedupe_key,
+    )
+
+
+def _split_broadcast(conn, job, push_enabled):
+    """
+    Turn a notification for every active user into notify jobs of
+    OUTBOX_FANOUT_CHUNK recipients. Each part is claimed and committed on
+    its own, so a broadcast never inserts the whole user table in one
+    transaction. Subscriptions are fixed here so the push job's total
+    matches the web_push jobs the parts queue.
+    """
+    payload = job["payload"]
+    user_ids = [r["id"] for r in conn.execute("SELECT id FROM users WHERE is_active=1 ORDER BY id")]
+    subscriptions = {}
+    if push_enabled:
+        for r in conn.execute(
+            """
+            SELECT ps.id, ps.user_id
+            FROM push_subscriptions ps
+            JOIN users u ON u.id = ps.user_id
+            WHERE u.is_active=1
+            """
+        ):
+            subscriptions.setdefault(r["user_id"], []).append(r["id"])
+
+    parts = []
+    for start in range(0, len(user_ids), OUTBOX_FANOUT_CHUNK):
+        chunk = user_ids[start:start + OUTBOX_FANOUT_CHUNK]
+        parts.append((
+            f"notify:{job['id']}:{start}",
+            {**payload, "user_ids": chunk, "subscription_ids": [s for uid in chunk for s in subscriptions.get(uid, ())]},
+        ))
+    outbox.enqueue_many(conn, OUTBOX_KIND_NOTIFY, parts)
+    if payload.get("push_job_id"):
+        push_dispatch.start_job(
+            conn, payload["push_job_id"], len(user_ids), sum(len(ids) for ids in subscriptions.values())
+        )
+
+
+def _outbox_notify(conn, jobs, final_ids):
+    """Fan a notification out to the inbox and queue one web_push job per subscription."""
+    push_enabled = _push_ready()
+    for job in jobs:
+        payload = job["payload"]
+        if payload.get("user_ids") is None:
+            _split_broadcast(conn, job, push_enabled)
+            continue
+
+        requested = [int(uid) for uid in payload["user_ids"]]
+        placeholders = ",".join(["?"] * len(requested)) or "NULL"
+        user_ids = [
+            r["id"]
+            for r in conn.execute(
+                f"SELECT id FROM users WHERE is_active=1 AND id IN ({placeholders})",
+                tuple(requested),
+            )
+        ]
+        broadcast_part = "subscription_ids" in payload
+        if broadcast_part:
+            # counted by _split_broadcast already
+            subscriptions = payload["subscription_ids"]
+        else:
+            placeholders = ",".join(["?"] * len(user_ids)) or "NULL"
+            subscriptions = [
+                r["id"]
+                for r in conn.execute(
+                    f"SELECT id FROM push_subscriptions WHERE user_id IN ({placeholders})",
+                    tuple(user_ids),
+                )
+            ]
+
+        conn.executemany(
+            """
+            INSERT INTO app_notifications (user_id, title, message, kind, created_at, seen_at)
+            VALUES (?, ?, ?, ?, ?, NULL)
+            """,
+            [(uid, payload["title"], payload["message"], payload["kind"], job["created_at"]) for uid in user_ids],
+        )
+        _bump_sync_version(conn, *user_ids)
+
+        if not push_enabled:
+            subscriptions = []
+        push_data = json.dumps(
+            {
+                "title": payload["title"],
+                "message": payload["message"],
+                "kind": payload["kind"],
+                "sent_at": payload.get("sent_at"),
+            }
+        )
+        outbox.enqueue_many(
+            conn,
+            OUTBOX_KIND_WEB_PUSH,
+            [
+                (
+                    f"web_push:{job['id']}:{sub_id}",
+                    {"subscription_id": sub_id, "data": push_data, "push_job_id": payload.get("push_job_id")},
+                )
+                for sub_id in subscriptions
+            ],
+        )
+        if payload.get("push_job_id") and not broadcast_part:
+            push_dispatch.start_job(conn, payload["push_job_id"], len(user_ids), len(subscriptions))
+    return {}
+
+
+def _outbox_web_push(conn, jobs, final_ids):
+    sub_ids = sorted({job["payload"]["subscription_id"] for job in jobs})
+    placeholders = ",".join(["?"] * len(sub_ids))
+    subscriptions = {
+        r["id"]: tuple(r)
+        for r in conn.execute(
+            f"SELECT id, endpoint, p256dh, auth FROM push_subscriptions WHERE id IN ({placeholders})",
+            tuple(sub_ids),
+        )
+    }
+
+    progress = {}
+
+    def count(job, slot):
+        push_job_id = job["payload"].get("push_job_id")
+        if push_job_id:
+            totals = progress.setdefault(push_job_id, [0, 0, 0])
+            totals[slot] += 1
+
+    items = []
+    by_id = {job["id"]: job for job in jobs}
+    for job in jobs:
+        subscription = subscriptions.get(job["payload"]["subscription_id"])
+        if subscription is None:
+            # unsubscribed or pruned since the job was queued
+            count(job, 2)
+            continue
+        items.append((job["id"], subscription, job["payload"]["data"]))
+
+    # network sends happen before any write, so no lock is held meanwhile
+    results = push_dispatcher.deliver_many(items)
+    push_dispatcher.record_outcomes(conn, results)
+
+    failures = {}
+    for job_id, _, outcome in results:
+        job = by_id[job_id]
+        if outcome == push_dispatch.OUTCOME_SENT:
+            count(job, 0)
+        elif outcome == push_dispatch.OUTCOME_GONE:
+            count(job, 2)
+        else:
+            failures[job_id] = "push delivery failed"
+            if job_id in final_ids:
+                count(job, 1)
+
+    push_dispatch.add_progress(conn, {job_id: tuple(t) for job_id, t in progress.items()})
+    return failures
+
+
+def _outbox_web_push_give_up(conn, jobs):
+    """The handler raised on a last attempt: count those sends as failed so the broadcast can finish."""
+    failed = {}
+    for job in jobs:
+        push_job_id = job["payload"].get("push_job_id")
+        if push_job_id:
+            failed[push_job_id] = failed.get(push_job_id, 0) + 1
+    push_dispatch.add_progress(conn, {job_id: (0, n, 0) for job_id, n in failed.items()})
+
+
+outbox_handlers = {
+    OUTBOX_KIND_NOTIFY: _outbox_notify,
+    OUTBOX_KIND_WEB_PUSH: _outbox_web_push,
+}
+outbox_give_up_handlers = {
+    OUTBOX_KIND_WEB_PUSH: _outbox_web_push_give_up,
+}
+# one notify job per commit: a broadcast part inserts OUTBOX_FANOUT_CHUNK inbox rows
+outbox_group_sizes = {OUTBOX_KIND_NOTIFY: 1}
+
+
+def _outbox_worker(batch_size=outbox.OUTBOX_BATCH_SIZE):
+    """A worker whose lease outlasts a batch of web pushes that all hit the send timeout."""
+    return outbox.OutboxWorker(
+        db.connect,
+        outbox_handlers,
+        batch_size=batch_size,
+        logger=app.logger,
+        group_sizes=outbox_group_sizes,
+        lease_seconds=outbox.batch_lease_seconds(batch_size, PUSH_SEND_TIMEOUT_SECONDS, push_dispatcher.max_workers),
+        give_up_handlers=outbox_give_up_handlers,
+    )
+
+_outbox_worker_lock = threading.Lock()
+_outbox_worker_pid = None
+
+
+@app.before_request
+def ensure_outbox_worker():
+    """Start this process's embedded outbox worker on its first request."""
+    global _outbox_worker_pid
+    if not OUTBOX_EMBEDDED_WORKER or _outbox_worker_pid == os.getpid():
+        return None
+    with _outbox_worker_lock:
+        if _outbox_worker_pid != os.getpid():
+            _outbox_worker().start()
+            _outbox_worker_pid = os.getpid()
+    return None
+
+
+@app.cli.command("worker")
+@click.option("--batch-size", default=outbox.OUTBOX_BATCH_SIZE, show_default=True, help="Jobs claimed per batch.")
+@click.option("--once", is_flag=True, help="Drain due jobs and exit instead of polling.")
+def outbox_worker_command(batch_size, once):
+    """Deliver queued in-app and web-push notifications from the outbox."""
+    totals = _outbox_worker(batch_size).run(once=once)
+    click.echo(
+        f"Delivered {totals['delivered']}, retried {totals['retried']}, dead {totals['dead']}"
+    )
+
+
 ACCOUNT_BLOCKED_ERROR = "You were banned by admins. Contact support if this is a mistake."
+active_user_cache = ActiveUserCache(
+    db.auth_signal_path,
+    ttl_seconds=float(os.environ.get("SPOTLIGHT_ACTIVE_USER_CACHE_TTL", "30")),
+    check_interval=float(os.environ.get("SPOTLIGHT_ACTIVE_USER_CACHE_CHECK_SECONDS", "1")),
+    max_entries=int(os.environ.get("SPOTLIGHT_ACTIVE_USER_CACHE_MAX_ENTRIES", "50000")),
+)
+
+
+def _active_user_state(uid):
+    state = active_user_cache.get(uid)
+    if state is not None:
+        return state
+
+    # read before the query: a block landing meanwhile makes put() a no-op
+    generation = active_user_cache.generation
+    conn = db.get_db_connection()
+    user_row = conn.execute(
+        "SELECT id, is_active FROM users WHERE id=?",
+        (uid,),
+    ).fetchone()
+    if not user_row:
+        state = STATE_MISSING
+    elif int(user_row["is_active"] or 0) == 1:
+        state = STATE_ACTIVE
+    else:
+        state = STATE_BLOCKED
+    active_user_cache.put(uid, state, generation)
+    return state
 
 
 @app.before_request
@@ -245,19 +769,15 @@ def enforce_active_user_session():
     ):
         return None
 
-    conn = db.get_db_connection()
-    user_row = conn.execute(
-        "SELECT id, is_active FROM users WHERE id=?",
-        (uid,),
-    ).fetchone()
+    state = _active_user_state(uid)
 
-    if not user_row:
+    if state == STATE_MISSING:
         session.clear()
         if path.startswith("/api/"):
             return jsonify({"error": "unauthorized"}), 401
         return redirect(url_for("auth"))
 
-    if int(user_row["is_active"] or 0) == 1:
+    if state == STATE_ACTIVE:
         return None
 
     if path.startswith("/api/"):
@@ -332,31 +852,41 @@ def auth_google_callback():
     user = conn.execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
 
     if not user:
-        username = _build_unique_username(conn, preferred_name)
         pwd_hash = generate_password_hash(os.urandom(16).hex())
         avatar_url = DEFAULT_PROFILE_AVATAR_URL
-        conn.execute(
-            """
-            INSERT INTO users
-            (username, email, password_hash, gender, dob, bio, vibe_tags, phone,
-             trust_score, is_matched, matched_with, is_active, avatar_url, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 100, 0, NULL, 1, ?, ?)
-            """,
-            (
-                username,
-                email,
-                pwd_hash,
-                "",
-                "",
-                "",
-                "",
-                "",
-                avatar_url,
-                time.time(),
-            ),
-        )
-        conn.commit()
+        for _ in range(USERNAME_INSERT_ATTEMPTS):
+            username = _build_unique_username(conn, preferred_name)
+            try:
+                conn.execute(
+                    """
+                    INSERT INTO users
+                    (username, email, password_hash, gender, dob, bio, vibe_tags, phone,
+                     trust_score, is_matched, matched_with, is_active, avatar_url, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 100, 0, NULL, 1, ?, ?)
+                    """,
+                    (
+                        username,
+                        email,
+                        pwd_hash,
+                        "",
+                        "",
+                        "",
+                        "",
+                        "",
+                        avatar_url,
+                        time.time(),
+                    ),
+                )
+                conn.commit()
+                break
+            except sqlite3.IntegrityError:
+                # a concurrent sign-up took this username, or created this same account
+                conn.rollback()
+                if conn.execute("SELECT 1 FROM users WHERE email=?", (email,)).fetchone():
+                    break
         user = conn.execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
+        if not user:
+            return render_template("auth.html", error="Google login failed. Try again.")
     elif not _is_allowed_avatar_for_gender(user["avatar_url"], user["gender"]):
         conn.execute(
             "UPDATE users SET avatar_url=? WHERE id=?",
@@ -481,6 +1011,7 @@ def complete_profile():
             (username, gender, dob, bio, vibe_tags, phone, avatar_url, user["id"]),
         )
         conn.commit()
+        _sync_live_grid_user(conn, user["id"])
         session.pop("needs_profile_completion", None)
         return redirect(url_for("index_html"))
 
@@ -611,8 +1142,6 @@ def logout():
     session.clear()
     return redirect("/")
 
-from datetime import date
-
 @app.route("/settings")
 def settings():
     if "user_id" not in session:
@@ -673,8 +1202,9 @@ def public_profile(user_id):
               AND sender_id=?
               AND receiver_id=?
               AND status='pending'
+              AND created_at >= ?
             """,
-            (request_id, user_id, session["user_id"]),
+            (request_id, user_id, session["user_id"], _pending_request_cutoff()),
         ).fetchone()
         if req:
             incoming_request_id = req["id"]
@@ -712,6 +1242,35 @@ def admin_login():
     return render_template("admin_login.html")
 
 
+ADMIN_USERS_PAGE_SIZE = 100
+ADMIN_REPORTS_PAGE_SIZE = 50
+ADMIN_STATS_TTL_SECONDS = float(os.environ.get("SPOTLIGHT_ADMIN_STATS_TTL", "10"))
+
+_ttl_cache = {}
+_ttl_cache_lock = threading.Lock()
+
+
+def _ttl_cached(key, ttl_seconds, compute):
+    """Per-worker memo for values that are still computed ad hoc."""
+    now = time.monotonic()
+    with _ttl_cache_lock:
+        cached = _ttl_cache.get(key)
+        if cached is not None and now - cached[1] < ttl_seconds:
+            return cached[0]
+    value = compute()
+    with _ttl_cache_lock:
+        _ttl_cache[key] = (value, now)
+    return value
+
+
+def _count_active_spotlights():
+    # expiry is time-based, so this cannot be a trigger-kept counter
+    conn = db.get_db_connection()
+    return conn.execute(
+        "SELECT COUNT(*) AS c FROM spotlights WHERE expiry > ?", (time.time(),)
+    ).fetchone()["c"]
+
+
 @app.route("/admin")
 def admin():
     """
@@ -722,58 +1281,187 @@ def admin():
         return redirect("/admin/login")
 
     conn = db.get_db_connection()
-    now = time.time()
-
-    total_users = conn.execute("SELECT COUNT(*) AS c FROM users").fetchone()["c"]
-    active_spotlights = conn.execute(
-        "SELECT COUNT(*) AS c FROM spotlights WHERE expiry > ?", (now,)
-    ).fetchone()["c"]
-    active_matches = conn.execute(
-        "SELECT COUNT(*) AS c FROM matches WHERE status='active'"
-    ).fetchone()["c"]
-    total_reviews = conn.execute(
-        "SELECT COUNT(*) AS c FROM reviews"
-    ).fetchone()["c"]
-    avg_trust = conn.execute(
-        "SELECT AVG(trust_score) AS a FROM users"
-    ).fetchone()["a"]
-    push_subscribers = conn.execute(
-        "SELECT COUNT(DISTINCT user_id) AS c FROM push_subscriptions"
-    ).fetchone()["c"]
-
-    users = conn.execute(
-        "SELECT id, username, trust_score, is_active, created_at FROM users ORDER BY id ASC"
-    ).fetchall()
+    counters = db.read_stats(conn)
+    total_users = counters["total_users"]
+    active_spotlights = _ttl_cached("active_spotlights", ADMIN_STATS_TTL_SECONDS, _count_active_spotlights)
 
     return render_template(
         "admin.html",
         stats={
             "total_users": total_users,
             "active_spotlights": active_spotlights,
-            "active_matches": active_matches,
-            "total_reviews": total_reviews,
-            "avg_trust": round(avg_trust, 1) if avg_trust is not None else None,
-            "push_subscribers": push_subscribers,
+            "active_matches": counters["active_matches"],
+            "total_reviews": counters["total_reviews"],
+            "avg_trust": round(counters["trust_sum"] / counters["trust_scored"], 1) if counters["trust_scored"] else None,
+            "push_subscribers": counters["push_subscribers"],
         },
-        users=users,
         push_ready=_push_ready(),
     )
 
 
+@app.route("/admin/users")
+def admin_users():
+    """
+    One page of the admin user table, keyset-paginated on id. `q` matches
+    a username substring or an exact id; pass `next_after` back as `after`.
+    """
+    if not session.get("is_admin"):
+        return jsonify({"error": "unauthorized"}), 401
+
+    after_id = max(0, request.args.get("after", 0, type=int))
+    limit = max(1, min(ADMIN_USERS_PAGE_SIZE, request.args.get("limit", ADMIN_USERS_PAGE_SIZE, type=int)))
+    term = (request.args.get("q") or "").strip()
+
+    where = ["id > ?"]
+    params = [after_id]
+    if term:
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        if term.isdigit():
+            where.append("(id = ? OR username LIKE ? ESCAPE '\\')")
+            params.extend([int(term), f"%{escaped}%"])
+        else:
+            where.append("username LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+
+    conn = db.get_db_connection()
+    rows = conn.execute(
+        f"""
+        SELECT id, username, trust_score, is_active, created_at
+        FROM users
+        WHERE {" AND ".join(where)}
+        ORDER BY id ASC
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    ).fetchall()
+
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = rows[-1]["id"]
+
+    return jsonify({
+        "users": [
+            {
+                "id": r["id"],
+                "username": r["username"],
+                "trust_score": r["trust_score"],
+                "is_active": int(r["is_active"] or 0),
+                "created_at": r["created_at"],
+            }
+            for r in rows
+        ],
+        "next_after": next_after,
+    })
+
+
+@app.route("/admin/metrics/active_user_cache")
+def admin_active_user_cache_metrics():
+    """Hit rate and size of this worker's active-user cache."""
+    if not session.get("is_admin"):
+        return jsonify({"error": "unauthorized"}), 401
+    return jsonify(active_user_cache.stats())
+
+
+@app.route("/admin/metrics/outbox")
+def admin_outbox_metrics():
+    """Queue depth and recent delivery latency of the notification outbox."""
+    if not session.get("is_admin"):
+        return jsonify({"error": "unauthorized"}), 401
+    return jsonify(outbox.stats(db.get_db_connection()))
+
+
+@app.route("/admin/metrics/queries")
+def admin_query_metrics():
+    """Recent slow queries and N+1 offenders seen by this worker."""
+    if not session.get("is_admin"):
+        return jsonify({"error": "unauthorized"}), 401
+    return jsonify(instrumentation.registry.snapshot())
+
+
+METRICS_TOKEN = os.environ.get("SPOTLIGHT_METRICS_TOKEN", "")
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint. Scrapers authenticate with
+    `Authorization: Bearer $SPOTLIGHT_METRICS_TOKEN`; admins can also view it.
+    """
+    authorized = session.get("is_admin") or (
+        METRICS_TOKEN
+        and hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(), f"Bearer {METRICS_TOKEN}".encode()
+        )
+    )
+    if not authorized:
+        return jsonify({"error": "unauthorized"}), 401
+
+    cache = active_user_cache.stats()
+    tiles = nearby_grid.tile_cache_stats()
+    queue_stats = outbox.stats(db.get_db_connection())
+    gauges = [
+        ("spotlight_active_user_cache_entries", "Entries in the active-user cache.", [({}, cache["size"])]),
+        ("spotlight_active_user_cache_hits", "Active-user cache hits since start.", [({}, cache["hits"])]),
+        ("spotlight_active_user_cache_misses", "Active-user cache misses since start.", [({}, cache["misses"])]),
+        ("spotlight_live_grid_spotlights", "Spotlights held in the in-memory nearby grid.", [({}, len(nearby_grid))]),
+        ("spotlight_cluster_tile_cache_entries", "Cached viewport cluster tiles.", [({}, tiles["size"])]),
+        ("spotlight_cluster_tile_cache_hits", "Cluster tile cache hits since start.", [({}, tiles["hits"])]),
+        ("spotlight_cluster_tile_cache_misses", "Cluster tile cache misses since start.", [({}, tiles["misses"])]),
+        (
+            "spotlight_outbox_jobs",
+            "Outbox jobs by status.",
+            [({"status": status}, count) for status, count in queue_stats["counts"].items()],
+        ),
+        (
+            "spotlight_outbox_oldest_due_age_seconds",
+            "Age of the oldest pending outbox job.",
+            [({}, queue_stats["oldest_due_age_seconds"] or 0)],
+        ),
+        (
+            "spotlight_outbox_delivery_latency_ms",
+            "Recent enqueue-to-delivery latency.",
+            [
+                ({"quantile": quantile}, queue_stats["latency_ms"][key])
+                for key, quantile in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99"))
+            ],
+        ),
+    ]
+    body = instrumentation.registry.render(gauges)
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/admin/reports")
 def admin_reports():
     """Reports inbox for user reports and app feedback."""
     if not session.get("is_admin"):
         return redirect("/admin/login")
 
+    try:
+        cursor = _decode_cursor(request.args.get("cursor"), 2)
+    except ValueError:
+        abort(400)
+
     conn = db.get_db_connection()
-    rows = conn.execute("""
+    params = []
+    after = ""
+    if cursor:
+        after = "WHERE (r.created_at, r.id) < (?, ?)"
+        params.extend(cursor)
+    rows = conn.execute(f"""
         SELECT r.*, ru.username AS reporter_name, tu.username AS target_name
         FROM reports r
         LEFT JOIN users ru ON ru.id = r.reporter_id
         LEFT JOIN users tu ON tu.id = r.target_user_id
-        ORDER BY r.created_at DESC
-    """).fetchall()
+        {after}
+        ORDER BY r.created_at DESC, r.id DESC
+        LIMIT ?
+    """, (*params, ADMIN_REPORTS_PAGE_SIZE + 1)).fetchall()
+
+    next_cursor = None
+    if len(rows) > ADMIN_REPORTS_PAGE_SIZE:
+        rows = rows[:ADMIN_REPORTS_PAGE_SIZE]
+        next_cursor = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
 
     reports = [
         {
@@ -788,37 +1476,132 @@ def admin_reports():
         for r in rows
     ]
 
-    return render_template("admin_reports.html", reports=reports)
+    return render_template(
+        "admin_reports.html",
+        reports=reports,
+        is_first_page=cursor is None,
+        next_cursor=next_cursor,
+    )
+
+
+EXPORT_FETCH_SIZE = 1000
+EXPORT_COLUMNS = ["id", "type", "status", "reporter", "target", "message", "created_at"]
+
+
+def _parse_export_bound(value, end=False):
+    """
+    Unix seconds or YYYY-MM-DD (UTC). Ranges are half-open, [from, to), so a
+    date used as `to` becomes the following midnight and covers that day.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # float() takes "nan" and "inf"; nan would make every comparison false
+        if not math.isfinite(seconds):
+            raise ValueError(f"not a finite time: {value!r}")
+        return seconds
+    day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    if end:
+        day += timedelta(days=1)
+    return day.timestamp()
+
+
+def _iter_export_rows(cursor):
+    while True:
+        batch = cursor.fetchmany(EXPORT_FETCH_SIZE)
+        if not batch:
+            return
+        yield batch
 
 
 @app.route("/admin/reports/export")
 def admin_reports_export():
-    """Export all reports as CSV."""
+    """
+    Stream reports as CSV (default) or NDJSON (`format=ndjson`), optionally
+    gzipped (`gzip=1`) and limited to a [`from`, `to`) created_at range.
+    """
     if not session.get("is_admin"):
         return redirect("/admin/login")
 
+    fmt = (request.args.get("format") or "csv").strip().lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "invalid_format"}), 400
+    use_gzip = (request.args.get("gzip") or "").strip().lower() in ("1", "true", "yes")
+    try:
+        since = _parse_export_bound(request.args.get("from"))
+        until = _parse_export_bound(request.args.get("to"), end=True)
+    except ValueError:
+        return jsonify({"error": "invalid_date"}), 400
+
+    where = []
+    params = []
+    if since is not None:
+        where.append("r.created_at >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("r.created_at < ?")
+        params.append(until)
+
     conn = db.get_db_connection()
-    rows = conn.execute("""
+    cursor = conn.execute(f"""
         SELECT r.id, r.type, r.status, r.message, r.created_at,
                ru.username AS reporter, tu.username AS target
         FROM reports r
         LEFT JOIN users ru ON ru.id = r.reporter_id
         LEFT JOIN users tu ON tu.id = r.target_user_id
-        ORDER BY r.created_at DESC
-    """).fetchall()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["id", "type", "status", "reporter", "target", "message", "created_at"])
-    for r in rows:
-        writer.writerow([r["id"], r["type"], r["status"], r["reporter"], r["target"], r["message"], int(r["created_at"])])
-
-    resp = app.response_class(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment; filename=reports.csv"}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY r.created_at DESC, r.id DESC
+    """, params)
+
+    def encode_batch(batch):
+        if fmt == "ndjson":
+            return "".join(
+                json.dumps({col: r[col] for col in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+                for r in batch
+            )
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in batch:
+            writer.writerow([r["id"], r["type"], r["status"], r["reporter"], r["target"], r["message"], int(r["created_at"] or 0)])
+        return buf.getvalue()
+
+    def generate():
+        # gzip members are written incrementally; only one batch is ever in memory
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if use_gzip else None
+
+        def emit(text):
+            data = text.encode("utf-8")
+            return compressor.compress(data) if compressor else data
+
+        if fmt == "csv":
+            buf = io.StringIO()
+            csv.writer(buf).writerow(EXPORT_COLUMNS)
+            chunk = emit(buf.getvalue())
+            if chunk:
+                yield chunk
+        for batch in _iter_export_rows(cursor):
+            chunk = emit(encode_batch(batch))
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.flush()
+
+    filename = "reports.csv" if fmt == "csv" else "reports.ndjson"
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    if use_gzip:
+        filename += ".gz"
+        mimetype = "application/gzip"
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
-    return resp
 
 
 @app.route("/admin/reports/delete", methods=["POST"])
@@ -868,7 +1651,10 @@ def admin_toggle_user():
     if action == "block":
         # remove from map visibility immediately
         conn.execute("DELETE FROM spotlights WHERE user_id=?", (target_id,))
+    _bump_sync_version(conn, target_id)
     conn.commit()
+    active_user_cache.invalidate()
+    _sync_live_grid_user(conn, target_id)
 
     return jsonify({"status": "ok", "target_id": target_id, "is_active": is_active})
 
@@ -886,14 +1672,36 @@ def admin_delete_user():
         return jsonify({"error": "invalid_user"}), 400
 
     conn = db.get_db_connection()
+    reviewed_by_target = [
+        r["reviewed_id"]
+        for r in conn.execute(
+            "SELECT DISTINCT reviewed_id FROM reviews WHERE reviewer_id=?",
+            (target_id,),
+        ).fetchall()
+    ]
+    partners = [
+        r["id"]
+        for r in conn.execute("SELECT id FROM users WHERE matched_with=?", (target_id,)).fetchall()
+    ]
     # clean dependent data (no foreign key cascades)
+    if partners:
+        # their match is deleted below, so release them back to the map
+        conn.execute(
+            "UPDATE users SET is_matched=0, matched_with=NULL, active_match_id=NULL WHERE matched_with=?",
+            (target_id,),
+        )
+        _bump_sync_version(conn, *partners)
     conn.execute("DELETE FROM spotlights WHERE user_id=?", (target_id,))
     conn.execute("DELETE FROM requests WHERE sender_id=? OR receiver_id=?", (target_id, target_id))
     conn.execute("DELETE FROM matches WHERE user1_id=? OR user2_id=?", (target_id, target_id))
     conn.execute("DELETE FROM reviews WHERE reviewer_id=? OR reviewed_id=?", (target_id, target_id))
+    # the deleted reviews no longer count towards the users they rated
+    db.rebuild_review_stats(conn, [target_id, *reviewed_by_target])
     conn.execute("DELETE FROM push_subscriptions WHERE user_id=?", (target_id,))
     conn.execute("DELETE FROM users WHERE id=?", (target_id,))
     conn.commit()
+    active_user_cache.invalidate()
+    _sync_live_grid_user(conn, target_id)
 
     return jsonify({"status": "deleted"})
 
@@ -981,7 +1789,7 @@ def admin_push_send():
         return jsonify({"error": "content_too_long"}), 400
 
     conn = db.get_db_connection()
-    target_user_ids = []
+    target_user_ids = None
     if target_type == "single":
         try:
             target_user_id = int(payload.get("target_user_id"))
@@ -991,109 +1799,54 @@ def admin_push_send():
             "SELECT id FROM users WHERE id=? AND is_active=1",
             (target_user_id,),
         ).fetchone()
-        if target_row:
-            target_user_ids = [target_row["id"]]
+        if not target_row:
+            return jsonify(
+                {
+                    "status": "sent",
+                    "targeted_users": 0,
+                    "targeted_subscriptions": 0,
+                    "targeted": 0,
+                    "sent_count": 0,
+                    "failed_count": 0,
+                    "removed_subscriptions": 0,
+                }
+            )
+        target_user_ids = [target_row["id"]]
     elif target_type != "all":
         return jsonify({"error": "invalid_target_type"}), 400
-    else:
-        target_user_ids = [
-            r["id"]
-            for r in conn.execute("SELECT id FROM users WHERE is_active=1").fetchall()
-        ]
 
-    if not target_user_ids:
-        return jsonify(
-            {
-                "status": "sent",
-                "targeted_users": 0,
-                "targeted_subscriptions": 0,
-                "targeted": 0,
-                "sent_count": 0,
-                "failed_count": 0,
-                "removed_subscriptions": 0,
-            }
-        )
+    # fan-out (inbox rows, subscription lookup, sends) happens in the outbox worker
+    job_id = push_dispatch.new_job_id()
+    push_dispatch.create_job(conn, job_id, title, message)
+    _enqueue_notification(
+        conn,
+        f"admin_push:{job_id}",
+        title,
+        message,
+        "admin_push",
+        user_ids=target_user_ids,
+        push_job_id=job_id,
+    )
+    conn.commit()
 
-    placeholders = ",".join(["?"] * len(target_user_ids))
-    rows = conn.execute(
-        f"""
-        SELECT id, endpoint, p256dh, auth, user_id
-        FROM push_subscriptions
-        WHERE user_id IN ({placeholders})
-        """,
-        tuple(target_user_ids),
-    ).fetchall()
+    return jsonify({"status": "queued", "job_id": job_id}), 202
 
-    now = time.time()
-    conn.executemany(
-        """
-        INSERT INTO app_notifications (user_id, title, message, kind, created_at, seen_at)
-        VALUES (?, ?, ?, 'admin_push', ?, NULL)
-        """,
-        [(uid, title, message, now) for uid in target_user_ids],
-    )
-
-    cfg = _push_config()
-    vapid_claims = {"sub": cfg["subject"]}
-    push_payload = json.dumps(
-        {"title": title, "message": message, "kind": "admin_push", "sent_at": int(now)}
-    )
 
-    sent = 0
-    failed = 0
-    removed = 0
-
-    for row in rows:
-        subscription = {
-            "endpoint": row["endpoint"],
-            "keys": {"p256dh": row["p256dh"], "auth": row["auth"]},
-        }
-
-        try:
-            webpush(  # type: ignore[misc]
-                subscription_info=subscription,
-                data=push_payload,
-                vapid_private_key=cfg["private_key"],
-                vapid_claims=vapid_claims,
-            )
-            sent += 1
-            conn.execute(
-                "UPDATE push_subscriptions SET last_sent_at=?, updated_at=? WHERE id=?",
-                (time.time(), time.time(), row["id"]),
-            )
-        except WebPushException as exc:  # type: ignore[misc]
-            failed += 1
-            response = getattr(exc, "response", None)
-            status_code = getattr(response, "status_code", None)
-            # Subscription is expired or invalid; prune it.
-            if status_code in (404, 410):
-                conn.execute("DELETE FROM push_subscriptions WHERE id=?", (row["id"],))
-                removed += 1
-        except Exception:
-            failed += 1
-
-    conn.commit()
-
-    return jsonify(
-        {
-            "status": "sent",
-            "targeted_users": len(target_user_ids),
-            "targeted_subscriptions": len(rows),
-            "targeted": len(rows),
-            "sent_count": sent,
-            "failed_count": failed,
-            "removed_subscriptions": removed,
-        }
-    )
-
-
-@app.route("/api/notifications")
-def api_notifications():
-    if "user_id" not in session:
+@app.route("/admin/push/jobs/<job_id>")
+def admin_push_job(job_id):
+    """Progress of a background push broadcast."""
+    if not session.get("is_admin"):
         return jsonify({"error": "unauthorized"}), 401
 
-    uid = session["user_id"]
     conn = db.get_db_connection()
+    status = push_dispatch.job_status(conn, job_id)
+    if not status:
+        return jsonify({"error": "not_found"}), 404
+    return jsonify(status)
+
+
+def _take_unseen_notifications(conn, uid):
+    """Return unseen inbox notifications and mark them as seen."""
     rows = conn.execute(
         """
         SELECT id, title, message, kind, created_at
@@ -1114,20 +1867,25 @@ def api_notifications():
         )
         conn.commit()
 
-    return jsonify(
+    return [
         {
-            "notifications": [
-                {
-                    "id": r["id"],
-                    "title": r["title"],
-                    "message": r["message"],
-                    "kind": r["kind"] or "admin_push",
-                    "created_at": r["created_at"],
-                }
-                for r in rows
-            ]
+            "id": r["id"],
+            "title": r["title"],
+            "message": r["message"],
+            "kind": r["kind"] or "admin_push",
+            "created_at": r["created_at"],
         }
-    )
+        for r in rows
+    ]
+
+
+@app.route("/api/notifications")
+def api_notifications():
+    if "user_id" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+
+    conn = db.get_db_connection()
+    return jsonify({"notifications": _take_unseen_notifications(conn, session["user_id"])})
 
 
 # ======================================================
@@ -1204,18 +1962,21 @@ def index_html():
 # ======================================================
 # API – USER INFO (🔥 KEY FOR MATCH MODE)
 # ======================================================
+def _user_info_payload(conn, uid):
+    user = conn.execute(
+        "SELECT trust_score, is_matched, matched_with FROM users WHERE id = ?",
+        (uid,)
+    ).fetchone()
+    return dict(user) if user else {}
+
+
 @app.route("/api/user_info")
 def user_info():
     if "user_id" not in session:
         return jsonify({}), 401
 
     conn = db.get_db_connection()
-    user = conn.execute(
-        "SELECT trust_score, is_matched, matched_with FROM users WHERE id = ?",
-        (session["user_id"],)
-    ).fetchone()
-
-    return jsonify(dict(user))
+    return jsonify(_user_info_payload(conn, session["user_id"]))
 
 # ======================================================
 # API – SEND REQUEST
@@ -1241,8 +2002,6 @@ def send_request():
     conn = db.get_db_connection()
 
     try:
-        _expire_stale_pending_requests(conn)
-
         # block if either already matched
         rows = conn.execute(
             "SELECT is_matched FROM users WHERE id IN (?, ?)",
@@ -1256,8 +2015,9 @@ def send_request():
             """
             SELECT id FROM requests
             WHERE sender_id=? AND receiver_id=? AND status='pending'
+              AND created_at >= ?
             """,
-            (sender_id, receiver_id)
+            (sender_id, receiver_id, _pending_request_cutoff())
         ).fetchone()
 
         if existing:
@@ -1270,6 +2030,7 @@ def send_request():
             """,
             (sender_id, receiver_id, time.time())
         )
+        _bump_sync_version(conn, receiver_id)
         conn.commit()
     except Exception as e:
         app.logger.error(f"Error in send_request: {e}")
@@ -1280,17 +2041,8 @@ def send_request():
 # ======================================================
 # API – CHECK REQUESTS
 # ======================================================
-@app.route("/api/check_requests")
-def check_requests():
-    if "user_id" not in session:
-        return jsonify({"type": "none"})
-
-    uid = session["user_id"]
-    conn = db.get_db_connection()
-    _expire_stale_pending_requests(conn)
-    conn.commit()
+def _incoming_request_payload(conn, uid):
     now = time.time()
-
     req = conn.execute(
         """
         SELECT
@@ -1311,14 +2063,15 @@ def check_requests():
          AND s.expiry > ?
         WHERE r.receiver_id = ?
           AND r.status = 'pending'
+          AND r.created_at >= ?
         ORDER BY r.created_at DESC
         LIMIT 1
         """,
-        (now, uid)
+        (now, uid, _pending_request_cutoff())
     ).fetchone()
 
     if req:
-        return jsonify({
+        return {
             "type": "incoming",
             "data": {
                 "id": req["id"],
@@ -1332,9 +2085,18 @@ def check_requests():
                 "meet_time": req["meet_time"],
                 "clue": req["clue"],
             }
-        })
+        }
+
+    return {"type": "none"}
 
-    return jsonify({"type": "none"})
+
+@app.route("/api/check_requests")
+def check_requests():
+    if "user_id" not in session:
+        return jsonify({"type": "none"})
+
+    conn = db.get_db_connection()
+    return jsonify(_incoming_request_payload(conn, session["user_id"]))
 
 # ======================================================
 # API – RESPOND REQUEST (🔥 SYNC BOTH USERS)
@@ -1353,109 +2115,94 @@ def respond_request():
         return jsonify({"error": "invalid"}), 400
 
     conn = db.get_db_connection()
-    _expire_stale_pending_requests(conn)
-    conn.commit()
-
-    req = conn.execute(
-        """
-        SELECT * FROM requests
-        WHERE id=? AND receiver_id=? AND status='pending'
-        """,
-        (request_id, user_id)
-    ).fetchone()
-
-    if not req:
-        return jsonify({"error": "not_found"}), 404
-
-    sender_id = req["sender_id"]
 
     # -------- DECLINE --------
     if action == "decline":
-        conn.execute(
-            "UPDATE requests SET status='declined' WHERE id=?",
-            (request_id,)
+        result = match_service.decline_request(
+            conn,
+            request_id,
+            user_id,
+            _pending_request_cutoff(),
+            on_success=lambda c, r: _bump_sync_version(c, *r.user_ids),
         )
-        conn.commit()
+        if result.status == match_service.NOT_FOUND:
+            return jsonify({"error": "not_found"}), 404
         return jsonify({"status": "declined"})
 
     # -------- ACCEPT --------
-    conn.execute(
-        "UPDATE requests SET status='accepted' WHERE id=?",
-        (request_id,)
-    )
-
-    # 🔥 CREATE MATCH (THIS WAS MISSING)
-    conn.execute(
-        """
-        INSERT INTO matches (user1_id, user2_id, created_at, status)
-        VALUES (?, ?, ?, 'active')
-        """,
-        (sender_id, user_id, time.time())
-    )
-
-    # update users state
-    conn.execute(
-        "UPDATE users SET is_matched=1, matched_with=? WHERE id=?",
-        (sender_id, user_id)
-    )
-    conn.execute(
-        "UPDATE users SET is_matched=1, matched_with=? WHERE id=?",
-        (user_id, sender_id)
-    )
+    def on_matched(c, result):
+        _bump_sync_version(c, *result.user_ids)
+        sender_id = result.user_ids[1]
+        _enqueue_notification(
+            c,
+            f"match_created:{result.match_id}",
+            "Request accepted",
+            "Your spotlight request was accepted. Time to meet!",
+            "match",
+            user_ids=[sender_id],
+        )
 
-    # remove from live map
-    conn.execute(
-        "DELETE FROM spotlights WHERE user_id IN (?, ?)",
-        (user_id, sender_id)
-    )
-
-    # cancel all other pending requests
-    conn.execute(
-        """
-        UPDATE requests
-        SET status='declined'
-        WHERE status='pending'
-        AND (sender_id IN (?, ?) OR receiver_id IN (?, ?))
-        """,
-        (user_id, sender_id, user_id, sender_id)
+    result = match_service.accept_request(
+        conn,
+        request_id,
+        user_id,
+        _pending_request_cutoff(),
+        on_success=on_matched,
     )
+    if result.status == match_service.NOT_FOUND:
+        return jsonify({"error": "not_found"}), 404
+    if result.status == match_service.ALREADY_MATCHED:
+        return jsonify({"error": "already_matched"}), 409
 
-    conn.commit()
+    _sync_live_grid_user(conn, result.user_ids[0])
+    _sync_live_grid_user(conn, result.user_ids[1])
     return jsonify({"status": "matched"})
 
 
 # ======================================================
 # API – MATCH STATUS
 # ======================================================
-@app.route("/api/match_status")
-def match_status():
-    if "user_id" not in session:
-        return jsonify({"matched": False})
+def _latest_ended_match(conn, uid):
+    # one indexed probe per side instead of scanning `user1_id=? OR user2_id=?`
+    return conn.execute(
+        """
+        SELECT * FROM (
+            SELECT id, user1_id, user2_id, ended_at, end_reason, end_reason_by
+            FROM matches
+            WHERE user1_id=? AND status='ended'
+            ORDER BY ended_at DESC
+            LIMIT 1
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT id, user1_id, user2_id, ended_at, end_reason, end_reason_by
+            FROM matches
+            WHERE user2_id=? AND status='ended'
+            ORDER BY ended_at DESC
+            LIMIT 1
+        )
+        ORDER BY ended_at DESC
+        LIMIT 1
+        """,
+        (uid, uid)
+    ).fetchone()
 
-    uid = session["user_id"]
-    conn = db.get_db_connection()
+
+def _match_status_payload(conn, uid):
     u = conn.execute(
-        "SELECT is_matched, matched_with FROM users WHERE id=?",
+        "SELECT is_matched FROM users WHERE id=?",
         (uid,)
     ).fetchone()
 
+    if not u:
+        return {"matched": False, "ended_by_other": False}
+
     matched = bool(u["is_matched"])
     if matched:
-        other = u["matched_with"]
-        m = conn.execute(
-            """
-            SELECT id, user1_id, user2_id, user1_reached, user2_reached
-            FROM matches
-            WHERE status='active'
-              AND ((user1_id=? AND user2_id=?) OR (user1_id=? AND user2_id=?))
-            ORDER BY created_at DESC
-            LIMIT 1
-            """,
-            (uid, other, other, uid)
-        ).fetchone()
+        m = match_service.active_match_for_user(conn, uid)
 
         if not m:
-            return jsonify({"matched": True, "i_reached": False, "other_reached": False})
+            return {"matched": True, "i_reached": False, "other_reached": False}
 
         if m["user1_id"] == uid:
             i_reached = bool(m["user1_reached"])
@@ -1464,36 +2211,38 @@ def match_status():
             i_reached = bool(m["user2_reached"])
             other_reached = bool(m["user1_reached"])
 
-        return jsonify({
+        return {
             "matched": True,
             "match_id": m["id"],
             "i_reached": i_reached,
             "other_reached": other_reached
-        })
+        }
 
-    ended = conn.execute(
-        """
-        SELECT m.id, m.end_reason, m.end_reason_by, u.username AS ended_by_name
-        FROM matches m
-        LEFT JOIN users u ON u.id = m.end_reason_by
-        WHERE (m.user1_id=? OR m.user2_id=?)
-          AND m.status='ended'
-        ORDER BY m.ended_at DESC
-        LIMIT 1
-        """,
-        (uid, uid)
-    ).fetchone()
+    ended = _latest_ended_match(conn, uid)
 
     if ended and ended["end_reason"] and ended["end_reason_by"] and int(ended["end_reason_by"]) != uid:
-        return jsonify({
+        ended_by = conn.execute(
+            "SELECT username FROM users WHERE id=?",
+            (ended["end_reason_by"],)
+        ).fetchone()
+        return {
             "matched": False,
             "match_id": ended["id"],
             "ended_by_other": True,
-            "ended_by": ended["ended_by_name"] or "Your match",
+            "ended_by": (ended_by["username"] if ended_by else None) or "Your match",
             "end_reason": ended["end_reason"]
-        })
+        }
+
+    return {"matched": False, "ended_by_other": False}
 
-    return jsonify({"matched": False, "ended_by_other": False})
+
+@app.route("/api/match_status")
+def match_status():
+    if "user_id" not in session:
+        return jsonify({"matched": False})
+
+    conn = db.get_db_connection()
+    return jsonify(_match_status_payload(conn, session["user_id"]))
 
 
 @app.route("/api/mark_reached", methods=["POST"])
@@ -1504,33 +2253,16 @@ def mark_reached():
     uid = session["user_id"]
     conn = db.get_db_connection()
 
-    user = conn.execute(
-        "SELECT is_matched, matched_with FROM users WHERE id=?",
-        (uid,)
-    ).fetchone()
-    if not user or not user["is_matched"] or not user["matched_with"]:
+    result = match_service.mark_reached(
+        conn,
+        uid,
+        on_success=lambda c, r: _bump_sync_version(c, *r.user_ids),
+    )
+    if result.status == match_service.NO_ACTIVE_MATCH:
         return jsonify({"error": "no_active_match"}), 400
-
-    other = user["matched_with"]
-    m = conn.execute(
-        """
-        SELECT id, user1_id, user2_id
-        FROM matches
-        WHERE status='active'
-          AND ((user1_id=? AND user2_id=?) OR (user1_id=? AND user2_id=?))
-        ORDER BY created_at DESC
-        LIMIT 1
-        """,
-        (uid, other, other, uid)
-    ).fetchone()
-
-    if not m:
+    if result.status == match_service.MATCH_NOT_FOUND:
         return jsonify({"error": "match_not_found"}), 404
-
-    reached_col = "user1_reached" if m["user1_id"] == uid else "user2_reached"
-    conn.execute(f"UPDATE matches SET {reached_col}=1 WHERE id=?", (m["id"],))
-    conn.commit()
-    return jsonify({"status": "ok", "match_id": m["id"]})
+    return jsonify({"status": "ok", "match_id": result.match_id})
 
 # ======================================================
 # API – END MATCH
@@ -1542,85 +2274,21 @@ def end_match():
 
     uid = session["user_id"]
     payload = request.json or {}
-    end_reason = (payload.get("reason") or "").strip()
     conn = db.get_db_connection()
 
-    other = conn.execute(
-        "SELECT matched_with FROM users WHERE id=?",
-        (uid,)
-    ).fetchone()["matched_with"]
-
-    # If the local cache is cleared (e.g., other user already ended),
-    # treat this as an idempotent call and return success.
-    if other is None:
-        existing = conn.execute(
-            """
-            SELECT id FROM matches
-            WHERE (user1_id=? OR user2_id=?)
-              AND status='ended'
-            ORDER BY ended_at DESC
-            LIMIT 1
-            """,
-            (uid, uid)
-        ).fetchone()
-        if existing:
-            return jsonify({"status": "ended", "note": "already_ended"}), 200
-        return jsonify({"error": "no_active_match"}), 400
-
-    active_match = conn.execute(
-        """
-        SELECT id, user1_id, user2_id, user1_reached, user2_reached
-        FROM matches
-        WHERE status='active'
-          AND ((user1_id=? AND user2_id=?) OR (user1_id=? AND user2_id=?))
-        ORDER BY created_at DESC
-        LIMIT 1
-        """,
-        (uid, other, other, uid)
-    ).fetchone()
-
-    if active_match:
-        my_reached = bool(active_match["user1_reached"]) if active_match["user1_id"] == uid else bool(active_match["user2_reached"])
-        if not my_reached:
-            if not end_reason:
-                return jsonify({"error": "reason_required"}), 400
-            if len(end_reason.split()) > 50:
-                return jsonify({"error": "reason_too_long"}), 400
-
-    conn.execute(
-        "UPDATE users SET is_matched=0, matched_with=NULL WHERE id IN (?, ?)",
-        (uid, other)
+    result = match_service.end_match(
+        conn,
+        uid,
+        payload.get("reason"),
+        on_success=lambda c, r: _bump_sync_version(c, *r.user_ids),
     )
-
-    cur = conn.execute("""
-        UPDATE matches
-        SET status='ended', ended_at=?,
-            end_reason=CASE WHEN ? <> '' THEN ? ELSE end_reason END,
-            end_reason_by=CASE WHEN ? <> '' THEN ? ELSE end_reason_by END
-        WHERE status='active'
-          AND ((user1_id=? AND user2_id=?)
-               OR (user1_id=? AND user2_id=?))
-    """, (time.time(), end_reason, end_reason, end_reason, uid, uid, other, other, uid))
-
-    if cur.rowcount == 0:
-        # If nothing to update, it may already be ended; respond idempotently.
-        existing = conn.execute(
-            """
-            SELECT id FROM matches
-            WHERE (user1_id=? AND user2_id=?)
-               OR (user1_id=? AND user2_id=?)
-            ORDER BY ended_at DESC
-            LIMIT 1
-            """,
-            (uid, other, other, uid)
-        ).fetchone()
-        conn.commit()
-        if existing:
-            return jsonify({"status": "ended", "note": "already_ended"}), 200
+    if result.status == match_service.ENDED:
+        return jsonify({"status": "ended"})
+    if result.status == match_service.ALREADY_ENDED:
+        return jsonify({"status": "ended", "note": "already_ended"}), 200
+    if result.status == match_service.MATCH_NOT_FOUND:
         return jsonify({"error": "match_not_found"}), 404
-
-    conn.commit()
-    return jsonify({"status": "ended"})
+    return jsonify({"error": result.status}), 400
 
 # ======================================================
 # API – GET FEEDBACK TARGET (after match)
@@ -1633,14 +2301,7 @@ def feedback_target():
     uid = session["user_id"]
     conn = db.get_db_connection()
 
-    row = conn.execute("""
-        SELECT m.user1_id, m.user2_id
-        FROM matches m
-        WHERE (m.user1_id=? OR m.user2_id=?)
-        AND m.status='ended'
-        ORDER BY m.ended_at DESC
-        LIMIT 1
-    """, (uid, uid)).fetchone()
+    row = _latest_ended_match(conn, uid)
 
     if not row:
         return jsonify({"error": "no_match"}), 404
@@ -1680,6 +2341,61 @@ def apply_trust_delta(conn, user_id: int, delta: int) -> None:
     conn.execute("UPDATE users SET trust_score=? WHERE id=?", (updated, user_id))
 
 
+def apply_review_stats(conn, user_id: int, rating: int, replaces=None, reviewed_at=None) -> None:
+    """Fold one new (or, with `replaces`, re-rated) review into user_review_stats."""
+    reviewed_at = time.time() if reviewed_at is None else reviewed_at
+    rating = max(1, min(10, int(rating)))
+    conn.execute(
+        "INSERT OR IGNORE INTO user_review_stats (user_id, review_count, rating_sum) VALUES (?, 0, 0)",
+        (user_id,),
+    )
+    if replaces is None:
+        conn.execute(
+            f"""
+            UPDATE user_review_stats
+            SET review_count=review_count + 1, rating_sum=rating_sum + ?,
+                hist_{rating}=hist_{rating} + 1, last_review_at=?
+            WHERE user_id=?
+            """,
+            (rating, reviewed_at, user_id),
+        )
+        return
+
+    old_rating = max(1, min(10, int(replaces)))
+    if old_rating == rating:
+        conn.execute(
+            "UPDATE user_review_stats SET last_review_at=? WHERE user_id=?",
+            (reviewed_at, user_id),
+        )
+        return
+    conn.execute(
+        f"""
+        UPDATE user_review_stats
+        SET rating_sum=rating_sum + ?, hist_{old_rating}=hist_{old_rating} - 1,
+            hist_{rating}=hist_{rating} + 1, last_review_at=?
+        WHERE user_id=?
+        """,
+        (rating - old_rating, reviewed_at, user_id),
+    )
+
+
+def _review_stats(conn, user_id):
+    """Count, average and histogram from user_review_stats (O(1) per user)."""
+    row = conn.execute("SELECT * FROM user_review_stats WHERE user_id=?", (user_id,)).fetchone()
+    count = int(row["review_count"] or 0) if row else 0
+    if not count:
+        return {"count": 0, "average": None, "histogram": {str(n): 0 for n in db.REVIEW_RATINGS}}
+    return {
+        "count": count,
+        "average": round(row["rating_sum"] / count, 1),
+        "histogram": {str(n): row[f"hist_{n}"] for n in db.REVIEW_RATINGS},
+    }
+
+
+# most recent reviews returned by the unpaginated feedback listings
+REVIEW_LIST_LIMIT = 50
+
+
 # ======================================================
 # API – SUBMIT FEEDBACK
 # ======================================================
@@ -1719,6 +2435,7 @@ def submit_feedback():
         """,
         (reviewer_id, reviewed_id, time.time() - 3600)
     ).fetchone()
+    now = time.time()
     if recent:
         conn.execute(
             """
@@ -1726,12 +2443,15 @@ def submit_feedback():
             SET rating=?, comment=?, created_at=?
             WHERE id=?
             """,
-            (rating, comment, time.time(), recent["id"])
+            (rating, comment, now, recent["id"])
         )
         old_delta = rating_to_trust_delta(int(recent["rating"]))
         new_delta = rating_to_trust_delta(rating)
         apply_trust_delta(conn, reviewed_id, new_delta - old_delta)
+        apply_review_stats(conn, reviewed_id, rating, replaces=recent["rating"], reviewed_at=now)
+        _bump_sync_version(conn, reviewed_id)
         conn.commit()
+        _sync_live_grid_user(conn, reviewed_id)
         return jsonify({"status": "submitted", "note": "updated_recent"})
 
     conn.execute(
@@ -1739,16 +2459,54 @@ def submit_feedback():
         INSERT INTO reviews (reviewer_id, reviewed_id, rating, comment, created_at)
         VALUES (?, ?, ?, ?, ?)
         """,
-        (reviewer_id, reviewed_id, rating, comment, time.time())
+        (reviewer_id, reviewed_id, rating, comment, now)
     )
 
     apply_trust_delta(conn, reviewed_id, rating_to_trust_delta(rating))
+    apply_review_stats(conn, reviewed_id, rating, reviewed_at=now)
+    _bump_sync_version(conn, reviewed_id)
     conn.commit()
+    _sync_live_grid_user(conn, reviewed_id)
     return jsonify({"status": "submitted"})
 
 # ======================================================
 # API – VIEW MY FEEDBACK
 # ======================================================
+def _review_page(conn, reviewed_id, limit, cursor=None):
+    """One page of reviews, newest first, keyed on (created_at, id)."""
+    params = [reviewed_id]
+    after = ""
+    if cursor:
+        after = "AND (r.created_at, r.id) < (?, ?)"
+        params.extend(cursor)
+    rows = conn.execute(
+        f"""
+        SELECT r.id, r.rating, r.comment, r.created_at, u.username
+        FROM reviews r
+        JOIN users u ON u.id = r.reviewer_id
+        WHERE r.reviewed_id=? {after}
+        ORDER BY r.created_at DESC, r.id DESC
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    ).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    reviews = [
+        {
+            "rating": r["rating"],
+            "comment": r["comment"],
+            "by": r["username"],
+            "created_at": r["created_at"],
+        }
+        for r in rows
+    ]
+    return reviews, next_cursor
+
+
 @app.route("/api/my_feedback")
 def my_feedback():
     if "user_id" not in session:
@@ -1756,87 +2514,32 @@ def my_feedback():
 
     uid = session["user_id"]
     conn = db.get_db_connection()
-    page = request.args.get("page", type=int)
     per_page = request.args.get("per_page", type=int)
-    use_pagination = page is not None or per_page is not None
-
-    if use_pagination:
-        page = max(1, page or 1)
-        per_page = max(1, min(20, per_page or 5))
-
-    aggregate = conn.execute(
-        """
-        SELECT COUNT(*) AS c, AVG(rating) AS avg_rating
-        FROM reviews
-        WHERE reviewed_id=?
-        """,
-        (uid,),
-    ).fetchone()
+    try:
+        cursor = _decode_cursor(request.args.get("cursor"), 2)
+    except ValueError:
+        return jsonify({"error": "invalid_cursor"}), 400
+    use_pagination = per_page is not None or cursor is not None
+    per_page = max(1, min(20, per_page or 5)) if use_pagination else REVIEW_LIST_LIMIT
 
-    total_count = int((aggregate["c"] or 0) if aggregate else 0)
-    avg_rating = aggregate["avg_rating"] if aggregate else None
-
-    if total_count == 0:
-        payload = {"average": None, "count": 0, "reviews": []}
-        if use_pagination:
-            payload.update({
-                "page": page,
-                "per_page": per_page,
-                "total_pages": 0,
-                "has_prev": False,
-                "has_next": False,
-            })
-        return jsonify(payload)
-
-    if use_pagination:
-        offset = (page - 1) * per_page
-        rows = conn.execute(
-            """
-            SELECT r.rating, r.comment, r.created_at, u.username
-            FROM reviews r
-            JOIN users u ON u.id = r.reviewer_id
-            WHERE r.reviewed_id=?
-            ORDER BY r.created_at DESC
-            LIMIT ? OFFSET ?
-            """,
-            (uid, per_page, offset),
-        ).fetchall()
-        total_pages = (total_count + per_page - 1) // per_page
-    else:
-        rows = conn.execute(
-            """
-            SELECT r.rating, r.comment, r.created_at, u.username
-            FROM reviews r
-            JOIN users u ON u.id = r.reviewer_id
-            WHERE r.reviewed_id=?
-            ORDER BY r.created_at DESC
-            """,
-            (uid,),
-        ).fetchall()
+    stats = _review_stats(conn, uid)
+    reviews, next_cursor = [], None
+    if stats["count"]:
+        reviews, next_cursor = _review_page(conn, uid, per_page, cursor)
 
     payload = {
-        "average": round(avg_rating, 1) if avg_rating is not None else None,
-        "count": total_count,
-        "reviews": [
-            {
-                "rating": r["rating"],
-                "comment": r["comment"],
-                "by": r["username"],
-                "created_at": r["created_at"],
-            }
-            for r in rows
-        ],
+        "average": stats["average"],
+        "count": stats["count"],
+        "histogram": stats["histogram"],
+        "reviews": reviews,
     }
-
     if use_pagination:
         payload.update({
-            "page": page,
             "per_page": per_page,
-            "total_pages": total_pages,
-            "has_prev": page > 1,
-            "has_next": page < total_pages,
+            "total_pages": (stats["count"] + per_page - 1) // per_page,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
         })
-
     return jsonify(payload)
 
 
@@ -1846,34 +2549,29 @@ def user_feedback(user_id):
     if "user_id" not in session:
         return jsonify({"error": "unauthorized"}), 401
 
+    try:
+        cursor = _decode_cursor(request.args.get("cursor"), 2)
+    except ValueError:
+        return jsonify({"error": "invalid_cursor"}), 400
+
     conn = db.get_db_connection()
 
     exists = conn.execute("SELECT id FROM users WHERE id=?", (user_id,)).fetchone()
     if not exists:
         return jsonify({"error": "not_found"}), 404
 
-    rows = conn.execute(
-        """
-        SELECT r.rating, r.comment, r.created_at, u.username
-        FROM reviews r
-        JOIN users u ON u.id = r.reviewer_id
-        WHERE r.reviewed_id=?
-        ORDER BY r.created_at DESC
-        """,
-        (user_id,)
-    ).fetchall()
+    limit = max(1, min(REVIEW_LIST_LIMIT, request.args.get("limit", REVIEW_LIST_LIMIT, type=int)))
+    stats = _review_stats(conn, user_id)
+    reviews, next_cursor = [], None
+    if stats["count"]:
+        reviews, next_cursor = _review_page(conn, user_id, limit, cursor)
 
     return jsonify({
-        "count": len(rows),
-        "reviews": [
-            {
-                "rating": r["rating"],
-                "comment": r["comment"],
-                "by": r["username"],
-                "created_at": r["created_at"]
-            }
-            for r in rows
-        ]
+        "count": stats["count"],
+        "average": stats["average"],
+        "histogram": stats["histogram"],
+        "reviews": reviews,
+        "next_cursor": next_cursor,
     })
 
 
@@ -1896,8 +2594,8 @@ def checkin():
     conn.execute(
         """
         INSERT INTO spotlights
-        (user_id, lat, lon, place, intent, meet_time, clue, timestamp, expiry)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        (user_id, lat, lon, place, intent, intent_code, meet_time, clue, timestamp, expiry)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
             uid,
@@ -1905,13 +2603,16 @@ def checkin():
             data["lon"],
             data["place"],
             data["intent"],
+            db.intent_code(conn, data["intent"]),
             data.get("meet_time"),
             data["clue"],
             time.time(),
             expiry,
         )
     )
+    _bump_sync_version(conn, uid)
     conn.commit()
+    _sync_live_grid_user(conn, uid)
     return jsonify({"status": "live"})
 
 @app.route("/api/checkout", methods=["POST"])
@@ -1921,17 +2622,13 @@ def checkout():
 
     conn = db.get_db_connection()
     conn.execute("DELETE FROM spotlights WHERE user_id=?", (session["user_id"],))
+    _bump_sync_version(conn, session["user_id"])
     conn.commit()
+    _sync_live_grid_user(conn, session["user_id"])
     return jsonify({"status": "off"})
 
 
-@app.route("/api/my_live_status")
-def my_live_status():
-    if "user_id" not in session:
-        return jsonify({"live": False}), 401
-
-    uid = session["user_id"]
-    conn = db.get_db_connection()
+def _live_status_payload(conn, uid):
     row = conn.execute(
         """
         SELECT 1
@@ -1941,52 +2638,519 @@ def my_live_status():
         """,
         (uid, time.time())
     ).fetchone()
+    return {"live": bool(row)}
+
 
-    return jsonify({"live": bool(row)})
+@app.route("/api/my_live_status")
+def my_live_status():
+    if "user_id" not in session:
+        return jsonify({"live": False}), 401
+
+    conn = db.get_db_connection()
+    return jsonify(_live_status_payload(conn, session["user_id"]))
 
 # ======================================================
-# API – NEARBY USERS
+# API – BATCHED SYNC (poll fallback for the event stream)
 # ======================================================
-@app.route("/api/nearby")
-def nearby():
+@app.route("/api/sync")
+def sync():
+    """
+    One poll for user_info, check_requests, match_status, my_live_status and
+    notifications. The ETag is the user's sync_version plus a coarse time
+    bucket (pending requests and check-ins expire without a write), so an
+    unchanged client gets a 304 after one primary-key lookup.
+    """
     if "user_id" not in session:
-        return jsonify([])
-
-    lat = float(request.args.get("lat"))
-    lon = float(request.args.get("lon"))
-    me = session["user_id"]
+        return jsonify({"error": "unauthorized"}), 401
 
+    uid = session["user_id"]
     conn = db.get_db_connection()
+    row = conn.execute("SELECT sync_version FROM users WHERE id=?", (uid,)).fetchone()
+    if not row:
+        return jsonify({"error": "unauthorized"}), 401
+
+    bucket = int(time.time() // SYNC_ETAG_BUCKET_SECONDS)
+    etag = f"{uid}.{row['sync_version'] or 0}.{bucket}"
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+    else:
+        resp = jsonify({
+            "user_info": _user_info_payload(conn, uid),
+            "requests": _incoming_request_payload(conn, uid),
+            "match": _match_status_payload(conn, uid),
+            "live": _live_status_payload(conn, uid),
+            "notifications": _take_unseen_notifications(conn, uid),
+        })
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+# ======================================================
+# API – LIVE EVENTS (SSE)
+# ======================================================
+def _sse(event, payload) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+@app.route("/api/events")
+def events():
+    """
+    Server-Sent Events stream replacing the request/trust/match/inbox pollers.
+    Each tick costs one primary-key lookup of the user's sync_version; the full
+    state is only rebuilt when it changes (or every EVENTS_RESYNC_SECONDS to
+    catch time-based expiry).
+
+    On the sync (gthread) workers an open stream occupies one worker thread
+    for its whole life, up to EVENTS_STREAM_SECONDS, after which the browser
+    reconnects. At most EVENTS_MAX_STREAMS streams run per process (size the
+    worker threads above it); beyond that the request gets a 503 and the
+    client falls back to polling /api/sync. The pooled DB connection is only
+    borrowed for each tick, not held between them.
+    """
+    if "user_id" not in session:
+        return jsonify({"error": "unauthorized"}), 401
+    if EVENTS_MAX_STREAMS <= 0 or not events_stream_slots.acquire(blocking=False):
+        resp = jsonify({"error": "events_busy", "fallback": "/api/sync"})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(int(EVENTS_STREAM_SECONDS))
+        return resp
+
+    uid = session["user_id"]
+    pool = db.get_pool()
+
+    def tick(conn, state, now):
+        """One poll of the member's state; returns the SSE chunks to send."""
+        row = conn.execute(
+            "SELECT sync_version, is_active FROM users WHERE id=?",
+            (uid,),
+        ).fetchone()
+        if not row:
+            state["done"] = True
+            return [_sse("unauthorized", {"error": "unauthorized"})]
+        if int(row["is_active"] or 0) != 1:
+            state["done"] = True
+            return [_sse("account_blocked", {"error": "account_blocked", "message": ACCOUNT_BLOCKED_ERROR})]
+
+        chunks = []
+        version = row["sync_version"]
+        if version != state["version"] or now - state["resync"] >= EVENTS_RESYNC_SECONDS:
+            state["version"] = version
+            state["resync"] = now
+            snapshot = (
+                ("user_info", _user_info_payload(conn, uid)),
+                ("requests", _incoming_request_payload(conn, uid)),
+                ("match", _match_status_payload(conn, uid)),
+                ("live", _live_status_payload(conn, uid)),
+            )
+            for event, payload in snapshot:
+                if state["sent"].get(event) != payload:
+                    state["sent"][event] = payload
+                    chunks.append(_sse(event, payload))
+            notifications = _take_unseen_notifications(conn, uid)
+            if notifications:
+                chunks.append(_sse("notifications", {"notifications": notifications}))
+        return chunks
+
+    def stream():
+        started = time.time()
+        last_write = started
+        state = {"version": None, "resync": 0.0, "sent": {}, "done": False}
+        yield f"retry: {int(EVENTS_POLL_SECONDS * 2000)}\n\n"
+
+        while True:
+            now = time.time()
+            conn = pool.acquire()
+            try:
+                chunks = tick(conn, state, now)
+            finally:
+                pool.release(conn)
+            for chunk in chunks:
+                last_write = now
+                yield chunk
+            if state["done"]:
+                return
+
+            if now - last_write >= EVENTS_KEEPALIVE_SECONDS:
+                last_write = now
+                yield ": keepalive\n\n"
+            if now - started >= EVENTS_STREAM_SECONDS:
+                return
+            time.sleep(EVENTS_POLL_SECONDS)
+
+    resp = app.response_class(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # runs when the stream ends or the client goes away
+    resp.call_on_close(events_stream_slots.release)
+    return resp
+
+# ======================================================
+# API – NEARBY USERS
+# ======================================================
+NEARBY_MAX_ZOOM = 22
+NEARBY_MAX_VIEWPORT_TILES = 128
+NEARBY_VIEWPORT_MAX_USERS = 500
+NEARBY_MAX_LIMIT = 500
+NEARBY_DELTA_CHUNK = 500  # member ids per IN (...) lookup
+NEARBY_COMPACT_BIO_CHARS = 80  # what the nearby cards show; profiles load the full bio
+NEARBY_COMPACT_ENCODER = compact.CompactEncoder(
+    live_grid.LiveSpotlight._fields,
+    [
+        ("user_id", compact.PLAIN, None),
+        ("lat", compact.ROUND, 6),
+        ("lon", compact.ROUND, 6),
+        ("username", compact.PLAIN, None),
+        ("trust_score", compact.PLAIN, None),
+        ("bio", compact.TRUNCATE, NEARBY_COMPACT_BIO_CHARS),
+        ("vibe_tags", compact.PLAIN, None),
+        ("avatar_url", compact.INTERN, None),
+        ("place", compact.PLAIN, None),
+        ("intent", compact.INTERN, None),
+        ("meet_time", compact.PLAIN, None),
+        ("clue", compact.PLAIN, None),
+    ],
+)
+
+# vibes=/intent= filters: a spotlight matches when its member shares any of
+# the vibes (vibe_mask bits) and its intent is one of the listed ones
+NearbyFilters = namedtuple("NearbyFilters", ["vibe_mask", "intent_codes"])
+NEARBY_NO_FILTERS = NearbyFilters(0, None)
+
+
+def _parse_nearby_filters(conn, vibes_param, intent_param):
+    """NearbyFilters from the query string; raises ValueError on an unknown vibe."""
+    vibe_mask, intent_codes = 0, None
+    if vibes_param:
+        values = [part.strip() for part in vibes_param.split(",") if part.strip()]
+        if any(value not in db.VIBE_BITS for value in values):
+            raise ValueError("invalid_vibes")
+        vibe_mask = db.vibe_mask(values)
+    if intent_param:
+        # intents nobody has used have no code, so they simply match nothing
+        intent_codes = frozenset(db.lookup_intent_codes(conn, intent_param.split(",")))
+    return NearbyFilters(vibe_mask, intent_codes)
+
+
+def _nearby_filter_sql(filters):
+    """Extra WHERE terms (on aliases s and u) and their parameters."""
+    sql, params = "", []
+    if filters.vibe_mask:
+        sql += " AND (u.vibe_mask & ?) != 0"
+        params.append(filters.vibe_mask)
+    if filters.intent_codes is not None:
+        codes = sorted(filters.intent_codes)
+        sql += f" AND s.intent_code IN ({','.join('?' * len(codes))})" if codes else " AND 0"
+        params.extend(codes)
+    return sql, params
+
+
+def _nearby_candidates(conn, min_lat, max_lat, min_lon, max_lon, now, me, filters=NEARBY_NO_FILTERS):
+    if LIVE_GRID_ENABLED:
+        _ensure_live_grid(conn)
+        return nearby_grid.query(
+            min_lat, max_lat, min_lon, max_lon, now, exclude_user_id=me,
+            vibe_mask=filters.vibe_mask, intent_codes=filters.intent_codes,
+        )
+    filter_sql, filter_params = _nearby_filter_sql(filters)
     rows = conn.execute(
-        """
-        SELECT s.*, u.username, u.trust_score, u.bio, u.vibe_tags, u.avatar_url, u.gender
-        FROM spotlights s
+        f"""
+        SELECT {live_grid.LIVE_SPOTLIGHT_COLUMNS}
+        FROM spotlights_rtree box
+        JOIN spotlights s ON s.id = box.id
         JOIN users u ON u.id = s.user_id
-        WHERE s.expiry > ?
+        WHERE box.max_lat >= ? AND box.min_lat <= ?
+          AND box.max_lon >= ? AND box.min_lon <= ?
+          AND s.expiry > ?
           AND s.user_id != ?
-          AND u.is_matched = 0
+          AND u.is_matched = 0{filter_sql}
         """,
-        (time.time(), me)
+        (min_lat, max_lat, min_lon, max_lon, now, me, *filter_params)
     ).fetchall()
+    return [_live_grid_entry(r) for r in rows]
 
-    result = []
-    for r in rows:
-        result.append({
-            "id": r["user_id"],
-            "lat": r["lat"],
-            "lon": r["lon"],
-            "username": r["username"],
-            "trust_score": r["trust_score"],
-            "bio": (r["bio"] or "")[:280],
-            "vibe_tags": r["vibe_tags"],
-            "avatar_url": _sanitize_avatar_url(r["avatar_url"], r["gender"]),
-            "place": r["place"],
-            "intent": r["intent"],
-            "meet_time": r["meet_time"],
-            "clue": r["clue"],
-        })
 
-    return jsonify(result)
+def _nearby_record(c, distance_km, score):
+    return {
+        "id": c.user_id,
+        "lat": c.lat,
+        "lon": c.lon,
+        "distance_km": round(distance_km, 3),
+        "score": round(score, 4),
+        "username": c.username,
+        "trust_score": c.trust_score,
+        "bio": c.bio,
+        "vibe_tags": c.vibe_tags,
+        "avatar_url": c.avatar_url,
+        "place": c.place,
+        "intent": c.intent,
+        "meet_time": c.meet_time,
+        "clue": c.clue,
+    }
+
+
+def _nearby_records(ranked, compact_format=False):
+    """Records for ranking.Ranked items: one dict each, or a columnar block."""
+    if compact_format:
+        return NEARBY_COMPACT_ENCODER.encode(
+            [r.entry for r in ranked],
+            extra={
+                "distance_km": [round(r.distance_km * 1000) / 1000 for r in ranked],
+                "score": [round(r.score * 10000) / 10000 for r in ranked],
+            },
+        )
+    return [_nearby_record(r.entry, r.distance_km, r.score) for r in ranked]
+
+
+def _rank_nearby(conn, me, candidates, lat, lon, now, distance_scale_km, max_distance_km=None, limit=None):
+    """Candidates ranked for the member (see ranking.rank), best first."""
+    row = conn.execute("SELECT vibe_mask FROM users WHERE id=?", (me,)).fetchone()
+    return ranking.rank(
+        candidates, lat, lon, now,
+        vibe_mask=(row["vibe_mask"] if row else 0) or 0,
+        distance_scale_km=distance_scale_km,
+        max_distance_km=max_distance_km,
+        limit=limit,
+    )
+
+
+def _parse_bbox(value):
+    """Parse Leaflet's toBBoxString() order: west,south,east,north."""
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        raise ValueError("invalid_viewport")
+    if not all(math.isfinite(v) for v in (west, south, east, north)):
+        raise ValueError("invalid_viewport")
+    # panned-over copies of the world wrap past ±180; clamp to the real one
+    west, east = max(-180.0, west), min(180.0, east)
+    south, north = max(-90.0, south), min(90.0, north)
+    if west > east or south > north:
+        raise ValueError("invalid_viewport")
+    return south, north, west, east
+
+
+def _nearby_view_key(bbox, zoom, filters, limit) -> int:
+    """Checksum of what decides a viewport's record set, carried in its tokens."""
+    view = [list(bbox), zoom, filters.vibe_mask, sorted(filters.intent_codes or ()), filters.intent_codes is None, limit]
+    return zlib.crc32(json.dumps(view, separators=(",", ":")).encode())
+
+
+def _nearby_viewport(
+    conn, bbox, zoom, lat, lon, me, now, since=None, compact_format=False, filters=NEARBY_NO_FILTERS, limit=None,
+):
+    """
+    Map viewport query: per-cell clusters up to live_grid.CLUSTER_MAX_ZOOM,
+    full records (best ranked first, capped at `limit`) when zoomed in
+    further. Record responses carry a `token`; sent back as `since` for the
+    same viewport and filters, it gets only the changes made after it. A
+    token issued for another viewport, zoom, filter or limit gets the full
+    list instead, since a delta would patch a list the client doesn't have.
+    """
+    view_key = _nearby_view_key(bbox, zoom, filters, limit)
+    min_lat, max_lat, min_lon, max_lon = bbox
+    tiles = live_grid.tiles_for_bbox(min_lat, max_lat, min_lon, max_lon, zoom)
+    if len(tiles) > NEARBY_MAX_VIEWPORT_TILES:
+        return jsonify({"error": "viewport_too_large", "max_tiles": NEARBY_MAX_VIEWPORT_TILES}), 400
+
+    payload = {"zoom": zoom, "full_records_zoom": live_grid.CLUSTER_MAX_ZOOM + 1}
+    if zoom <= live_grid.CLUSTER_MAX_ZOOM:
+        if LIVE_GRID_ENABLED:
+            _ensure_live_grid(conn)
+            clusters = nearby_grid.clusters(
+                zoom, tiles, now, exclude_user_id=me,
+                vibe_mask=filters.vibe_mask, intent_codes=filters.intent_codes,
+            )
+        else:
+            # no shared grid to cache against: aggregate the R*Tree rows of the covered tiles
+            _, north, west, _ = live_grid.tile_bounds(zoom, *tiles[0])
+            south, _, _, east = live_grid.tile_bounds(zoom, *tiles[-1])
+            filter_sql, filter_params = _nearby_filter_sql(filters)
+            rows = conn.execute(
+                f"""
+                SELECT s.lat, s.lon, s.intent
+                FROM spotlights_rtree box
+                JOIN spotlights s ON s.id = box.id
+                JOIN users u ON u.id = s.user_id
+                WHERE box.max_lat >= ? AND box.min_lat <= ?
+                  AND box.max_lon >= ? AND box.min_lon <= ?
+                  AND s.expiry > ?
+                  AND s.user_id != ?
+                  AND u.is_matched = 0{filter_sql}
+                """,
+                (south, north, west, east, now, me, *filter_params),
+            )
+            points = (live_grid.ClusterPoint(*row) for row in rows)
+            clusters = [cell.summary() for cell in live_grid.aggregate_cells(points, zoom).values()]
+        payload["clusters"] = clusters
+        payload["total"] = sum(c["count"] for c in clusters)
+        return jsonify(payload)
+
+    if lat is None or lon is None:
+        lat, lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    # closeness scores fall to zero at the viewport's half-diagonal
+    distance_scale_km = _haversine_km(min_lat, min_lon, max_lat, max_lon) / 2
+    if since is not None and since[2] == view_key:
+        delta = _nearby_delta(conn, since, bbox, lat, lon, me, now, compact_format, filters, distance_scale_km)
+        if delta is not None:
+            payload.update(delta)
+            return jsonify(payload)
+
+    # the token is the change log version the records are current to: read
+    # before the R*Tree rows, or the version the grid was just caught up to
+    if LIVE_GRID_ENABLED:
+        _ensure_live_grid(conn)
+        version = _catch_up_live_grid(conn)
+    else:
+        version = db.spotlight_changes_version(conn)
+    candidates = _nearby_candidates(conn, min_lat, max_lat, min_lon, max_lon, now, me, filters)
+    limit = min(limit or NEARBY_VIEWPORT_MAX_USERS, NEARBY_VIEWPORT_MAX_USERS)
+    records = _rank_nearby(conn, me, candidates, lat, lon, now, distance_scale_km, limit=limit)
+    payload["users"] = _nearby_records(records, compact_format)
+    payload["truncated"] = len(candidates) > limit
+    if not payload["truncated"]:
+        # a capped list cannot be patched by deltas; those clients refetch in full
+        payload["token"] = _encode_cursor(version, now, view_key)
+    return jsonify(payload)
+
+
+def _nearby_delta(
+    conn, since, bbox, lat, lon, me, now, compact_format=False, filters=NEARBY_NO_FILTERS, distance_scale_km=None,
+):
+    """
+    Added/updated/removed records in the viewport since a `token`, or None
+    when the client needs a full list (pruned log, too many changes).
+    Changed spotlights that no longer pass the filters come back as removed.
+    """
+    version, as_of, view_key = since
+    min_lat, max_lat, min_lon, max_lon = bbox
+    changed, current = db.spotlight_changes_since(conn, int(version), min_lat, max_lat, min_lon, max_lon)
+    if changed is None or len(changed) > NEARBY_VIEWPORT_MAX_USERS:
+        return None
+    added = {row["user_id"]: bool(row["added"]) for row in changed if row["user_id"] != me}
+
+    found = {}
+    ids = list(added)
+    filter_sql, filter_params = _nearby_filter_sql(filters)
+    for start in range(0, len(ids), NEARBY_DELTA_CHUNK):
+        chunk = ids[start:start + NEARBY_DELTA_CHUNK]
+        rows = conn.execute(
+            f"""
+            SELECT {live_grid.LIVE_SPOTLIGHT_COLUMNS}
+            FROM spotlights s
+            JOIN users u ON u.id = s.user_id
+            WHERE s.user_id IN ({",".join("?" * len(chunk))})
+              AND s.expiry > ?
+              AND u.is_matched = 0{filter_sql}
+            """,
+            (*chunk, now, *filter_params),
+        ).fetchall()
+        for row in rows:
+            if min_lat <= row["lat"] <= max_lat and min_lon <= row["lon"] <= max_lon:
+                found[row["user_id"]] = _live_grid_entry(row)
+
+    # expiry has no write to log until the sweeper runs, so read it off the clock
+    expired = conn.execute(
+        """
+        SELECT user_id FROM spotlights
+        WHERE expiry > ? AND expiry <= ?
+          AND lat BETWEEN ? AND ?
+          AND lon BETWEEN ? AND ?
+          AND user_id != ?
+        """,
+        (as_of, now, min_lat, max_lat, min_lon, max_lon, me),
+    ).fetchall()
+
+    delta = {"delta": True, "token": _encode_cursor(current, now, view_key)}
+    if distance_scale_km is None:
+        distance_scale_km = _haversine_km(min_lat, min_lon, max_lat, max_lon) / 2
+    ranked = {"added": [], "updated": []}
+    for r in _rank_nearby(conn, me, list(found.values()), lat, lon, now, distance_scale_km):
+        ranked["added" if added[r.entry.user_id] else "updated"].append(r)
+    for kind, kind_ranked in ranked.items():
+        delta[kind] = _nearby_records(kind_ranked, compact_format)
+    gone = {user_id for user_id in added if user_id not in found}
+    gone.update(row["user_id"] for row in expired)
+    delta["removed"] = sorted(gone - found.keys())
+    return delta
+
+
+@app.route("/api/nearby")
+def nearby():
+    """
+    Live spotlights around the member. With `bbox` (west,south,east,north)
+    and `zoom` it answers for the map viewport instead of a radius.
+    `format=compact` sends record lists as one columnar block
+    (see compact.CompactEncoder) with short bios. `vibes` and `intent`
+    (comma-separated) keep spotlights sharing any listed vibe and with one
+    of the listed intents. Records come best ranked first (see ranking.py),
+    each with its `score`; `limit` returns only the top K.
+    """
+    if "user_id" not in session:
+        return jsonify([])
+
+    lat = request.args.get("lat", type=float)
+    lon = request.args.get("lon", type=float)
+    me = session["user_id"]
+    now = time.time()
+    response_format = request.args.get("format", "json")
+    if response_format not in ("json", "compact"):
+        return jsonify({"error": "invalid_format"}), 400
+    compact_format = response_format == "compact"
+    conn = db.get_db_connection()
+    try:
+        filters = _parse_nearby_filters(conn, request.args.get("vibes"), request.args.get("intent"))
+    except ValueError:
+        return jsonify({"error": "invalid_vibes"}), 400
+    limit = None
+    if request.args.get("limit"):
+        limit = request.args.get("limit", type=int)
+        if limit is None or limit < 1:
+            return jsonify({"error": "invalid_limit"}), 400
+        limit = min(limit, NEARBY_MAX_LIMIT)
+
+    if request.args.get("bbox") is not None:
+        zoom = request.args.get("zoom", type=int)
+        try:
+            bbox = _parse_bbox(request.args["bbox"])
+        except ValueError:
+            return jsonify({"error": "invalid_viewport"}), 400
+        if zoom is None or not (0 <= zoom <= NEARBY_MAX_ZOOM):
+            return jsonify({"error": "invalid_zoom"}), 400
+        if lat is not None and lon is not None and not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            lat = lon = None
+        since = None
+        if request.args.get("since"):
+            try:
+                since = _decode_cursor(request.args["since"], 3)
+            except ValueError:
+                try:
+                    # a (version, as_of) token from before view keys: answer in full
+                    _decode_cursor(request.args["since"], 2)
+                except ValueError:
+                    return jsonify({"error": "invalid_since"}), 400
+        return _nearby_viewport(conn, bbox, zoom, lat, lon, me, now, since, compact_format, filters, limit)
+
+    if lat is None or lon is None or not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        return jsonify({"error": "invalid_location"}), 400
+
+    radius_km = request.args.get("radius_km", type=float) or NEARBY_DEFAULT_RADIUS_KM
+    radius_km = max(0.1, min(NEARBY_MAX_RADIUS_KM, radius_km))
+    min_lat, max_lat, min_lon, max_lon = _bounding_box(lat, lon, radius_km)
+
+    candidates = _nearby_candidates(conn, min_lat, max_lat, min_lon, max_lon, now, me, filters)
+    ranked = _rank_nearby(conn, me, candidates, lat, lon, now, radius_km, max_distance_km=radius_km, limit=limit)
+    return jsonify(_nearby_records(ranked, compact_format))
+
+
+if LIVE_GRID_ENABLED:
+    # warm the grid at startup so the first map viewers skip the rebuild
+    try:
+        with app.app_context():
+            _refresh_live_grid(db.get_db_connection())
+    except Exception:
+        app.logger.exception("Could not warm the live spotlight grid")
 
 
 # ======================================================
@@ -2032,6 +3196,7 @@ def update_profile():
         (vibe_tags, avatar_url, session["user_id"]),
     )
     conn.commit()
+    _sync_live_grid_user(conn, session["user_id"])
 
     return jsonify({
         "status": "saved",
@@ -2057,6 +3222,7 @@ def update_bio():
     conn = db.get_db_connection()
     conn.execute("UPDATE users SET bio=? WHERE id=?", (bio, session["user_id"]))
     conn.commit()
+    _sync_live_grid_user(conn, session["user_id"])
 
     return jsonify({"status": "saved", "bio": bio})
 
@@ -0,0 +1,58 @@
+from operator import itemgetter
+
+# ======================================================
+# COMPACT COLUMNAR PAYLOADS (opt-in, ?format=compact)
+# ======================================================
+# Large record lists are sent as one array per column instead of one object
+# per row, so field names appear once per response. Low-cardinality strings
+# (avatar URLs, intents) become indexes into a per-response dictionary, and
+# long free text is cut server-side. An encoder is compiled once from its
+# column plan into itemgetters over plain tuple rows (e.g. LiveSpotlight),
+# so encoding a column is a map() call rather than a dict per row.
+
+PLAIN = "plain"
+INTERN = "intern"
+TRUNCATE = "truncate"
+ROUND = "round"
+
+
+class CompactEncoder:
+    """
+    Columnar encoder for tuples with the given `fields`. `columns` is a list
+    of (name, kind, arg): PLAIN copies the field, INTERN replaces it with an
+    index into `dicts[name]`, TRUNCATE cuts text to `arg` characters (ending
+    in an ellipsis) and ROUND rounds numbers to `arg` decimals.
+    """
+
+    def __init__(self, fields, columns):
+        positions = {field: i for i, field in enumerate(fields)}
+        unknown = [name for name, _, _ in columns if name not in positions]
+        if unknown:
+            raise ValueError(f"unknown columns: {', '.join(unknown)}")
+        self.names = [name for name, _, _ in columns]
+        self._plan = [(name, kind, arg, itemgetter(positions[name])) for name, kind, arg in columns]
+
+    def encode(self, rows, extra=None) -> dict:
+        """
+        Encode a list of tuple rows. `extra` maps more column names to
+        ready-made value lists (e.g. per-request distances), in row order.
+        """
+        columns = {}
+        dicts = {}
+        for name, kind, arg, getter in self._plan:
+            values = list(map(getter, rows))
+            if kind == INTERN:
+                table = {}
+                values = [table.setdefault(value, len(table)) for value in values]
+                dicts[name] = list(table)
+            elif kind == TRUNCATE:
+                cut = arg - 1
+                values = [value[:cut] + "…" if value and len(value) > arg else value for value in values]
+            elif kind == ROUND:
+                # round(x * 10**n) / 10**n: same short JSON, without round(x, n)'s slow decimal path
+                scale = 10.0 ** arg
+                values = [None if value is None else round(value * scale) / scale for value in values]
+            columns[name] = values
+        for name, values in (extra or {}).items():
+            columns[name] = list(values)
+        return {"format": "compact", "count": len(rows), "columns": columns, "dicts": dicts}
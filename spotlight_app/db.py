@@ -1,8 +1,160 @@
 import sqlite3
 import os
+import queue
+import random
+import threading
+import time
 import click
 from flask import g
 
+try:
+    from . import instrumentation
+except ImportError:  # allow running as standalone script
+    import instrumentation  # type: ignore
+
+REQUEST_PENDING_TTL_SECONDS = 60 * 60  # 1 hour
+SWEEP_BATCH_SIZE = 500
+REVIEW_RATINGS = range(1, 11)
+SPOTLIGHT_CHANGES_RETENTION_SECONDS = int(os.environ.get("SPOTLIGHT_CHANGES_RETENTION_SECONDS", str(60 * 60)))
+# finished outbox rows are kept this long so their dedupe keys stay claimed
+OUTBOX_RETENTION_SECONDS = int(os.environ.get("SPOTLIGHT_OUTBOX_RETENTION_SECONDS", str(7 * 24 * 60 * 60)))
+
+# ======================================================
+# CONNECTION SETTINGS (env-tunable)
+# ======================================================
+DB_POOL_SIZE = int(os.environ.get("SPOTLIGHT_DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("SPOTLIGHT_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.environ.get("SPOTLIGHT_DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.environ.get("SPOTLIGHT_DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+DB_JOURNAL_MODE = os.environ.get("SPOTLIGHT_DB_JOURNAL_MODE", "WAL").strip().upper()
+DB_SYNCHRONOUS = os.environ.get("SPOTLIGHT_DB_SYNCHRONOUS", "NORMAL").strip().upper()
+
+_JOURNAL_MODES = {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+# ======================================================
+# VIBES AND INTENTS (filterable codes)
+# ======================================================
+# users.vibe_mask has bit i set for PROFILE_VIBE_OPTIONS[i], kept in step
+# with vibe_tags by triggers: append new vibes, never reorder or remove.
+# Free-text intents map to rows of the intents table by a normalised key.
+PROFILE_VIBE_OPTIONS = [
+    ("Chill", "Chill"),
+    ("DeepTalks", "Deep Talks"),
+    ("Exploring", "Exploring"),
+    ("Drinks", "Drinks"),
+    ("Coffee", "Coffee"),
+    ("Foodie", "Foodie"),
+    ("Fitness", "Fitness"),
+    ("Movies", "Movies"),
+    ("Music", "Music"),
+    ("Gaming", "Gaming"),
+    ("Books", "Books"),
+    ("Networking", "Networking"),
+]
+VIBE_BITS = {value: 1 << i for i, (value, _) in enumerate(PROFILE_VIBE_OPTIONS)}
+INTENT_KEY_MAX = 40
+
+
+def vibe_mask(values) -> int:
+    """Bitmask for vibe values; unknown values are ignored."""
+    mask = 0
+    for value in values:
+        mask |= VIBE_BITS.get(value, 0)
+    return mask
+
+
+def _vibe_mask_sql(column) -> str:
+    """SQL computing vibe_mask from a comma-joined vibe_tags expression."""
+    padded = f"',' || COALESCE({column}, '') || ','"
+    return " | ".join(
+        f"(CASE WHEN instr({padded}, ',{value},') > 0 THEN {bit} ELSE 0 END)"
+        for value, bit in VIBE_BITS.items()
+    )
+
+
+def normalize_intent(text):
+    """(key, label) for a free-text intent: whitespace collapsed and cut; the key is casefolded."""
+    label = " ".join(str(text or "").split())[:INTENT_KEY_MAX]
+    return label.casefold(), label
+
+
+def intent_code(conn, text):
+    """Code of a free-text intent, created on first use; None for a blank intent. Does not commit."""
+    key, label = normalize_intent(text)
+    if not key:
+        return None
+    row = conn.execute("SELECT id FROM intents WHERE key=?", (key,)).fetchone()
+    if row is None:
+        # a concurrent first use may win the insert; the key is unique either way
+        conn.execute("INSERT OR IGNORE INTO intents (key, label) VALUES (?, ?)", (key, label))
+        row = conn.execute("SELECT id FROM intents WHERE key=?", (key,)).fetchone()
+    return row[0]
+
+
+def lookup_intent_codes(conn, texts):
+    """Codes of the intents that exist among `texts` (filters never create codes)."""
+    keys = sorted({key for key, _ in map(normalize_intent, texts) if key})
+    if not keys:
+        return set()
+    rows = conn.execute(f"SELECT id FROM intents WHERE key IN ({','.join('?' * len(keys))})", keys)
+    return {row[0] for row in rows}
+
+# ======================================================
+# STATS COUNTERS
+# ======================================================
+# name -> query computing the true value; used to seed and reconcile the
+# trigger-maintained stats_counters rows
+STATS_COUNTER_QUERIES = {
+    "total_users": "SELECT COUNT(*) FROM users",
+    # users with no trust_score are left out of the average, as AVG() does
+    "trust_sum": "SELECT COALESCE(SUM(trust_score), 0) FROM users",
+    "trust_scored": "SELECT COUNT(trust_score) FROM users",
+    "active_matches": "SELECT COUNT(*) FROM matches WHERE status='active'",
+    "total_reviews": "SELECT COUNT(*) FROM reviews",
+    "push_subscribers": "SELECT COUNT(DISTINCT user_id) FROM push_subscriptions",
+}
+
+
+def _bump(name, delta, when=None):
+    guard = f" AND ({when})" if when else ""
+    return f"UPDATE stats_counters SET value=value + ({delta}) WHERE name='{name}'{guard};"
+
+
+# (trigger suffix, table, event, body)
+STATS_TRIGGERS = [
+    ("users_insert", "users", "AFTER INSERT",
+     _bump("total_users", 1) + _bump("trust_sum", "COALESCE(new.trust_score, 0)")
+     + _bump("trust_scored", "new.trust_score IS NOT NULL")),
+    ("users_delete", "users", "AFTER DELETE",
+     _bump("total_users", -1) + _bump("trust_sum", "-COALESCE(old.trust_score, 0)")
+     + _bump("trust_scored", "-(old.trust_score IS NOT NULL)")),
+    ("users_trust", "users", "AFTER UPDATE OF trust_score",
+     _bump("trust_sum", "COALESCE(new.trust_score, 0) - COALESCE(old.trust_score, 0)")
+     + _bump("trust_scored", "(new.trust_score IS NOT NULL) - (old.trust_score IS NOT NULL)")),
+    ("matches_insert", "matches", "AFTER INSERT",
+     _bump("active_matches", 1, "new.status='active'")),
+    ("matches_status", "matches", "AFTER UPDATE OF status",
+     _bump("active_matches", "(new.status='active') - (old.status='active')")),
+    ("matches_delete", "matches", "AFTER DELETE",
+     _bump("active_matches", -1, "old.status='active'")),
+    ("reviews_insert", "reviews", "AFTER INSERT", _bump("total_reviews", 1)),
+    ("reviews_delete", "reviews", "AFTER DELETE", _bump("total_reviews", -1)),
+    ("push_subs_insert", "push_subscriptions", "AFTER INSERT",
+     _bump("push_subscribers", 1,
+           "(SELECT COUNT(*) FROM push_subscriptions WHERE user_id=new.user_id)=1")),
+    ("push_subs_delete", "push_subscriptions", "AFTER DELETE",
+     _bump("push_subscribers", -1,
+           "NOT EXISTS (SELECT 1 FROM push_subscriptions WHERE user_id=old.user_id)")),
+    ("push_subs_move", "push_subscriptions", "AFTER UPDATE OF user_id",
+     _bump("push_subscribers", 1,
+           "old.user_id IS NOT new.user_id"
+           " AND (SELECT COUNT(*) FROM push_subscriptions WHERE user_id=new.user_id)=1")
+     + _bump("push_subscribers", -1,
+             "old.user_id IS NOT new.user_id"
+             " AND NOT EXISTS (SELECT 1 FROM push_subscriptions WHERE user_id=old.user_id)")),
+]
+
 # ======================================================
 # DATABASE PATH
 # ======================================================
@@ -12,21 +164,122 @@ def _get_db_path():
         return env_db_path
     return os.path.join(os.path.dirname(__file__), "database.db")
 
+def auth_signal_path():
+    """File touched by admin account changes to invalidate worker caches."""
+    return _get_db_path() + ".auth-signal"
+
 # ======================================================
-# CONNECTION (Flask-safe)
+# CONNECTION (Flask-safe, pooled)
 # ======================================================
+def _apply_pragmas(conn):
+    if DB_JOURNAL_MODE in _JOURNAL_MODES:
+        conn.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+    if DB_SYNCHRONOUS in _SYNCHRONOUS_MODES:
+        conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={max(0, DB_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA cache_size={-max(0, DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size={max(0, DB_MMAP_SIZE)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def connect(db_path=None):
+    """Open a tuned connection (WAL, busy timeout, cache/mmap sizing)."""
+    conn = sqlite3.connect(
+        db_path or _get_db_path(),
+        check_same_thread=False,
+        timeout=max(0, DB_BUSY_TIMEOUT_MS) / 1000.0,
+    )
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Per-process pool of idle connections. Borrowing never blocks: when the
+    pool is empty a new connection is opened, and connections returned to a
+    full pool are closed, so `size` caps idle connections, not concurrency.
+    """
+
+    def __init__(self, db_path, size=DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(0, size)
+        self.pid = os.getpid()
+        # LIFO keeps the most recently used (warmest) connections in play
+        self._idle = queue.LifoQueue(maxsize=self.size) if self.size else None
+
+    def acquire(self):
+        if self._idle is not None:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+        return connect(self.db_path)
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            conn.close()
+            return
+        if self._idle is None:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while self._idle is not None:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    db_path = db_path or _get_db_path()
+    pool = _pools.get(db_path)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        # never share connections across a fork (e.g. gunicorn --preload)
+        if pool is None or pool.pid != os.getpid():
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+
 def get_db_connection():
     db = getattr(g, "_database", None)
     if db is None:
-        db = sqlite3.connect(_get_db_path(), check_same_thread=False)
-        db.row_factory = sqlite3.Row
+        pool = get_pool()
+        db = pool.acquire()
+        if instrumentation.INSTRUMENTATION_ENABLED:
+            profile = g.get("_instr_profile")
+            if profile is not None:
+                db = instrumentation.wrap_connection(db, profile)
         g._database = db
+        g._database_pool = pool
     return db
 
 def close_db(e=None):
     db = g.pop("_database", None)
+    pool = g.pop("_database_pool", None)
     if db is not None:
-        db.close()
+        db = instrumentation.unwrap_connection(db)
+        if pool is not None:
+            pool.release(db)
+        else:
+            db.close()
 
 # ======================================================
 # INIT DATABASE (SAFE + AUTO-MIGRATION)
@@ -35,8 +288,7 @@ def init_db():
     db_path = _get_db_path()
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = connect(db_path)
     c = conn.cursor()
 
     # --------------------------------------------------
@@ -64,6 +316,9 @@ def init_db():
 
             is_matched INTEGER DEFAULT 0,
             matched_with INTEGER,
+            active_match_id INTEGER,
+            sync_version INTEGER DEFAULT 0,
+            vibe_mask INTEGER NOT NULL DEFAULT 0,
 
             created_at REAL
         )
@@ -89,6 +344,31 @@ def init_db():
     add_col("is_matched", "ALTER TABLE users ADD COLUMN is_matched INTEGER DEFAULT 0")
     add_col("matched_with", "ALTER TABLE users ADD COLUMN matched_with INTEGER")
     add_col("phone", "ALTER TABLE users ADD COLUMN phone TEXT")
+    add_col("sync_version", "ALTER TABLE users ADD COLUMN sync_version INTEGER DEFAULT 0")
+    backfill_active_match = "active_match_id" not in user_cols
+    add_col("active_match_id", "ALTER TABLE users ADD COLUMN active_match_id INTEGER")
+    add_col("vibe_mask", "ALTER TABLE users ADD COLUMN vibe_mask INTEGER NOT NULL DEFAULT 0")
+
+    # vibe_mask follows vibe_tags; the triggers embed the vibe list, so a
+    # changed list replaces them and recomputes every mask
+    vibe_mask_expr = _vibe_mask_sql("new.vibe_tags")
+    vibe_mask_triggers = {
+        "trg_users_vibe_mask_insert": "AFTER INSERT ON users",
+        "trg_users_vibe_mask_update": "AFTER UPDATE OF vibe_tags ON users",
+    }
+    vibe_mask_stale = False
+    for name, event in vibe_mask_triggers.items():
+        sql = (
+            f"CREATE TRIGGER {name} {event} BEGIN "
+            f"UPDATE users SET vibe_mask = {vibe_mask_expr} WHERE id = new.id; END"
+        )
+        row = c.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name=?", (name,)).fetchone()
+        if row is None or row["sql"] != sql:
+            c.execute(f"DROP TRIGGER IF EXISTS {name}")
+            c.execute(sql)
+            vibe_mask_stale = True
+    if vibe_mask_stale:
+        c.execute(f"UPDATE users SET vibe_mask = {_vibe_mask_sql('vibe_tags')}")
 
     # --------------------------------------------------
     # SPOTLIGHTS
@@ -105,9 +385,134 @@ def init_db():
             clue TEXT,
             timestamp REAL,
             expiry REAL,
+            intent_code INTEGER,
             FOREIGN KEY(user_id) REFERENCES users(id)
         )
     """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS intents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            label TEXT NOT NULL
+        )
+    """)
+    spotlight_cols = [r["name"] for r in c.execute("PRAGMA table_info(spotlights)")]
+    if "intent_code" not in spotlight_cols:
+        c.execute("ALTER TABLE spotlights ADD COLUMN intent_code INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_spotlights_intent_code ON spotlights(intent_code, expiry)")
+    # spotlights written before intent codes existed
+    for row in c.execute(
+        "SELECT DISTINCT intent FROM spotlights WHERE intent_code IS NULL AND intent IS NOT NULL"
+    ).fetchall():
+        code = intent_code(c, row["intent"])
+        if code is not None:
+            c.execute("UPDATE spotlights SET intent_code=? WHERE intent=? AND intent_code IS NULL", (code, row["intent"]))
+
+    # --------------------------------------------------
+    # SPOTLIGHTS SPATIAL INDEX (R*Tree, synced by triggers)
+    # --------------------------------------------------
+    c.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS spotlights_rtree USING rtree(
+            id,
+            min_lat, max_lat,
+            min_lon, max_lon
+        )
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlights_rtree_insert
+        AFTER INSERT ON spotlights
+        BEGIN
+            INSERT OR REPLACE INTO spotlights_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            VALUES (new.id, new.lat, new.lat, new.lon, new.lon);
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlights_rtree_update
+        AFTER UPDATE OF lat, lon ON spotlights
+        BEGIN
+            UPDATE spotlights_rtree
+            SET min_lat=new.lat, max_lat=new.lat, min_lon=new.lon, max_lon=new.lon
+            WHERE id=new.id;
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlights_rtree_delete
+        AFTER DELETE ON spotlights
+        BEGIN
+            DELETE FROM spotlights_rtree WHERE id=old.id;
+        END
+    """)
+    # backfill rows written before the index existed
+    c.execute("""
+        INSERT INTO spotlights_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT s.id, s.lat, s.lat, s.lon, s.lon
+        FROM spotlights s
+        WHERE s.id NOT IN (SELECT id FROM spotlights_rtree)
+    """)
+
+    # --------------------------------------------------
+    # SPOTLIGHT CHANGE LOG (nearby delta sync, written by triggers)
+    # --------------------------------------------------
+    # One row per change to what a nearby map shows: a spotlight appearing
+    # ('added'), disappearing for any reason, expiry sweeps included
+    # ('removed'), or its member's marker fields changing ('updated'). The
+    # id is the change version; lat/lon is where the change happened, so
+    # deltas can be filtered by viewport.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS spotlight_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_spotlight_changes_created ON spotlight_changes(created_at)")
+    now_sql = "(julianday('now') - 2440587.5) * 86400.0"
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlight_changes_insert
+        AFTER INSERT ON spotlights
+        BEGIN
+            INSERT INTO spotlight_changes (user_id, op, lat, lon, created_at)
+            VALUES (new.user_id, 'added', new.lat, new.lon, {now_sql});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlight_changes_update
+        AFTER UPDATE ON spotlights
+        BEGIN
+            INSERT INTO spotlight_changes (user_id, op, lat, lon, created_at)
+            SELECT old.user_id, 'removed', old.lat, old.lon, {now_sql}
+            WHERE old.lat != new.lat OR old.lon != new.lon OR old.user_id != new.user_id;
+            INSERT INTO spotlight_changes (user_id, op, lat, lon, created_at)
+            VALUES (new.user_id, 'updated', new.lat, new.lon, {now_sql});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlight_changes_delete
+        AFTER DELETE ON spotlights
+        BEGIN
+            INSERT INTO spotlight_changes (user_id, op, lat, lon, created_at)
+            VALUES (old.user_id, 'removed', old.lat, old.lon, {now_sql});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_spotlight_changes_user
+        AFTER UPDATE OF username, trust_score, bio, vibe_tags, avatar_url, gender, is_matched ON users
+        WHEN old.username IS NOT new.username
+          OR old.trust_score IS NOT new.trust_score
+          OR old.bio IS NOT new.bio
+          OR old.vibe_tags IS NOT new.vibe_tags
+          OR old.avatar_url IS NOT new.avatar_url
+          OR old.gender IS NOT new.gender
+          OR old.is_matched IS NOT new.is_matched
+        BEGIN
+            INSERT INTO spotlight_changes (user_id, op, lat, lon, created_at)
+            SELECT new.id, 'updated', s.lat, s.lon, {now_sql}
+            FROM spotlights s WHERE s.user_id = new.id;
+        END
+    """)
 
     # --------------------------------------------------
     # REQUESTS (🔥 FORCE FIX legacy spotlight_id)
@@ -207,6 +612,9 @@ def init_db():
     if "end_reason_by" not in match_cols:
         c.execute("ALTER TABLE matches ADD COLUMN end_reason_by INTEGER")
 
+    if backfill_active_match:
+        check_active_matches(conn, repair=True)
+
     # --------------------------------------------------
     # REVIEWS (migrate legacy score -> rating)
     # --------------------------------------------------
@@ -251,10 +659,41 @@ def init_db():
         """)
 
     # Indexes
-    c.execute("CREATE INDEX IF NOT EXISTS idx_reviews_reviewed ON reviews(reviewed_id)")
+    c.execute("DROP INDEX IF EXISTS idx_reviews_reviewed")  # superseded by the composite below
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reviews_reviewed_created ON reviews(reviewed_id, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reviews_pair_created ON reviews(reviewer_id, reviewed_id, created_at)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_requests_receiver ON requests(receiver_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_requests_pending_created ON requests(created_at) WHERE status='pending'")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_requests_receiver_pending ON requests(receiver_id, created_at) WHERE status='pending'")
+    # created_at rides along so the duplicate-request check is one range probe;
+    # without it the planner preferred idx_requests_receiver_pending
+    c.execute("DROP INDEX IF EXISTS idx_requests_sender_receiver_status")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_requests_sender_receiver_status_created ON requests(sender_id, receiver_id, status, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_spotlights_expiry ON spotlights(expiry)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_spotlights_user_expiry ON spotlights(user_id, expiry)")
+    # matches: "latest ended match" per side. Active matches are found through
+    # users.active_match_id, so the old active-pair index only cost writes.
+    c.execute("DROP INDEX IF EXISTS idx_matches_active_pair")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_matches_user1_ended ON matches(user1_id, ended_at) WHERE status='ended'")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_matches_user2_ended ON matches(user2_id, ended_at) WHERE status='ended'")
     c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_unique ON users(email)")
 
+    # --------------------------------------------------
+    # USER REVIEW STATS (materialized per-user aggregates)
+    # --------------------------------------------------
+    c.execute(f"""
+        CREATE TABLE IF NOT EXISTS user_review_stats (
+            user_id INTEGER PRIMARY KEY,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            {", ".join(f"hist_{n} INTEGER NOT NULL DEFAULT 0" for n in REVIEW_RATINGS)},
+            last_review_at REAL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    # backfill users whose reviews predate the table
+    rebuild_review_stats(conn, only_missing=True)
+
     # --------------------------------------------------
     # ID VERIFICATION (private video review workflow)
     # --------------------------------------------------
@@ -293,6 +732,8 @@ def init_db():
     """)
     c.execute("CREATE INDEX IF NOT EXISTS idx_reports_type ON reports(type)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_reports_target ON reports(target_user_id)")
+    # keyset pagination of the reports inbox on (created_at, id)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at, id)")
 
     # --------------------------------------------------
     # PUSH SUBSCRIPTIONS (browser push tokens)
@@ -313,6 +754,57 @@ def init_db():
     """)
     c.execute("CREATE INDEX IF NOT EXISTS idx_push_subs_user ON push_subscriptions(user_id)")
 
+    # --------------------------------------------------
+    # PUSH JOBS (background broadcast progress)
+    # --------------------------------------------------
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS push_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT CHECK(status IN ('queued','running','done','failed'))
+                   DEFAULT 'queued',
+            title TEXT,
+            message TEXT,
+            targeted_users INTEGER DEFAULT 0,
+            targeted_subscriptions INTEGER DEFAULT 0,
+            sent_count INTEGER DEFAULT 0,
+            failed_count INTEGER DEFAULT 0,
+            removed_count INTEGER DEFAULT 0,
+            error TEXT,
+            created_at REAL,
+            started_at REAL,
+            finished_at REAL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_push_jobs_created ON push_jobs(created_at)")
+
+    # --------------------------------------------------
+    # OUTBOX (durable notification queue, see outbox.py)
+    # --------------------------------------------------
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            dedupe_key TEXT UNIQUE,
+            payload TEXT,
+            status TEXT CHECK(status IN ('pending','processing','delivered','dead'))
+                   DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL,
+            claimed_by TEXT,
+            claimed_at REAL,
+            lease_until REAL,
+            last_error TEXT,
+            created_at REAL,
+            delivered_at REAL,
+            latency_ms INTEGER
+        )
+    """)
+    outbox_cols = [r["name"] for r in c.execute("PRAGMA table_info(outbox)")]
+    if "lease_until" not in outbox_cols:
+        c.execute("ALTER TABLE outbox ADD COLUMN lease_until REAL")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_outbox_finished ON outbox(delivered_at) WHERE status IN ('delivered','dead')")
+
     # --------------------------------------------------
     # APP NOTIFICATIONS (in-app inbox fallback)
     # --------------------------------------------------
@@ -331,9 +823,539 @@ def init_db():
     c.execute("CREATE INDEX IF NOT EXISTS idx_app_notifications_user_seen ON app_notifications(user_id, seen_at)")
     c.execute("CREATE INDEX IF NOT EXISTS idx_app_notifications_created ON app_notifications(created_at)")
 
+    # --------------------------------------------------
+    # STATS COUNTERS (admin dashboard, kept by triggers)
+    # --------------------------------------------------
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    stale_triggers = False
+    for name, table, event, body in STATS_TRIGGERS:
+        existing = c.execute(
+            "SELECT sql FROM sqlite_master WHERE type='trigger' AND name=?", (f"trg_stats_{name}",)
+        ).fetchone()
+        if existing and body not in existing["sql"]:
+            # the counter definition changed; replace the trigger and recount
+            c.execute(f"DROP TRIGGER trg_stats_{name}")
+            stale_triggers = True
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_{name}
+            {event} ON {table}
+            BEGIN
+                {body}
+            END
+        """)
+    seeded = c.execute("SELECT COUNT(*) AS n FROM stats_counters").fetchone()["n"]
+    if stale_triggers or seeded < len(STATS_COUNTER_QUERIES):
+        reconcile_stats(conn)
+
     conn.commit()
     conn.close()
 
+# ======================================================
+# REVIEW STATS
+# ======================================================
+def rebuild_review_stats(conn, user_ids=None, only_missing=False) -> int:
+    """
+    Recompute user_review_stats from reviews: for every reviewed user, only
+    the given `user_ids`, or (`only_missing`) users without a stats row.
+    Users left without reviews lose their row. Does not commit.
+    """
+    where = []
+    params = []
+    if user_ids is not None:
+        user_ids = sorted({int(uid) for uid in user_ids})
+        if not user_ids:
+            return 0
+        placeholders = ",".join(["?"] * len(user_ids))
+        conn.execute(f"DELETE FROM user_review_stats WHERE user_id IN ({placeholders})", user_ids)
+        where.append(f"reviewed_id IN ({placeholders})")
+        params.extend(user_ids)
+    elif only_missing:
+        where.append("reviewed_id NOT IN (SELECT user_id FROM user_review_stats)")
+    else:
+        conn.execute("DELETE FROM user_review_stats")
+
+    hist_cols = ", ".join(f"hist_{n}" for n in REVIEW_RATINGS)
+    hist_sums = ", ".join(f"SUM(rating={n})" for n in REVIEW_RATINGS)
+    cur = conn.execute(
+        f"""
+        INSERT INTO user_review_stats (user_id, review_count, rating_sum, {hist_cols}, last_review_at)
+        SELECT reviewed_id, COUNT(*), SUM(rating), {hist_sums}, MAX(created_at)
+        FROM reviews
+        {"WHERE " + " AND ".join(where) if where else ""}
+        GROUP BY reviewed_id
+        """,
+        params,
+    )
+    return max(cur.rowcount, 0)
+
+# ======================================================
+# MATCH STATE CONSISTENCY
+# ======================================================
+def check_active_matches(conn, repair=False, now=None) -> list:
+    """
+    Compare users.is_matched/matched_with/active_match_id with the active
+    rows in matches. Each user keeps their newest active match; an older
+    active match that overlaps a newer one is ended. With `repair`, writes
+    the fixes (without committing). Returns a list of human-readable issues.
+    """
+    now = time.time() if now is None else now
+    issues = []
+    expected = {}
+    stale_matches = []
+    for m in conn.execute(
+        """
+        SELECT id, user1_id, user2_id FROM matches
+        WHERE status='active'
+        ORDER BY created_at DESC, id DESC
+        """
+    ).fetchall():
+        if m["user1_id"] in expected or m["user2_id"] in expected:
+            stale_matches.append(m["id"])
+            issues.append(f"match {m['id']} overlaps a newer active match")
+            continue
+        expected[m["user1_id"]] = (m["id"], m["user2_id"])
+        expected[m["user2_id"]] = (m["id"], m["user1_id"])
+
+    fixes = []
+    seen = set()
+    for u in conn.execute(
+        """
+        SELECT id, is_matched, matched_with, active_match_id FROM users
+        WHERE is_matched=1 OR matched_with IS NOT NULL OR active_match_id IS NOT NULL
+        """
+    ).fetchall():
+        seen.add(u["id"])
+        match_id, other = expected.get(u["id"], (None, None))
+        actual = (1 if u["is_matched"] else 0, u["matched_with"], u["active_match_id"])
+        wanted = (1 if match_id else 0, other, match_id)
+        if actual != wanted:
+            fixes.append((*wanted, u["id"]))
+            issues.append(f"user {u['id']}: {actual} -> {wanted}")
+
+    for uid, (match_id, other) in expected.items():
+        if uid not in seen:
+            fixes.append((1, other, match_id, uid))
+            issues.append(f"user {uid}: not flagged for active match {match_id}")
+
+    if repair:
+        if stale_matches:
+            conn.executemany(
+                "UPDATE matches SET status='ended', ended_at=? WHERE id=? AND status='active'",
+                [(now, match_id) for match_id in stale_matches],
+            )
+        if fixes:
+            conn.executemany(
+                """
+                UPDATE users
+                SET is_matched=?, matched_with=?, active_match_id=?,
+                    sync_version=COALESCE(sync_version, 0) + 1
+                WHERE id=?
+                """,
+                fixes,
+            )
+    return issues
+
+# ======================================================
+# STATS RECONCILIATION
+# ======================================================
+def read_stats(conn) -> dict:
+    values = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM stats_counters")}
+    return {name: int(values.get(name) or 0) for name in STATS_COUNTER_QUERIES}
+
+
+def reconcile_stats(conn) -> dict:
+    """
+    Recompute every counter from its source table and overwrite the stored
+    value; returns {name: drift} for counters that had drifted. Runs in one
+    write transaction so triggers cannot interleave. Commits.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        stored = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM stats_counters")}
+        drift = {}
+        for name, query in STATS_COUNTER_QUERIES.items():
+            actual = int(conn.execute(query).fetchone()[0] or 0)
+            if name in stored and stored[name] != actual:
+                drift[name] = actual - stored[name]
+            conn.execute(
+                """
+                INSERT INTO stats_counters (name, value) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET value=excluded.value
+                """,
+                (name, actual),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return drift
+
+# ======================================================
+# SPOTLIGHT CHANGE LOG
+# ======================================================
+def spotlight_changes_version(conn) -> int:
+    """Id of the latest spotlight change (0 before the first one)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='spotlight_changes'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def spotlight_changes_since(conn, version, min_lat, max_lat, min_lon, max_lon):
+    """
+    Spotlight changes after `version` inside a bounding box, one row per
+    member: (user_id, added) where `added` is 1 if any change was a new
+    spotlight. Returns (rows, current_version), or (None, current_version)
+    when changes after `version` have already been pruned.
+    """
+    current = spotlight_changes_version(conn)
+    oldest = conn.execute("SELECT MIN(id) FROM spotlight_changes").fetchone()[0]
+    first_kept = oldest if oldest is not None else current + 1
+    if not (first_kept - 1 <= version <= current):
+        return None, current
+    rows = conn.execute(
+        """
+        SELECT user_id, MAX(op = 'added') AS added
+        FROM spotlight_changes
+        WHERE id > ? AND id <= ?
+          AND lat BETWEEN ? AND ?
+          AND lon BETWEEN ? AND ?
+        GROUP BY user_id
+        """,
+        (version, current, min_lat, max_lat, min_lon, max_lon),
+    ).fetchall()
+    return rows, current
+
+# ======================================================
+# EXPIRY SWEEPER
+# ======================================================
+def _delete_in_batches(conn, select_ids_sql, params, table, batch_size):
+    removed = 0
+    while True:
+        cur = conn.execute(
+            f"DELETE FROM {table} WHERE id IN ({select_ids_sql} LIMIT ?)",
+            (*params, batch_size),
+        )
+        # commit per batch so the write lock is only held briefly
+        conn.commit()
+        removed += max(cur.rowcount, 0)
+        if cur.rowcount < batch_size:
+            return removed
+
+
+def sweep_expired(conn, now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Prune expired requests/spotlights, old spotlight changes and outbox rows in bounded batches."""
+    now = time.time() if now is None else now
+    return {
+        "requests": _delete_in_batches(
+            conn,
+            "SELECT id FROM requests WHERE status='pending' AND created_at < ?",
+            (now - REQUEST_PENDING_TTL_SECONDS,),
+            "requests",
+            batch_size,
+        ),
+        "spotlights": _delete_in_batches(
+            conn,
+            "SELECT id FROM spotlights WHERE expiry < ?",
+            (now,),
+            "spotlights",
+            batch_size,
+        ),
+        "spotlight_changes": _delete_in_batches(
+            conn,
+            "SELECT id FROM spotlight_changes WHERE created_at < ?",
+            (now - SPOTLIGHT_CHANGES_RETENTION_SECONDS,),
+            "spotlight_changes",
+            batch_size,
+        ),
+        "outbox": _delete_in_batches(
+            conn,
+            "SELECT id FROM outbox WHERE status IN ('delivered','dead') AND delivered_at < ?",
+            (now - OUTBOX_RETENTION_SECONDS,),
+            "outbox",
+            batch_size,
+        ),
+    }
+
+# ======================================================
+# SYNTHETIC DATA (flask seed)
+# ======================================================
+SEED_PASSWORD = "spotlight-seed"
+SEED_CITIES = [
+    (12.9716, 77.5946),  # Bengaluru
+    (19.0760, 72.8777),  # Mumbai
+    (28.6139, 77.2090),  # Delhi
+    (17.3850, 78.4867),  # Hyderabad
+    (13.0827, 80.2707),  # Chennai
+    (18.5204, 73.8567),  # Pune
+]
+SEED_CITY_SPREAD_DEG = 0.15
+SEED_VIBES = [value for value, _ in PROFILE_VIBE_OPTIONS]
+SEED_INTENTS = ["Coffee", "Movie", "Dinner", "Walk", "Drinks", "Study", "Networking"]
+SEED_PLACES = ["Cafe", "Park", "Mall", "Bookstore", "Food court", "Metro station"]
+# rows per user for each table (matches: share of users in an active match)
+SEED_RATIOS = {
+    "spotlights": 0.2,
+    "active_matches": 0.04,
+    "ended_matches": 1.0,
+    "requests": 2.0,
+    "reviews": 3.0,
+    "reports": 0.05,
+    "push_subscriptions": 0.3,
+    "app_notifications": 5.0,
+}
+SEED_TABLES = ("users", "spotlights", "matches", "requests", "reviews", "reports",
+               "push_subscriptions", "app_notifications")
+
+
+def seed_database(conn, users, seed=0, now=None, progress=None) -> dict:
+    """
+    Bulk-load `users` synthetic members plus proportional rows (SEED_RATIOS)
+    in every member-facing table. Rows are generated lazily and inserted
+    with one executemany per table and one transaction per table, with
+    synchronous=OFF and the per-row stats/R*Tree triggers dropped for the
+    load; init_db() then recreates the triggers and backfills the R*Tree,
+    and the stats counters and review aggregates are recomputed. The same
+    `seed` always produces the same data. Returns {table: rows}.
+    Meant for scratch databases: writes made by a running app during the
+    load bypass the dropped triggers.
+    """
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    # progress(step, rows or None, seconds) after every table and final step
+    report = progress or (lambda step, rows, seconds: None)
+    counts = {}
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    conn.execute(f"PRAGMA threads={min(8, os.cpu_count() or 1)}")  # parallel sorts for index builds
+
+    # Per-row trigger work and random-order index maintenance dominate a bulk
+    # load, so triggers and plain (non-unique) indexes on the seeded tables
+    # are dropped here and recreated from their saved SQL afterwards.
+    deferred = []
+    for table in SEED_TABLES:
+        for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+            if index["origin"] == "c" and not index["unique"]:
+                deferred.append(("index", index["name"]))
+    deferred.extend(
+        ("trigger", row["name"])
+        for row in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE type='trigger' AND tbl_name IN ({','.join('?' * len(SEED_TABLES))})",
+            SEED_TABLES,
+        )
+    )
+    deferred_sql = []
+    for kind, name in deferred:
+        deferred_sql.append(
+            conn.execute("SELECT sql FROM sqlite_master WHERE type=? AND name=?", (kind, name)).fetchone()["sql"]
+        )
+        conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    conn.commit()
+
+    def load(table, sql, rows):
+        started = time.perf_counter()
+        conn.execute("BEGIN")
+        cur = conn.executemany(sql, rows)
+        conn.commit()
+        counts[table] = max(cur.rowcount, 0)
+        report(table, counts[table], time.perf_counter() - started)
+
+    base = conn.execute(
+        "SELECT MAX(COALESCE((SELECT MAX(id) FROM users), 0), COALESCE((SELECT seq FROM sqlite_sequence WHERE name='users'), 0))"
+    ).fetchone()[0]
+    first, last = base + 1, base + users
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    # random.randint is several times slower than random(); the generators
+    # below call it millions of times, so they scale random() instead
+    rand = rng.random
+
+    def randint(low, high):
+        return low + int(rand() * (high - low + 1))
+
+    def random_user():
+        return first + int(rand() * users)
+
+    def other_user(uid):
+        if users < 2:
+            return uid
+        pick = first + int(rand() * (users - 1))
+        return pick + 1 if pick >= uid else pick
+
+    # (vibe_tags, vibe_mask): the mask trigger is dropped for the load
+    vibe_sets = [
+        (",".join(picked), vibe_mask(picked))
+        for picked in (rng.sample(SEED_VIBES, rng.randint(1, 5)) for _ in range(512))
+    ]
+    birthdays = [f"{rng.randint(1975, 2006)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(512)]
+
+    # active pairs are decided up front so the user rows carry their match flags
+    matched = {}
+    match_rows = []
+    pool = rng.sample(range(first, last + 1), min(users, int(users * SEED_RATIOS["active_matches"])) // 2 * 2)
+    match_base = conn.execute("SELECT COALESCE(MAX(id), 0) FROM matches").fetchone()[0]
+    for i in range(0, len(pool), 2):
+        match_id = match_base + len(match_rows) + 1
+        a, b = pool[i], pool[i + 1]
+        matched[a] = (b, match_id)
+        matched[b] = (a, match_id)
+        match_rows.append((match_id, a, b, now - rand() * 3600, None, "active", None, None))
+
+    def user_row(i):
+        uid = first + i
+        partner, match_id = matched.get(uid, (None, None))
+        vibe_tags, mask = vibe_sets[int(rand() * 512)]
+        return (
+            uid, f"seed{uid}", f"seed{uid}@seed.spotlight.test", password_hash,
+            "male" if rand() < 0.5 else "female",
+            birthdays[int(rand() * 512)],
+            "Seeded member.", vibe_tags, mask, "9000000000",
+            randint(40, 160), f"/profileimg/{randint(1, 20)}.png", 1 if rand() < 0.98 else 0,
+            1 if partner else 0, partner, match_id, now - rand() * 365 * 86400,
+        )
+
+    load("users", """
+        INSERT INTO users
+        (id, username, email, password_hash, gender, dob, bio, vibe_tags, vibe_mask, phone, trust_score,
+         avatar_url, is_active, is_matched, matched_with, active_match_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, map(user_row, range(users)))
+
+    # one live spotlight per member, and never for someone already matched
+    live = [uid for uid in rng.sample(range(first, last + 1), int(users * SEED_RATIOS["spotlights"]))
+            if uid not in matched]
+
+    intent_codes = [intent_code(conn, intent) for intent in SEED_INTENTS]
+    conn.commit()
+
+    def spotlight_row(i):
+        lat, lon = SEED_CITIES[i % len(SEED_CITIES)]
+        started = now - rand() * 3600
+        return (
+            live[i],
+            lat + (rand() * 2 - 1) * SEED_CITY_SPREAD_DEG,
+            lon + (rand() * 2 - 1) * SEED_CITY_SPREAD_DEG,
+            SEED_PLACES[i % len(SEED_PLACES)], SEED_INTENTS[i % len(SEED_INTENTS)],
+            intent_codes[i % len(SEED_INTENTS)],
+            time.strftime("%Y-%m-%dT%H:%M", time.localtime(started + 3600)), "Look for the blue cap",
+            started, started + 90 * 60,
+        )
+
+    load("spotlights", """
+        INSERT INTO spotlights (user_id, lat, lon, place, intent, intent_code, meet_time, clue, timestamp, expiry)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, map(spotlight_row, range(len(live))))
+
+    ended = int(users * SEED_RATIOS["ended_matches"])
+
+    def ended_match_row(i):
+        created = now - rand() * 180 * 86400
+        reason = "Plans changed" if rand() < 0.3 else None
+        user1 = random_user()
+        return (None, user1, other_user(user1), created, created + rand() * 7200, "ended", reason, user1 if reason else None)
+
+    def match_rows_iter():
+        yield from match_rows
+        yield from map(ended_match_row, range(ended))
+
+    load("matches", """
+        INSERT INTO matches (id, user1_id, user2_id, created_at, ended_at, status, end_reason, end_reason_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, match_rows_iter())
+
+    def request_row(i):
+        age = rand() * 30 * 86400
+        status = "pending" if age < REQUEST_PENDING_TTL_SECONDS else ("accepted" if rand() < 0.3 else "declined")
+        sender = random_user()
+        return (sender, other_user(sender), status, now - age)
+
+    load("requests", """
+        INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, ?, ?)
+    """, map(request_row, range(int(users * SEED_RATIOS["requests"]))))
+
+    def review_row(i):
+        reviewer = random_user()
+        return (reviewer, other_user(reviewer), randint(1, 10), "Seeded review", now - rand() * 365 * 86400)
+
+    load("reviews", """
+        INSERT INTO reviews (reviewer_id, reviewed_id, rating, comment, created_at) VALUES (?, ?, ?, ?, ?)
+    """, map(review_row, range(int(users * SEED_RATIOS["reviews"]))))
+
+    def report_row(i):
+        kind = "user" if rand() < 0.7 else "app"
+        reporter = random_user()
+        return (
+            reporter, other_user(reporter) if kind == "user" else None, kind, "Seeded report",
+            "open" if rand() < 0.6 else "resolved", now - rand() * 365 * 86400,
+        )
+
+    load("reports", """
+        INSERT INTO reports (reporter_id, target_user_id, type, message, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, map(report_row, range(int(users * SEED_RATIOS["reports"]))))
+
+    sub_base = conn.execute("SELECT COALESCE(MAX(id), 0) FROM push_subscriptions").fetchone()[0]
+
+    def subscription_row(i):
+        created = now - rand() * 90 * 86400
+        return (
+            random_user(), f"https://push.seed.spotlight.test/{seed}/{sub_base + i}",
+            "seed-p256dh", "seed-auth", "Seed", created, created,
+        )
+
+    load("push_subscriptions", """
+        INSERT INTO push_subscriptions (user_id, endpoint, p256dh, auth, user_agent, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, map(subscription_row, range(int(users * SEED_RATIOS["push_subscriptions"]))))
+
+    def notification_row(i):
+        created = now - rand() * 30 * 86400
+        return (random_user(), "Seeded", "Seeded notification", "admin_push", created,
+                created + 60 if rand() < 0.9 else None)
+
+    load("app_notifications", """
+        INSERT INTO app_notifications (user_id, title, message, kind, created_at, seen_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, map(notification_row, range(int(users * SEED_RATIOS["app_notifications"]))))
+
+    # indexes are rebuilt in one sorted pass each; the R*Tree and the
+    # trigger-maintained tables are then brought up to date in bulk
+    started = time.perf_counter()
+    conn.execute("BEGIN")
+    for sql in deferred_sql:
+        conn.execute(sql)
+    conn.execute("""
+        INSERT INTO spotlights_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT s.id, s.lat, s.lat, s.lon, s.lon
+        FROM spotlights s
+        WHERE s.id NOT IN (SELECT id FROM spotlights_rtree)
+    """)
+    conn.commit()
+    report(f"rebuild {len(deferred_sql)} indexes/triggers", None, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    rebuild_review_stats(conn)
+    conn.commit()
+    reconcile_stats(conn)
+    report("review stats and counters", None, time.perf_counter() - started)
+
+    # fresh planner statistics, so local query plans match production's
+    started = time.perf_counter()
+    _apply_pragmas(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    report("analyze", None, time.perf_counter() - started)
+    return counts
+
 # ======================================================
 # CLI
 # ======================================================
@@ -342,9 +1364,110 @@ def init_db_command():
     init_db()
     click.echo(f"Initialized database at {_get_db_path()}")
 
+@click.command("sweep-expired")
+@click.option("--batch-size", default=SWEEP_BATCH_SIZE, show_default=True, help="Rows deleted per transaction.")
+@click.option("--interval", default=0.0, show_default=True, help="Repeat every N seconds; 0 runs once.")
+def sweep_expired_command(batch_size, interval):
+    """Delete expired pending requests, spotlights, old spotlight changes and finished outbox jobs."""
+    while True:
+        conn = connect()
+        try:
+            removed = sweep_expired(conn, batch_size=max(1, batch_size))
+        finally:
+            conn.close()
+        click.echo(
+            f"Swept {removed['requests']} expired requests, {removed['spotlights']} expired spotlights, "
+            f"{removed['spotlight_changes']} old spotlight changes, {removed['outbox']} finished outbox jobs"
+        )
+        if interval <= 0:
+            return
+        time.sleep(interval)
+
+@click.command("rebuild-review-stats")
+def rebuild_review_stats_command():
+    """Recompute user_review_stats from the reviews table."""
+    conn = connect()
+    try:
+        rebuilt = rebuild_review_stats(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    click.echo(f"Rebuilt review stats for {rebuilt} users")
+
+@click.command("check-matches")
+@click.option("--repair", is_flag=True, help="Write the fixes instead of only reporting them.")
+def check_matches_command(repair):
+    """Check users' match flags against active matches, optionally repairing drift."""
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        issues = check_active_matches(conn, repair=repair)
+        conn.commit()
+    finally:
+        conn.close()
+    for issue in issues:
+        click.echo(issue)
+    if not issues:
+        click.echo("Match state is consistent")
+    elif repair:
+        click.echo(f"Repaired {len(issues)} issues")
+    else:
+        click.echo(f"Found {len(issues)} issues; rerun with --repair to fix")
+
+@click.command("seed")
+@click.option("--users", default=100_000, show_default=True, help="Members to create; other tables scale with it.")
+@click.option("--seed", "seed_value", default=0, show_default=True, help="Random seed; the same seed yields the same data.")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+def seed_command(users, seed_value, yes):
+    """Bulk-load synthetic members, spotlights, matches, reviews and more for scale testing."""
+    path = _get_db_path()
+    if not yes:
+        click.confirm(f"Add synthetic data for {users} users to {path}?", abort=True)
+    init_db()
+    conn = connect()
+    started = time.perf_counter()
+    try:
+        counts = seed_database(
+            conn,
+            users,
+            seed=seed_value,
+            progress=lambda step, rows, seconds: click.echo(
+                f"  {step}: {seconds:.1f}s" if rows is None
+                else f"  {step}: {rows} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)"
+            ),
+        )
+    finally:
+        conn.close()
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - started
+    click.echo(f"Seeded {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s overall)")
+
+@click.command("reconcile-stats")
+@click.option("--interval", default=0.0, show_default=True, help="Repeat every N seconds; 0 runs once.")
+def reconcile_stats_command(interval):
+    """Recompute the admin dashboard counters and report any drift."""
+    while True:
+        conn = connect()
+        try:
+            drift = reconcile_stats(conn)
+        finally:
+            conn.close()
+        if drift:
+            click.echo("Corrected drift: " + ", ".join(f"{k} {v:+d}" for k, v in sorted(drift.items())))
+        else:
+            click.echo("Stats counters are consistent")
+        if interval <= 0:
+            return
+        time.sleep(interval)
+
 def init_app(app):
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(sweep_expired_command)
+    app.cli.add_command(rebuild_review_stats_command)
+    app.cli.add_command(reconcile_stats_command)
+    app.cli.add_command(check_matches_command)
+    app.cli.add_command(seed_command)
 
 # ======================================================
 # MANUAL RUN
@@ -0,0 +1,355 @@
+import collections
+import os
+import re
+import threading
+import time
+
+# ======================================================
+# REQUEST INSTRUMENTATION (opt-in)
+# ======================================================
+# With SPOTLIGHT_INSTRUMENTATION=1, db.get_db_connection hands out an
+# InstrumentedConnection that times every statement (including the rows
+# fetched from its cursor) and tallies it on the current request's
+# RequestProfile. After each request the profile is folded into the
+# process-wide registry: per-endpoint latency and query-count histograms,
+# total SQL time, slow statements and N+1 patterns (the same statement
+# shape repeated many times in one request). With the flag off the only
+# cost left is one module-level boolean check per connection checkout.
+#
+# Metrics are per process, like the active-user cache stats; with several
+# gunicorn workers each scrape sees the worker that served it.
+
+INSTRUMENTATION_ENABLED = os.environ.get("SPOTLIGHT_INSTRUMENTATION", "0") == "1"
+SLOW_QUERY_MS = float(os.environ.get("SPOTLIGHT_SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("SPOTLIGHT_N_PLUS_ONE_THRESHOLD", "10"))
+RECENT_SLOW_QUERIES = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def normalize_sql(sql) -> str:
+    """Collapse a statement to its shape so repeats with different values group together."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("?+", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class RequestProfile:
+    """SQL activity of one request."""
+
+    __slots__ = ("query_count", "sql_seconds", "statements", "slow")
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.statements = collections.Counter()
+        self.slow = []
+
+    def add_statement(self, sql) -> None:
+        self.query_count += 1
+        self.statements[sql] += 1
+
+    def add_time(self, seconds) -> None:
+        self.sql_seconds += seconds
+
+    def n_plus_one(self, threshold=None):
+        threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return [(sql, count) for sql, count in self.statements.items() if count >= threshold]
+
+
+class InstrumentedCursor:
+    """Cursor proxy that also bills row fetching to its statement."""
+
+    def __init__(self, cursor, sql, profile, elapsed):
+        self._cursor = cursor
+        self._sql = sql
+        self._profile = profile
+        self._elapsed = 0.0
+        self._slow = None
+        self._add(elapsed)
+
+    def _add(self, seconds) -> None:
+        self._profile.add_time(seconds)
+        self._elapsed += seconds
+        if self._elapsed * 1000 < SLOW_QUERY_MS:
+            return
+        if self._slow is None:
+            self._slow = [self._sql, self._elapsed]
+            self._profile.slow.append(self._slow)
+        else:
+            self._slow[1] = self._elapsed
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._timed(self._cursor.fetchmany, *args)
+
+    def __iter__(self):
+        while True:
+            row = self._timed(self._cursor.fetchone)
+            if row is None:
+                return
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """
+    Thin proxy over a pooled sqlite3.Connection. Only execute/executemany
+    are intercepted; everything else (commit, in_transaction, row_factory
+    ...) passes straight through to the real connection.
+    """
+
+    def __init__(self, conn, profile):
+        object.__setattr__(self, "raw", conn)
+        object.__setattr__(self, "profile", profile)
+
+    def _run(self, fn, sql, *args):
+        shape = normalize_sql(sql)
+        self.profile.add_statement(shape)
+        started = time.perf_counter()
+        try:
+            cursor = fn(sql, *args)
+        except Exception:
+            self.profile.add_time(time.perf_counter() - started)
+            raise
+        return InstrumentedCursor(cursor, shape, self.profile, time.perf_counter() - started)
+
+    def execute(self, sql, *args):
+        return self._run(self.raw.execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._run(self.raw.executemany, sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.raw, name, value)
+
+    def __enter__(self):
+        self.raw.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self.raw.__exit__(*exc)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition layout."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value) -> None:
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class Registry:
+    """Process-wide aggregates, updated once per finished request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = collections.Counter()  # (endpoint, method, status)
+            self.latency = {}  # endpoint -> Histogram
+            self.queries = {}  # endpoint -> Histogram of queries per request
+            self.sql_seconds = collections.Counter()
+            self.slow_queries = collections.Counter()
+            self.n_plus_one = collections.Counter()  # (endpoint, statement)
+            self.recent_slow = collections.deque(maxlen=RECENT_SLOW_QUERIES)
+
+    def observe_request(self, endpoint, method, status, seconds, profile) -> None:
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            hist = self.latency.get(endpoint)
+            if hist is None:
+                hist = self.latency[endpoint] = Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+            if profile is None:
+                return
+            hist = self.queries.get(endpoint)
+            if hist is None:
+                hist = self.queries[endpoint] = Histogram(QUERY_COUNT_BUCKETS)
+            hist.observe(profile.query_count)
+            self.sql_seconds[endpoint] += profile.sql_seconds
+            for sql, slow_seconds in profile.slow:
+                self.slow_queries[endpoint] += 1
+                self.recent_slow.append({
+                    "endpoint": endpoint,
+                    "sql": sql,
+                    "ms": round(slow_seconds * 1000, 2),
+                    "at": time.time(),
+                })
+            for sql, _count in profile.n_plus_one():
+                self.n_plus_one[(endpoint, sql)] += 1
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view of the slow-query log and N+1 offenders."""
+        with self._lock:
+            return {
+                "enabled": INSTRUMENTATION_ENABLED,
+                "slow_query_ms": SLOW_QUERY_MS,
+                "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+                "recent_slow_queries": list(reversed(self.recent_slow)),
+                "n_plus_one": [
+                    {"endpoint": endpoint, "sql": sql, "requests": count}
+                    for (endpoint, sql), count in self.n_plus_one.most_common(50)
+                ],
+            }
+
+    def render(self, gauges=()) -> str:
+        """
+        Prometheus text exposition. `gauges` are extra (name, help, samples)
+        triples from the app, where samples is a list of (labels, value).
+        """
+        out = []
+
+        def family(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("spotlight_instrumentation_enabled", "gauge", "1 when request instrumentation is on.")
+            out.append(f"spotlight_instrumentation_enabled {int(INSTRUMENTATION_ENABLED)}")
+
+            family("spotlight_http_requests_total", "counter", "Finished requests.")
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                out.append(
+                    f"spotlight_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}"
+                )
+
+            _render_histograms(
+                out, family, "spotlight_http_request_duration_seconds",
+                "Time to build the response, by endpoint.", self.latency,
+            )
+            _render_histograms(
+                out, family, "spotlight_db_queries_per_request",
+                "SQL statements executed per request, by endpoint.", self.queries,
+            )
+
+            family("spotlight_db_query_seconds_total", "counter", "Time spent in SQL, by endpoint.")
+            for endpoint, seconds in sorted(self.sql_seconds.items()):
+                out.append(f"spotlight_db_query_seconds_total{_labels(endpoint=endpoint)} {seconds:.6f}")
+
+            family("spotlight_db_slow_queries_total", "counter", f"Statements slower than {SLOW_QUERY_MS:g} ms.")
+            for endpoint, count in sorted(self.slow_queries.items()):
+                out.append(f"spotlight_db_slow_queries_total{_labels(endpoint=endpoint)} {count}")
+
+            family(
+                "spotlight_db_n_plus_one_requests_total", "counter",
+                f"Requests that repeated one statement at least {N_PLUS_ONE_THRESHOLD} times.",
+            )
+            per_endpoint = collections.Counter()
+            for (endpoint, _sql), count in self.n_plus_one.items():
+                per_endpoint[endpoint] += count
+            for endpoint, count in sorted(per_endpoint.items()):
+                out.append(f"spotlight_db_n_plus_one_requests_total{_labels(endpoint=endpoint)} {count}")
+
+        for name, help_text, samples in gauges:
+            family(name, "gauge", help_text)
+            for labels, value in samples:
+                if value is None:
+                    continue
+                out.append(f"{name}{_labels(**labels)} {value}")
+        return "\n".join(out) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _render_histograms(out, family, name, help_text, histograms) -> None:
+    family(name, "histogram", help_text)
+    for endpoint, hist in sorted(histograms.items()):
+        for bound, running in hist.cumulative():
+            out.append(f"{name}_bucket{_labels(endpoint=endpoint, le=f'{bound:g}')} {running}")
+        out.append(f"{name}_bucket{_labels(endpoint=endpoint, le='+Inf')} {hist.count}")
+        out.append(f"{name}_sum{_labels(endpoint=endpoint)} {hist.total:.6f}")
+        out.append(f"{name}_count{_labels(endpoint=endpoint)} {hist.count}")
+
+
+registry = Registry()
+
+
+def wrap_connection(conn, profile):
+    return InstrumentedConnection(conn, profile)
+
+
+def unwrap_connection(conn):
+    return conn.raw if isinstance(conn, InstrumentedConnection) else conn
+
+
+def init_app(app) -> None:
+    """Register the per-request hooks; a no-op unless instrumentation is enabled."""
+    if not INSTRUMENTATION_ENABLED:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _instrumentation_start():
+        g._instr_started = time.perf_counter()
+        g._instr_profile = RequestProfile()
+
+    @app.after_request
+    def _instrumentation_finish(response):
+        started = g.pop("_instr_started", None)
+        profile = g.pop("_instr_profile", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        # the URL rule keeps label cardinality bounded (no raw paths)
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+        registry.observe_request(endpoint, request.method, response.status_code, elapsed, profile)
+        if profile is not None:
+            for sql, seconds in profile.slow:
+                app.logger.warning("slow query (%.1f ms) in %s: %s", seconds * 1000, endpoint, sql)
+            for sql, count in profile.n_plus_one():
+                app.logger.warning("possible N+1 in %s: %d x %s", endpoint, count, sql)
+        return response
@@ -0,0 +1,357 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+try:
+    from . import db
+except ImportError:  # allow running as standalone script
+    import db  # type: ignore
+
+# ======================================================
+# LIVE SPOTLIGHT GRID (process-local, write-through)
+# ======================================================
+# Live check-ins are few and short-lived, so each worker keeps them in a
+# coarse lat/lon grid with the user fields needed by /api/nearby copied in.
+# Handlers write through after they commit; a periodic rebuild from the
+# spotlights table picks up writes made by other gunicorn workers.
+
+GRID_CELL_DEG = 0.05  # ~5.5 km of latitude per cell
+
+# Viewport clusters: low-zoom map views get per-cell aggregates instead of
+# records. Aggregates are built per web-mercator tile (the z/x/y scheme of
+# the base map), each tile split into 2**CLUSTER_CELL_SHIFT cells a side,
+# and cached until a write lands in the tile or its first spotlight expires.
+CLUSTER_MAX_ZOOM = 13  # deeper zooms get full records
+CLUSTER_CELL_SHIFT = 2  # 4x4 cells per tile, ~64 px on a 256 px tile
+MERCATOR_MAX_LAT = 85.0511287798
+TILE_CACHE_MAX = 4096
+TILE_CACHE_REBUILD_DIFF_MAX = 512  # rebuilds changing more entries drop the whole cache
+
+LiveSpotlight = namedtuple(
+    "LiveSpotlight",
+    [
+        "user_id",
+        "lat",
+        "lon",
+        "place",
+        "intent",
+        "meet_time",
+        "clue",
+        "expiry",
+        "username",
+        "trust_score",
+        "bio",
+        "vibe_tags",
+        "avatar_url",
+        "vibe_mask",
+        "intent_code",
+    ],
+)
+
+# keep in LiveSpotlight field order (entry_from_row reads by position); gender
+# is read in place of avatar_url, and the filter codes come after it
+LIVE_SPOTLIGHT_COLUMNS = """
+    s.user_id, s.lat, s.lon, s.place, s.intent, s.meet_time, s.clue, s.expiry,
+    u.username, u.trust_score, u.bio, u.vibe_tags, u.avatar_url, u.gender,
+    u.vibe_mask, s.intent_code
+"""
+
+
+def entry_from_row(row, avatar_url) -> LiveSpotlight:
+    """
+    Build a grid entry from a row (tuple or sqlite3.Row) selected with
+    LIVE_SPOTLIGHT_COLUMNS, whose order matches the fields up to avatar_url.
+    Positional access: this runs for every live spotlight on each rebuild.
+    """
+    return LiveSpotlight(*row[:10], (row[10] or "")[:280], row[11], avatar_url, row[14] or 0, row[15])
+
+
+def tile_xy(lat, lon, zoom):
+    """Web-mercator (x, y) of the tile holding a point at a zoom level."""
+    n = 1 << zoom
+    lat = max(-MERCATOR_MAX_LAT, min(MERCATOR_MAX_LAT, lat))
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return min(n - 1, max(0, int(x))), min(n - 1, max(0, int(y)))
+
+
+def tile_bounds(zoom, x, y):
+    """Return (min_lat, max_lat, min_lon, max_lon) of a tile."""
+    n = 1 << zoom
+
+    def lat_at(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * row / n))))
+
+    # the edge rows also own the polar caps that mercator cannot show
+    max_lat = 90.0 if y == 0 else lat_at(y)
+    min_lat = -90.0 if y == n - 1 else lat_at(y + 1)
+    return min_lat, max_lat, x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+def tiles_for_bbox(min_lat, max_lat, min_lon, max_lon, zoom):
+    """Tiles at a zoom level that intersect a bounding box, row by row."""
+    min_x, min_y = tile_xy(max_lat, min_lon, zoom)
+    max_x, max_y = tile_xy(min_lat, max_lon, zoom)
+    return [(x, y) for y in range(min_y, max_y + 1) for x in range(min_x, max_x + 1)]
+
+
+class ClusterCell:
+    """Running aggregate of the spotlights in one cluster cell."""
+
+    __slots__ = ("count", "sum_lat", "sum_lon", "intents", "labels")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lon = 0.0
+        self.intents = {}
+        self.labels = {}
+
+    def add(self, entry) -> None:
+        self.count += 1
+        self.sum_lat += entry.lat
+        self.sum_lon += entry.lon
+        key, label = db.normalize_intent(entry.intent)
+        if key:
+            self.intents[key] = self.intents.get(key, 0) + 1
+            self.labels.setdefault(key, label)
+
+    def summary(self, minus=None):
+        """JSON-ready aggregate, optionally leaving one entry out (the viewer)."""
+        count, sum_lat, sum_lon, intents = self.count, self.sum_lat, self.sum_lon, self.intents
+        if minus is not None:
+            count -= 1
+            sum_lat -= minus.lat
+            sum_lon -= minus.lon
+            key, _ = db.normalize_intent(minus.intent)
+            if key in intents:
+                intents = dict(intents)
+                intents[key] -= 1
+        if count <= 0:
+            return None
+        dominant = min(
+            ((key, n) for key, n in intents.items() if n > 0),
+            key=lambda item: (-item[1], item[0]),
+            default=None,
+        )
+        return {
+            "lat": round(sum_lat / count, 6),
+            "lon": round(sum_lon / count, 6),
+            "count": count,
+            "intent": self.labels[dominant[0]] if dominant else None,
+        }
+
+
+def aggregate_cells(entries, zoom):
+    """Group entries into cluster cells for a map zoom level, keyed by cell."""
+    cells = {}
+    for entry in entries:
+        key = tile_xy(entry.lat, entry.lon, zoom + CLUSTER_CELL_SHIFT)
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = ClusterCell()
+        cell.add(entry)
+    return cells
+
+
+TileAggregate = namedtuple("TileAggregate", ["cells", "valid_until"])
+ClusterPoint = namedtuple("ClusterPoint", ["lat", "lon", "intent"])
+
+
+class LiveGrid:
+    def __init__(self, cell_deg: float = GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.loaded_at = 0.0
+        self.version = 0  # spotlight change log version the last rebuild read at
+        self._lock = threading.Lock()
+        self._cells = {}
+        self._entries = {}
+        self._tile_cache = OrderedDict()
+        self._generation = 0
+        self.tile_hits = 0
+        self.tile_misses = 0
+
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_stale(self, max_age: float) -> bool:
+        return time.time() - self.loaded_at > max_age
+
+    def rebuild(self, entries, version=0) -> None:
+        cells = {}
+        by_user = {}
+        for entry in entries:
+            by_user[entry.user_id] = entry
+            cells.setdefault(self._cell(entry.lat, entry.lon), {})[entry.user_id] = entry
+        with self._lock:
+            previous = self._entries.copy() if self._tile_cache else None
+        changed = []
+        if previous is not None:
+            # only tiles whose entries changed since the last load lose their aggregates
+            changed = [entry for user_id, entry in previous.items() if by_user.get(user_id) != entry]
+            changed += [entry for user_id, entry in by_user.items() if previous.get(user_id) != entry]
+        with self._lock:
+            self._cells = cells
+            self._entries = by_user
+            self.loaded_at = time.time()
+            self.version = version
+            self._generation += 1
+            if previous is None or len(changed) > TILE_CACHE_REBUILD_DIFF_MAX:
+                self._tile_cache.clear()
+            else:
+                for entry in changed:
+                    self._invalidate_tiles_locked(entry)
+
+    def catch_up(self, entries, removed_user_ids, version) -> None:
+        """
+        Apply changes read from the spotlight change log after self.version:
+        upsert `entries`, drop `removed_user_ids`, then move to `version`.
+        """
+        with self._lock:
+            self._generation += 1
+            for user_id in removed_user_ids:
+                self._discard_locked(user_id)
+            for entry in entries:
+                self._discard_locked(entry.user_id)
+                self._invalidate_tiles_locked(entry)
+                self._entries[entry.user_id] = entry
+                self._cells.setdefault(self._cell(entry.lat, entry.lon), {})[entry.user_id] = entry
+            self.version = max(self.version, version)
+
+    def _invalidate_tiles_locked(self, entry) -> None:
+        if not self._tile_cache:
+            return
+        for zoom in range(CLUSTER_MAX_ZOOM + 1):
+            self._tile_cache.pop((zoom,) + tile_xy(entry.lat, entry.lon, zoom), None)
+
+    def _discard_locked(self, user_id) -> None:
+        previous = self._entries.pop(user_id, None)
+        if previous is None:
+            return
+        self._invalidate_tiles_locked(previous)
+        key = self._cell(previous.lat, previous.lon)
+        bucket = self._cells.get(key)
+        if bucket is not None:
+            bucket.pop(user_id, None)
+            if not bucket:
+                del self._cells[key]
+
+    def upsert(self, entry: LiveSpotlight) -> None:
+        with self._lock:
+            self._generation += 1
+            self._discard_locked(entry.user_id)
+            self._invalidate_tiles_locked(entry)
+            self._entries[entry.user_id] = entry
+            self._cells.setdefault(self._cell(entry.lat, entry.lon), {})[entry.user_id] = entry
+
+    def remove(self, user_id) -> None:
+        with self._lock:
+            self._generation += 1
+            self._discard_locked(user_id)
+
+    def query(self, min_lat, max_lat, min_lon, max_lon, now, exclude_user_id=None, vibe_mask=0, intent_codes=None):
+        """
+        Return live entries inside the bounding box that have not expired,
+        sharing a vibe with `vibe_mask` (when non-zero) and with an intent
+        code in `intent_codes` (when not None).
+        """
+        min_cy, min_cx = self._cell(min_lat, min_lon)
+        max_cy, max_cx = self._cell(max_lat, max_lon)
+        found = []
+        with self._lock:
+            cells = self._cells
+            span = (max_cy - min_cy + 1) * (max_cx - min_cx + 1)
+            if span > len(cells):
+                # very wide boxes: walking occupied cells is cheaper than probing
+                keys = [
+                    key for key in cells
+                    if min_cy <= key[0] <= max_cy and min_cx <= key[1] <= max_cx
+                ]
+            else:
+                keys = [
+                    (cy, cx)
+                    for cy in range(min_cy, max_cy + 1)
+                    for cx in range(min_cx, max_cx + 1)
+                ]
+            for key in keys:
+                bucket = cells.get(key)
+                if not bucket:
+                    continue
+                for entry in bucket.values():
+                    if (
+                        entry.expiry > now
+                        and entry.user_id != exclude_user_id
+                        and min_lat <= entry.lat <= max_lat
+                        and min_lon <= entry.lon <= max_lon
+                        and (not vibe_mask or entry.vibe_mask & vibe_mask)
+                        and (intent_codes is None or entry.intent_code in intent_codes)
+                    ):
+                        found.append(entry)
+        return found
+
+    def _tile(self, zoom, x, y, now) -> TileAggregate:
+        key = (zoom, x, y)
+        with self._lock:
+            cached = self._tile_cache.get(key)
+            if cached is not None and cached.valid_until > now:
+                self._tile_cache.move_to_end(key)
+                self.tile_hits += 1
+                return cached
+            generation = self._generation
+            self.tile_misses += 1
+
+        min_lat, max_lat, min_lon, max_lon = tile_bounds(zoom, x, y)
+        # entries on a shared edge belong to the tile their point maps to
+        entries = [
+            entry for entry in self.query(min_lat, max_lat, min_lon, max_lon, now)
+            if tile_xy(entry.lat, entry.lon, zoom) == (x, y)
+        ]
+        built = TileAggregate(
+            cells=aggregate_cells(entries, zoom),
+            valid_until=min((entry.expiry for entry in entries), default=float("inf")),
+        )
+        with self._lock:
+            # a write that raced the build may already have invalidated this tile
+            if self._generation == generation:
+                self._tile_cache[key] = built
+                while len(self._tile_cache) > TILE_CACHE_MAX:
+                    self._tile_cache.popitem(last=False)
+        return built
+
+    def clusters(self, zoom, tiles, now, exclude_user_id=None, vibe_mask=0, intent_codes=None):
+        """
+        Cluster summaries for the given tiles at a zoom level, cached per tile.
+        Filtered views (see query()) are aggregated on the fly, uncached.
+        """
+        if vibe_mask or intent_codes is not None:
+            found = []
+            for x, y in tiles:
+                min_lat, max_lat, min_lon, max_lon = tile_bounds(zoom, x, y)
+                entries = [
+                    entry for entry in self.query(
+                        min_lat, max_lat, min_lon, max_lon, now, exclude_user_id, vibe_mask, intent_codes,
+                    )
+                    if tile_xy(entry.lat, entry.lon, zoom) == (x, y)
+                ]
+                found.extend(filter(None, (cell.summary() for cell in aggregate_cells(entries, zoom).values())))
+            return found
+        with self._lock:
+            excluded = self._entries.get(exclude_user_id)
+        skip_key = None
+        if excluded is not None and excluded.expiry > now:
+            skip_key = tile_xy(excluded.lat, excluded.lon, zoom + CLUSTER_CELL_SHIFT)
+        found = []
+        for x, y in tiles:
+            for key, cell in self._tile(zoom, x, y, now).cells.items():
+                summary = cell.summary(excluded if key == skip_key else None)
+                if summary is not None:
+                    found.append(summary)
+        return found
+
+    def tile_cache_stats(self):
+        with self._lock:
+            return {"size": len(self._tile_cache), "hits": self.tile_hits, "misses": self.tile_misses}
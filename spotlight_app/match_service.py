@@ -0,0 +1,246 @@
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# ======================================================
+# MATCH SERVICE (atomic state transitions)
+# ======================================================
+# Accept, decline, reach and end each run as one short BEGIN IMMEDIATE
+# transaction. Guards live in the WHERE clause of conditional UPDATEs
+# (e.g. `is_matched=0`), so the check and the write are one statement and
+# rowcount tells the caller whether it won. Two receivers accepting the
+# same sender at once can no longer both match them: the loser's UPDATE
+# touches fewer rows and its transaction is rolled back.
+#
+# `on_success(conn, result)` runs inside the transaction just before the
+# commit whenever the transition changed someone's state (result.user_ids),
+# for side effects that must land atomically with it (sync-version bumps,
+# outbox notifications).
+
+MATCHED = "matched"
+DECLINED = "declined"
+REACHED = "reached"
+ENDED = "ended"
+ALREADY_ENDED = "already_ended"
+NOT_FOUND = "not_found"
+ALREADY_MATCHED = "already_matched"
+NO_ACTIVE_MATCH = "no_active_match"
+MATCH_NOT_FOUND = "match_not_found"
+REASON_REQUIRED = "reason_required"
+REASON_TOO_LONG = "reason_too_long"
+
+END_REASON_MAX_WORDS = 50
+
+MatchResult = namedtuple("MatchResult", ["status", "match_id", "user_ids"])
+
+
+def _result(status, match_id=None, user_ids=()):
+    return MatchResult(status, match_id, tuple(user_ids))
+
+
+class _Rejected(Exception):
+    def __init__(self, result):
+        super().__init__(result.status)
+        self.result = result
+
+
+@contextmanager
+def immediate(conn):
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on any exception."""
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _run(conn, transition, on_success):
+    try:
+        with immediate(conn):
+            result = transition()
+            if on_success is not None and result.user_ids:
+                on_success(conn, result)
+            return result
+    except _Rejected as rejected:
+        return rejected.result
+
+
+def active_match_for_user(conn, uid):
+    """The user's active match via users.active_match_id (a primary-key fetch)."""
+    return conn.execute(
+        """
+        SELECT m.id, m.user1_id, m.user2_id, m.user1_reached, m.user2_reached
+        FROM users u
+        JOIN matches m ON m.id = u.active_match_id
+        WHERE u.id=? AND m.status='active'
+        """,
+        (uid,),
+    ).fetchone()
+
+
+def accept_request(conn, request_id, receiver_id, pending_cutoff, on_success=None, now=None) -> MatchResult:
+    now = time.time() if now is None else now
+
+    def transition():
+        cur = conn.execute(
+            """
+            UPDATE requests SET status='accepted'
+            WHERE id=? AND receiver_id=? AND status='pending' AND created_at >= ?
+            """,
+            (request_id, receiver_id, pending_cutoff),
+        )
+        if cur.rowcount != 1:
+            return _result(NOT_FOUND)
+        sender_id = conn.execute(
+            "SELECT sender_id FROM requests WHERE id=?", (request_id,)
+        ).fetchone()["sender_id"]
+
+        match_id = conn.execute(
+            """
+            INSERT INTO matches (user1_id, user2_id, created_at, status)
+            VALUES (?, ?, ?, 'active')
+            """,
+            (sender_id, receiver_id, now),
+        ).lastrowid
+
+        cur = conn.execute(
+            """
+            UPDATE users
+            SET is_matched=1, matched_with=CASE id WHEN ? THEN ? ELSE ? END, active_match_id=?
+            WHERE id IN (?, ?) AND COALESCE(is_matched, 0)=0
+            """,
+            (receiver_id, sender_id, receiver_id, match_id, receiver_id, sender_id),
+        )
+        if cur.rowcount != 2:
+            # one side matched with someone else first; undo the accept
+            raise _Rejected(_result(ALREADY_MATCHED))
+
+        # remove from live map
+        conn.execute("DELETE FROM spotlights WHERE user_id IN (?, ?)", (receiver_id, sender_id))
+
+        # cancel all other pending requests involving either user
+        affected = [
+            r["other_id"]
+            for r in conn.execute(
+                """
+                UPDATE requests
+                SET status='declined'
+                WHERE status='pending'
+                  AND (sender_id IN (?, ?) OR receiver_id IN (?, ?))
+                RETURNING receiver_id AS other_id
+                """,
+                (receiver_id, sender_id, receiver_id, sender_id),
+            ).fetchall()
+        ]
+        return _result(MATCHED, match_id, (receiver_id, sender_id, *affected))
+
+    return _run(conn, transition, on_success)
+
+
+def decline_request(conn, request_id, receiver_id, pending_cutoff, on_success=None) -> MatchResult:
+    def transition():
+        cur = conn.execute(
+            """
+            UPDATE requests SET status='declined'
+            WHERE id=? AND receiver_id=? AND status='pending' AND created_at >= ?
+            """,
+            (request_id, receiver_id, pending_cutoff),
+        )
+        if cur.rowcount != 1:
+            return _result(NOT_FOUND)
+        return _result(DECLINED, user_ids=(receiver_id,))
+
+    return _run(conn, transition, on_success)
+
+
+def mark_reached(conn, uid, on_success=None) -> MatchResult:
+    def transition():
+        user = conn.execute("SELECT is_matched FROM users WHERE id=?", (uid,)).fetchone()
+        if not user or not user["is_matched"]:
+            return _result(NO_ACTIVE_MATCH)
+        match = active_match_for_user(conn, uid)
+        if not match:
+            return _result(MATCH_NOT_FOUND)
+
+        reached_col = "user1_reached" if match["user1_id"] == uid else "user2_reached"
+        cur = conn.execute(
+            f"UPDATE matches SET {reached_col}=1 WHERE id=? AND status='active'",
+            (match["id"],),
+        )
+        if cur.rowcount != 1:
+            return _result(MATCH_NOT_FOUND)
+        return _result(REACHED, match["id"], (match["user1_id"], match["user2_id"]))
+
+    return _run(conn, transition, on_success)
+
+
+def end_match(conn, uid, reason, on_success=None, now=None) -> MatchResult:
+    now = time.time() if now is None else now
+    reason = (reason or "").strip()
+
+    def transition():
+        user = conn.execute("SELECT matched_with FROM users WHERE id=?", (uid,)).fetchone()
+        other = user["matched_with"] if user else None
+        if other is None:
+            # the other side may already have ended it; stay idempotent.
+            # One probe per side: the OR form walks a whole ended index.
+            ended = conn.execute(
+                """
+                SELECT id FROM matches WHERE user1_id=? AND status='ended'
+                UNION ALL
+                SELECT id FROM matches WHERE user2_id=? AND status='ended'
+                LIMIT 1
+                """,
+                (uid, uid),
+            ).fetchone()
+            return _result(ALREADY_ENDED if ended else NO_ACTIVE_MATCH)
+
+        match = active_match_for_user(conn, uid)
+        if match:
+            my_reached = match["user1_reached"] if match["user1_id"] == uid else match["user2_reached"]
+            if not my_reached:
+                if not reason:
+                    return _result(REASON_REQUIRED)
+                if len(reason.split()) > END_REASON_MAX_WORDS:
+                    return _result(REASON_TOO_LONG)
+            cur = conn.execute(
+                """
+                UPDATE matches
+                SET status='ended', ended_at=?,
+                    end_reason=CASE WHEN ? <> '' THEN ? ELSE end_reason END,
+                    end_reason_by=CASE WHEN ? <> '' THEN ? ELSE end_reason_by END
+                WHERE id=? AND status='active'
+                """,
+                (now, reason, reason, reason, uid, match["id"]),
+            )
+            ended_now = cur.rowcount == 1
+        else:
+            ended_now = False
+
+        # only clear the pair's flags if they still point at each other
+        conn.execute(
+            """
+            UPDATE users SET is_matched=0, matched_with=NULL, active_match_id=NULL
+            WHERE (id=? AND matched_with=?) OR (id=? AND matched_with=?)
+            """,
+            (uid, other, other, uid),
+        )
+        if not ended_now:
+            ended = conn.execute(
+                """
+                SELECT id FROM matches
+                WHERE status='ended'
+                  AND user1_id IN (?, ?) AND user2_id IN (?, ?)
+                  AND user1_id <> user2_id
+                LIMIT 1
+                """,
+                (uid, other, uid, other),
+            ).fetchone()
+            return _result(ALREADY_ENDED if ended else MATCH_NOT_FOUND, user_ids=(uid, other))
+        return _result(ENDED, match["id"], (uid, other))
+
+    return _run(conn, transition, on_success)
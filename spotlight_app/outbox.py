@@ -0,0 +1,306 @@
+import json
+import math
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+# ======================================================
+# OUTBOX (durable notification queue)
+# ======================================================
+# Request handlers only INSERT a row here, inside the transaction that
+# caused the notification, so a crash can no longer lose deliveries that
+# had not gone out yet. Workers claim due rows in batches under
+# BEGIN IMMEDIATE, run the handler registered for each kind, and either
+# mark the rows delivered or reschedule them with exponential backoff.
+# dedupe_key is UNIQUE, so enqueueing the same event twice is a no-op for
+# as long as the delivered row is retained (see db.sweep_expired).
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_DELIVERED = "delivered"
+STATUS_DEAD = "dead"
+
+OUTBOX_BATCH_SIZE = int(os.environ.get("SPOTLIGHT_OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("SPOTLIGHT_OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.environ.get("SPOTLIGHT_OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.environ.get("SPOTLIGHT_OUTBOX_BACKOFF_MAX_SECONDS", "900"))
+# a claim still 'processing' past its lease is assumed to belong to a
+# crashed worker; batches whose handlers make network calls get a longer
+# lease from batch_lease_seconds, never a shorter one
+OUTBOX_LEASE_SECONDS = float(os.environ.get("SPOTLIGHT_OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_LEASE_MARGIN_SECONDS = float(os.environ.get("SPOTLIGHT_OUTBOX_LEASE_MARGIN_SECONDS", "60"))
+
+
+def enqueue(conn, kind, payload, dedupe_key=None, delay=0.0, now=None) -> bool:
+    """Queue one job in the caller's transaction; False if the key was already queued."""
+    now = time.time() if now is None else now
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO outbox
+        (kind, dedupe_key, payload, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, 'pending', 0, ?, ?)
+        """,
+        (kind, dedupe_key, json.dumps(payload), now + max(0.0, delay), now),
+    )
+    return cur.rowcount == 1
+
+
+def enqueue_many(conn, kind, items, now=None) -> None:
+    """Queue (dedupe_key, payload) pairs of a single kind with one executemany."""
+    now = time.time() if now is None else now
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO outbox
+        (kind, dedupe_key, payload, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, 'pending', 0, ?, ?)
+        """,
+        [(kind, key, json.dumps(payload), now, now) for key, payload in items],
+    )
+
+
+def backoff_delay(attempts) -> float:
+    """Exponential backoff with jitter so retries from one batch spread out."""
+    delay = min(OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)), OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def batch_lease_seconds(batch_size, job_seconds=0.0, parallelism=1) -> float:
+    """
+    Lease long enough for the slowest batch: `batch_size` jobs that each
+    take up to `job_seconds`, run `parallelism` at a time, plus a margin.
+    """
+    rounds = math.ceil(max(1, batch_size) / max(1, parallelism))
+    return max(OUTBOX_LEASE_SECONDS, rounds * job_seconds + OUTBOX_LEASE_MARGIN_SECONDS)
+
+
+def claim_batch(conn, worker_id, batch_size=OUTBOX_BATCH_SIZE, now=None, lease_seconds=OUTBOX_LEASE_SECONDS):
+    """
+    Atomically move up to `batch_size` due jobs to 'processing' for this
+    worker. Each claim records its own expiry, so workers configured with
+    different batch sizes never cut each other's leases short.
+    """
+    now = time.time() if now is None else now
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # release claims left behind by a worker that died mid-batch
+        conn.execute(
+            """
+            UPDATE outbox SET status='pending', claimed_by=NULL, lease_until=NULL
+            WHERE status='processing' AND COALESCE(lease_until, claimed_at + ?) < ?
+            """,
+            (OUTBOX_LEASE_SECONDS, now),
+        )
+        rows = conn.execute(
+            """
+            UPDATE outbox
+            SET status='processing', claimed_by=?, claimed_at=?, lease_until=?, attempts=attempts + 1
+            WHERE id IN (
+                SELECT id FROM outbox
+                WHERE status='pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+            )
+            RETURNING id, kind, dedupe_key, payload, attempts, created_at
+            """,
+            (worker_id, now, now + lease_seconds, now, max(1, batch_size)),
+        ).fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [
+        {
+            "id": row["id"],
+            "kind": row["kind"],
+            "dedupe_key": row["dedupe_key"],
+            "payload": json.loads(row["payload"] or "{}"),
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+        }
+        for row in rows
+    ]
+
+
+def _complete(conn, jobs, failures, now) -> dict:
+    delivered = [job for job in jobs if job["id"] not in failures]
+    retry = []
+    dead = []
+    for job in jobs:
+        if job["id"] not in failures:
+            continue
+        error = str(failures[job["id"]])[:500]
+        if job["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+            dead.append((error, now, job["id"]))
+        else:
+            retry.append((error, now + backoff_delay(job["attempts"]), job["id"]))
+
+    if delivered:
+        conn.executemany(
+            """
+            UPDATE outbox
+            SET status='delivered', delivered_at=?, latency_ms=?, last_error=NULL
+            WHERE id=?
+            """,
+            [(now, int((now - (job["created_at"] or now)) * 1000), job["id"]) for job in delivered],
+        )
+    if retry:
+        conn.executemany(
+            "UPDATE outbox SET status='pending', last_error=?, next_attempt_at=?, claimed_by=NULL WHERE id=?",
+            retry,
+        )
+    if dead:
+        conn.executemany(
+            "UPDATE outbox SET status='dead', last_error=?, delivered_at=? WHERE id=?",
+            dead,
+        )
+    return {"delivered": len(delivered), "retried": len(retry), "dead": len(dead)}
+
+
+def process_batch(
+    conn, handlers, worker_id, batch_size=OUTBOX_BATCH_SIZE, group_sizes=None,
+    lease_seconds=OUTBOX_LEASE_SECONDS, give_up_handlers=None,
+) -> dict:
+    """
+    Claim and run one batch. `handlers[kind](conn, jobs, final_ids)` gets
+    every claimed job of its kind and returns {job_id: error} for the jobs
+    that should be retried; `final_ids` are jobs on their last attempt.
+    Handler writes and the outcome bookkeeping commit together.
+    `group_sizes[kind]` caps the jobs per handler call (and so per commit)
+    for kinds whose jobs each write a lot.
+    When a handler raises (or is missing), its writes are rolled back and
+    `give_up_handlers[kind](conn, jobs)` gets the jobs that were on their
+    last attempt, so the kind can record them as failed before they go dead.
+    """
+    jobs = claim_batch(conn, worker_id, batch_size, lease_seconds=lease_seconds)
+    totals = {"claimed": len(jobs), "delivered": 0, "retried": 0, "dead": 0}
+    if not jobs:
+        return totals
+
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job["kind"], []).append(job)
+
+    groups = []
+    for kind, kind_jobs in by_kind.items():
+        step = (group_sizes or {}).get(kind) or len(kind_jobs)
+        groups.extend((kind, kind_jobs[start:start + step]) for start in range(0, len(kind_jobs), step))
+
+    for kind, kind_jobs in groups:
+        handler = handlers.get(kind)
+        final_ids = {job["id"] for job in kind_jobs if job["attempts"] >= OUTBOX_MAX_ATTEMPTS}
+        gave_up = False
+        if handler is None:
+            failures = {job["id"]: f"no handler for {kind}" for job in kind_jobs}
+            gave_up = True
+        else:
+            try:
+                failures = handler(conn, kind_jobs, final_ids) or {}
+            except Exception as exc:
+                conn.rollback()
+                failures = {job["id"]: repr(exc) for job in kind_jobs}
+                gave_up = True
+        give_up = (give_up_handlers or {}).get(kind)
+        if gave_up and give_up and final_ids:
+            give_up(conn, [job for job in kind_jobs if job["id"] in final_ids])
+        outcome = _complete(conn, kind_jobs, failures, time.time())
+        conn.commit()
+        for key, count in outcome.items():
+            totals[key] += count
+    return totals
+
+
+def stats(conn, sample=1000) -> dict:
+    counts = {
+        row["status"]: row["n"]
+        for row in conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status")
+    }
+    latencies = sorted(
+        row["latency_ms"]
+        for row in conn.execute(
+            """
+            SELECT latency_ms FROM outbox
+            WHERE status='delivered' AND latency_ms IS NOT NULL
+            ORDER BY delivered_at DESC
+            LIMIT ?
+            """,
+            (sample,),
+        )
+    )
+    oldest_due = conn.execute(
+        "SELECT MIN(next_attempt_at) AS t FROM outbox WHERE status='pending'"
+    ).fetchone()["t"]
+
+    def pct(p):
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    return {
+        "counts": {status: counts.get(status, 0) for status in (STATUS_PENDING, STATUS_PROCESSING, STATUS_DELIVERED, STATUS_DEAD)},
+        "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "sample": len(latencies)},
+        "oldest_due_age_seconds": round(max(0.0, time.time() - oldest_due), 3) if oldest_due else None,
+    }
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class OutboxWorker:
+    """Claim/process loop shared by `flask worker` and the embedded thread."""
+
+    def __init__(
+        self, connect, handlers, batch_size=OUTBOX_BATCH_SIZE, idle_sleep=1.0, logger=None, group_sizes=None,
+        lease_seconds=None, give_up_handlers=None,
+    ):
+        self._connect = connect
+        self.handlers = handlers
+        self.group_sizes = group_sizes
+        self.give_up_handlers = give_up_handlers
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = batch_lease_seconds(self.batch_size) if lease_seconds is None else lease_seconds
+        self.idle_sleep = idle_sleep
+        self.logger = logger
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, once=False) -> dict:
+        worker_id = default_worker_id()
+        totals = {"claimed": 0, "delivered": 0, "retried": 0, "dead": 0}
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                try:
+                    result = process_batch(
+                        conn, self.handlers, worker_id, self.batch_size, self.group_sizes,
+                        self.lease_seconds, self.give_up_handlers,
+                    )
+                except sqlite3.OperationalError as exc:
+                    # lock contention with request handlers; try again shortly
+                    if self.logger:
+                        self.logger.warning("outbox claim failed: %s", exc)
+                    result = {"claimed": 0}
+                for key in totals:
+                    totals[key] += result.get(key, 0)
+                if result.get("claimed"):
+                    if self.logger:
+                        self.logger.info("outbox batch: %s", result)
+                    continue
+                if once:
+                    break
+                self._stop.wait(self.idle_sleep)
+        finally:
+            conn.close()
+        return totals
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name="outbox-worker", daemon=True)
+        thread.start()
+        return thread
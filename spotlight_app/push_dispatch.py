@@ -0,0 +1,126 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# ======================================================
+# WEB-PUSH DISPATCHER (bounded pool, batched bookkeeping)
+# ======================================================
+# Used by the outbox worker: a claimed batch of web_push jobs is sent
+# through a bounded thread pool, and the resulting last_sent_at updates
+# and 404/410 prunes are written with executemany. Broadcast progress
+# lives in the push_jobs table so any worker can answer a status poll.
+
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_GONE = "gone"
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def create_job(conn, job_id, title, message, targeted_users=0, targeted_subscriptions=0) -> None:
+    conn.execute(
+        """
+        INSERT INTO push_jobs
+        (id, status, title, message, targeted_users, targeted_subscriptions,
+         sent_count, failed_count, removed_count, created_at)
+        VALUES (?, 'queued', ?, ?, ?, ?, 0, 0, 0, ?)
+        """,
+        (job_id, title, message, targeted_users, targeted_subscriptions, time.time()),
+    )
+
+
+def start_job(conn, job_id, targeted_users, targeted_subscriptions) -> None:
+    """Record the fan-out size; a broadcast with nothing to send is done at once."""
+    now = time.time()
+    conn.execute(
+        """
+        UPDATE push_jobs
+        SET targeted_users=?, targeted_subscriptions=?, started_at=?,
+            status=CASE WHEN ?=0 THEN 'done' ELSE 'running' END,
+            finished_at=CASE WHEN ?=0 THEN ? ELSE NULL END
+        WHERE id=?
+        """,
+        (targeted_users, targeted_subscriptions, now, targeted_subscriptions, targeted_subscriptions, now, job_id),
+    )
+
+
+def add_progress(conn, progress) -> None:
+    """Apply {job_id: (sent, failed, removed)} deltas; jobs finish once every subscription is settled."""
+    now = time.time()
+    conn.executemany(
+        """
+        UPDATE push_jobs
+        SET sent_count=sent_count + ?, failed_count=failed_count + ?, removed_count=removed_count + ?,
+            status=CASE
+                WHEN sent_count + failed_count + removed_count + ? + ? + ? >= targeted_subscriptions
+                THEN 'done' ELSE status END,
+            finished_at=CASE
+                WHEN sent_count + failed_count + removed_count + ? + ? + ? >= targeted_subscriptions
+                THEN ? ELSE finished_at END
+        WHERE id=?
+        """,
+        [
+            (sent, failed, removed, sent, failed, removed, sent, failed, removed, now, job_id)
+            for job_id, (sent, failed, removed) in progress.items()
+        ],
+    )
+
+
+def job_status(conn, job_id):
+    row = conn.execute("SELECT * FROM push_jobs WHERE id=?", (job_id,)).fetchone()
+    if not row:
+        return None
+    return {
+        "job_id": row["id"],
+        "status": row["status"],
+        "targeted_users": row["targeted_users"],
+        "targeted_subscriptions": row["targeted_subscriptions"],
+        "sent_count": row["sent_count"],
+        "failed_count": row["failed_count"],
+        "removed_subscriptions": row["removed_count"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "error": row["error"],
+    }
+
+
+class PushDispatcher:
+    """
+    `sender(subscription_info, data)` performs one delivery and returns an
+    OUTCOME_* string; keeping it injectable lets a local stand-in endpoint
+    replace the real push services.
+    """
+
+    def __init__(self, sender, max_workers=8):
+        self._sender = sender
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="push-send")
+
+    def _deliver(self, item):
+        key, (sub_id, endpoint, p256dh, auth), data = item
+        info = {"endpoint": endpoint, "keys": {"p256dh": p256dh, "auth": auth}}
+        try:
+            return key, sub_id, self._sender(info, data)
+        except Exception:
+            return key, sub_id, OUTCOME_FAILED
+
+    def deliver_many(self, items):
+        """Send (key, (id, endpoint, p256dh, auth), data) items concurrently; returns (key, id, outcome)."""
+        return list(self._pool.map(self._deliver, items))
+
+    @staticmethod
+    def record_outcomes(conn, results) -> None:
+        now = time.time()
+        sent_ids = [(now, now, sub_id) for _, sub_id, outcome in results if outcome == OUTCOME_SENT]
+        gone_ids = [(sub_id,) for _, sub_id, outcome in results if outcome == OUTCOME_GONE]
+        if sent_ids:
+            conn.executemany(
+                "UPDATE push_subscriptions SET last_sent_at=?, updated_at=? WHERE id=?",
+                sent_ids,
+            )
+        if gone_ids:
+            # subscription is expired or invalid; prune it
+            conn.executemany("DELETE FROM push_subscriptions WHERE id=?", gone_ids)
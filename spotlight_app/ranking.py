@@ -0,0 +1,161 @@
+import heapq
+import math
+import os
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+
+try:
+    import numpy
+    if not hasattr(numpy, "bitwise_count"):  # popcount arrived in numpy 2.0
+        numpy = None
+except ImportError:
+    numpy = None  # type: ignore
+
+# ======================================================
+# NEARBY COMPATIBILITY RANKING
+# ======================================================
+# Nearby candidates are ordered by a weighted score in [0, 1] built from
+# four parts, each scaled to [0, 1]: closeness (1 at the viewer, 0 at the
+# distance scale), vibe overlap (share of the viewer's vibes the candidate
+# has, by popcount of the vibe_mask AND), trust score within the range
+# apply_trust_delta keeps it in, and how soon the meet time is.
+#
+# numpy is optional (it is not in requirements.txt). When it is installed
+# every part is computed over whole arrays in one pass and the top K are
+# cut with a partition; without it a plain loop and heapq do the same work.
+# Both paths order by (score, distance, user_id), with score and distance
+# rounded to RANK_TIE_DIGITS first, so last-bit differences between numpy's
+# and math's trig can't reorder candidates and ties at the K-th place are
+# broken the same way.
+
+EARTH_RADIUS_KM = 6371.0088
+RANK_TRUST_MIN = 50
+RANK_TRUST_MAX = 150
+RANK_MEET_WINDOW_SECONDS = 3 * 60 * 60  # meet times further off than this (either way) score 0
+RANK_TIE_DIGITS = 9  # decimals kept of score and distance_km when ordering
+
+RankWeights = namedtuple("RankWeights", ["distance", "vibes", "trust", "meet_time"])
+RANK_WEIGHTS = RankWeights(
+    distance=float(os.environ.get("SPOTLIGHT_RANK_WEIGHT_DISTANCE", "0.4")),
+    vibes=float(os.environ.get("SPOTLIGHT_RANK_WEIGHT_VIBES", "0.3")),
+    trust=float(os.environ.get("SPOTLIGHT_RANK_WEIGHT_TRUST", "0.2")),
+    meet_time=float(os.environ.get("SPOTLIGHT_RANK_WEIGHT_MEET_TIME", "0.1")),
+)
+
+Ranked = namedtuple("Ranked", ["score", "distance_km", "entry"])
+
+_user_id = attrgetter("user_id")
+_lat = attrgetter("lat")
+_lon = attrgetter("lon")
+_vibe_mask = attrgetter("vibe_mask")
+_trust_score = attrgetter("trust_score")
+_meet_time = attrgetter("meet_time")
+
+
+@lru_cache(maxsize=4096)
+def meet_timestamp(value):
+    """
+    Epoch seconds of a "2026-10-17T19:30" meet time in server local time.
+    Unset or unreadable times are infinitely far off, so they score 0.
+    """
+    if not value:
+        return math.inf
+    try:
+        return datetime.fromisoformat(str(value).strip()).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return math.inf
+
+
+def _normalized_weights(weights):
+    total = sum(max(0.0, w) for w in weights)
+    if total <= 0:
+        return RankWeights(1.0, 0.0, 0.0, 0.0)
+    return RankWeights(*(max(0.0, w) / total for w in weights))
+
+
+def rank(entries, lat, lon, now, vibe_mask=0, distance_scale_km=10.0, max_distance_km=None, limit=None,
+         weights=RANK_WEIGHTS):
+    """
+    Score entries (anything with user_id, lat, lon, vibe_mask, trust_score
+    and meet_time attributes) for a viewer at (lat, lon) whose vibes are
+    `vibe_mask`. Entries further than `max_distance_km` are dropped. Returns
+    up to `limit` Ranked tuples, best score first, then nearest, then lowest
+    user_id.
+    """
+    if not isinstance(entries, list):
+        entries = list(entries)
+    if not entries or (limit is not None and limit <= 0):
+        return []
+    weights = _normalized_weights(weights)
+    distance_scale_km = max(distance_scale_km, 1e-6)
+    if numpy is not None:
+        return _rank_arrays(entries, lat, lon, now, vibe_mask, distance_scale_km, max_distance_km, limit, weights)
+    return _rank_loop(entries, lat, lon, now, vibe_mask, distance_scale_km, max_distance_km, limit, weights)
+
+
+def _rank_arrays(entries, lat, lon, now, vibe_mask, distance_scale_km, max_distance_km, limit, weights):
+    np = numpy
+    n = len(entries)
+    lats = np.radians(np.fromiter(map(_lat, entries), np.float64, n))
+    lons = np.radians(np.fromiter(map(_lon, entries), np.float64, n))
+    lat0, lon0 = math.radians(lat), math.radians(lon)
+    a = np.sin((lats - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lats) * np.sin((lons - lon0) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    score = weights.distance * np.clip(1.0 - distance / distance_scale_km, 0.0, 1.0)
+    if vibe_mask and weights.vibes:
+        masks = np.fromiter(map(_vibe_mask, entries), np.int64, n)
+        score += weights.vibes / vibe_mask.bit_count() * np.bitwise_count(masks & vibe_mask)
+    if weights.trust:
+        trust = np.fromiter((t or 0 for t in map(_trust_score, entries)), np.float64, n)
+        score += weights.trust * np.clip((trust - RANK_TRUST_MIN) / (RANK_TRUST_MAX - RANK_TRUST_MIN), 0.0, 1.0)
+    if weights.meet_time:
+        meet = np.fromiter(map(meet_timestamp, map(_meet_time, entries)), np.float64, n)
+        score += weights.meet_time * np.clip(1.0 - np.abs(meet - now) / RANK_MEET_WINDOW_SECONDS, 0.0, 1.0)
+
+    picked = np.arange(n)
+    if max_distance_km is not None:
+        picked = np.flatnonzero(distance <= max_distance_km)
+    score_key = np.round(score, RANK_TIE_DIGITS)
+    if limit is not None and limit < len(picked):
+        # the K-th best score in linear time; everything tied with it stays
+        # in so the tie-break below, not the partition, decides the cut
+        kth = np.partition(-score_key[picked], limit - 1)[limit - 1]
+        picked = picked[-score_key[picked] <= kth]
+    user_ids = np.fromiter((_user_id(entries[i]) for i in picked.tolist()), np.int64, len(picked))
+    picked = picked[np.lexsort((user_ids, np.round(distance[picked], RANK_TIE_DIGITS), -score_key[picked]))]
+    if limit is not None:
+        picked = picked[:limit]
+    return [Ranked(s, d, entries[i]) for s, d, i in zip(score[picked].tolist(), distance[picked].tolist(), picked.tolist())]
+
+
+def _rank_loop(entries, lat, lon, now, vibe_mask, distance_scale_km, max_distance_km, limit, weights):
+    lat0, lon0 = math.radians(lat), math.radians(lon)
+    cos_lat0 = math.cos(lat0)
+    vibe_weight = weights.vibes / vibe_mask.bit_count() if vibe_mask else 0.0
+    trust_span = RANK_TRUST_MAX - RANK_TRUST_MIN
+    ranked = []
+    for entry in entries:
+        lat1, lon1 = math.radians(entry.lat), math.radians(entry.lon)
+        a = math.sin((lat1 - lat0) / 2) ** 2 + cos_lat0 * math.cos(lat1) * math.sin((lon1 - lon0) / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        if max_distance_km is not None and distance > max_distance_km:
+            continue
+        score = weights.distance * min(1.0, max(0.0, 1.0 - distance / distance_scale_km))
+        if vibe_weight:
+            score += vibe_weight * (entry.vibe_mask & vibe_mask).bit_count()
+        if weights.trust:
+            score += weights.trust * min(1.0, max(0.0, ((entry.trust_score or 0) - RANK_TRUST_MIN) / trust_span))
+        if weights.meet_time:
+            score += weights.meet_time * max(0.0, 1.0 - abs(meet_timestamp(entry.meet_time) - now) / RANK_MEET_WINDOW_SECONDS)
+        ranked.append(Ranked(score, distance, entry))
+
+    def order(item):
+        return (-round(item.score, RANK_TIE_DIGITS), round(item.distance_km, RANK_TIE_DIGITS), item.entry.user_id)
+
+    if limit is not None and limit < len(ranked):
+        return heapq.nsmallest(limit, ranked, key=order)
+    ranked.sort(key=order)
+    return ranked
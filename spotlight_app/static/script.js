@@ -6,8 +6,13 @@ let myLat = null;
 let myLon = null;
 let userMarker = null;
 let nearbyMarkers = [];
+let nearbyUserMarkers = new Map();
 let selectedUserId = null;
 let nearbyUsers = [];
+let nearbyFetchSeq = 0;
+let nearbyMoveTimer = null;
+let nearbyToken = null;
+let nearbyViewKey = null;
 let currentRequestId = null;
 let incomingRequestData = null;
 let appNotifications = [];
@@ -16,6 +21,13 @@ let requestPoller = null;
 let matchPoller = null;
 let trustPoller = null;
 let appNotifPoller = null;
+let syncPoller = null;
+let syncEtag = null;
+let eventSource = null;
+let liveStreamActive = false;
+let eventStreamErrors = 0;
+let eventStreamRetry = null;
+const EVENT_STREAM_RETRY_MS = 60000;
 let isMatched = false;
 // 🔥 view feedback state
 let myFeedbackList = [];
@@ -38,6 +50,10 @@ let lastPositions = [];
 const MAX_POINTS = 5;
 let hasFirstFix = false;
 
+// map viewport queries: a padded box keeps markers in place during small pans
+const NEARBY_VIEWPORT_PAD = 0.2;
+const NEARBY_MOVE_DEBOUNCE_MS = 300;
+
 // simple view toggler with explicit display control (prevents stuck overlays)
 function showSection(sectionId) {
   ["app-shell", "match-view", "post-match-view", "feedback-view"].forEach(id => {
@@ -77,30 +93,123 @@ document.addEventListener("DOMContentLoaded", () => {
   initMap();
   initEndMatchReasonUI();
   fetchUserInfo();
-  startTrustPoller();
   syncLiveIndicator();
-  startRequestPoller();
-  startAppNotificationPoller();
-  startMatchPoller();
+  if (!startLiveEvents()) startSyncPoller();
   initPushNotifications();
 });
 
 function startRequestPoller() {
-  if (requestPoller) return;
+  if (requestPoller || syncPoller || liveStreamActive) return;
   requestPoller = setInterval(pollRequests, 5000);
 }
 
 function startTrustPoller() {
-  if (trustPoller) return;
+  if (trustPoller || syncPoller || liveStreamActive) return;
   trustPoller = setInterval(fetchUserInfo, 8000);
 }
 
 function startAppNotificationPoller() {
-  if (appNotifPoller) return;
+  if (appNotifPoller || syncPoller || liveStreamActive) return;
   pollAppNotifications();
   appNotifPoller = setInterval(pollAppNotifications, 7000);
 }
 
+function stopAllPollers() {
+  [requestPoller, matchPoller, trustPoller, appNotifPoller, syncPoller].forEach(p => p && clearInterval(p));
+  requestPoller = null;
+  matchPoller = null;
+  trustPoller = null;
+  appNotifPoller = null;
+  syncPoller = null;
+}
+
+// one batched poll with ETag revalidation replaces the four pollers
+function startSyncPoller() {
+  if (syncPoller || liveStreamActive) return;
+  pollSync();
+  syncPoller = setInterval(pollSync, 3000);
+}
+
+async function pollSync() {
+  const headers = syncEtag ? { "If-None-Match": syncEtag } : {};
+  const res = await fetch("/api/sync", { headers, cache: "no-store" });
+  if (res.status === 304) return;
+  if (!res.ok) {
+    if (res.status === 403) {
+      const payload = await res.json().catch(() => ({}));
+      if (payload.error === "account_blocked") {
+        stopAllPollers();
+        showAdminBanNotice(payload.message);
+      }
+    }
+    return;
+  }
+
+  const data = await res.json().catch(() => null);
+  if (!data) return;
+  syncEtag = res.headers.get("ETag");
+  applyUserInfo(data.user_info || {});
+  if (!isMatched) applyIncomingRequest(data.requests || { type: "none" });
+  applyMatchStatus(data.match || { matched: false });
+  applyLiveStatus(data.live || {});
+  applyAppNotifications(data);
+}
+
+// ==========================
+// LIVE EVENTS (SSE, pollers are the fallback)
+// ==========================
+function startLiveEvents() {
+  if (!window.EventSource) return false;
+  if (eventSource) return true;
+
+  const parse = handler => e => {
+    let data = null;
+    try { data = JSON.parse(e.data); } catch (_) { return; }
+    handler(data);
+  };
+
+  eventSource = new EventSource("/api/events");
+  eventSource.addEventListener("open", () => {
+    eventStreamErrors = 0;
+    liveStreamActive = true;
+    stopAllPollers();
+  });
+  eventSource.addEventListener("user_info", parse(applyUserInfo));
+  eventSource.addEventListener("requests", parse(data => { if (!isMatched) applyIncomingRequest(data); }));
+  eventSource.addEventListener("match", parse(applyMatchStatus));
+  eventSource.addEventListener("live", parse(applyLiveStatus));
+  eventSource.addEventListener("notifications", parse(applyAppNotifications));
+  eventSource.addEventListener("account_blocked", parse(data => {
+    stopLiveEvents();
+    showAdminBanNotice(data.message);
+  }));
+  eventSource.addEventListener("unauthorized", () => stopLiveEvents());
+  eventSource.onerror = () => {
+    // the server closes streams periodically; the browser reconnects on its own
+    eventStreamErrors += 1;
+    if (eventSource.readyState === EventSource.CLOSED || eventStreamErrors >= 3) {
+      // refused (the server caps open streams) or failing: poll, and try the stream again later
+      stopLiveEvents();
+      startSyncPoller();
+      if (!eventStreamRetry) {
+        eventStreamRetry = setTimeout(() => {
+          eventStreamRetry = null;
+          startLiveEvents();
+        }, EVENT_STREAM_RETRY_MS);
+      }
+    }
+  };
+  return true;
+}
+
+function stopLiveEvents() {
+  if (eventSource) eventSource.close();
+  if (eventStreamRetry) clearTimeout(eventStreamRetry);
+  eventSource = null;
+  eventStreamRetry = null;
+  liveStreamActive = false;
+}
+
 function pushBellNotification(kind, title, message, dedupeKey = null) {
   if (dedupeKey && appNotifications.some(n => n.dedupeKey === dedupeKey)) return;
   appNotifications.unshift({
@@ -171,7 +280,11 @@ async function pollAppNotifications() {
   if (!res.ok) return;
 
   const payload = await res.json().catch(() => ({}));
-  const notifications = payload.notifications || [];
+  applyAppNotifications(payload);
+}
+
+function applyAppNotifications(payload) {
+  const notifications = (payload && payload.notifications) || [];
   notifications.forEach(n => {
     pushBellNotification(
       n.kind || "admin_push",
@@ -187,6 +300,7 @@ async function pollAppNotifications() {
 // ==========================
 function initMap() {
   map = L.map("map", { zoomControl: false }).setView([20.5937, 78.9629], 5);
+  map.on("moveend", scheduleNearbyRefresh);
 
   L.tileLayer(
     "https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png",
@@ -265,7 +379,10 @@ async function fetchUserInfo() {
   const res = await fetch("/api/user_info");
   if (!res.ok) return;
   const data = await res.json();
+  applyUserInfo(data);
+}
 
+function applyUserInfo(data) {
   const el = document.getElementById("my-trust-score");
   if (el) el.innerText = data.trust_score ?? "--";
 
@@ -273,13 +390,19 @@ async function fetchUserInfo() {
 }
 
 async function syncLiveIndicator() {
-  const liveEl = document.getElementById("live-indicator");
-  const fabEl = document.getElementById("main-fab");
-  if (!liveEl) return;
+  if (!document.getElementById("live-indicator")) return;
 
   const res = await fetch("/api/my_live_status");
   if (!res.ok) return;
   const data = await res.json().catch(() => ({}));
+  applyLiveStatus(data);
+}
+
+function applyLiveStatus(data) {
+  const liveEl = document.getElementById("live-indicator");
+  const fabEl = document.getElementById("main-fab");
+  if (!liveEl) return;
+
   const isLive = !!data.live;
   liveEl.classList.toggle("hidden", !isLive);
   if (fabEl) fabEl.classList.toggle("hidden", isLive);
@@ -289,7 +412,7 @@ async function syncLiveIndicator() {
 // MATCH STATUS POLLING
 // ==========================
 function startMatchPoller() {
-  if (matchPoller) return;
+  if (matchPoller || syncPoller || liveStreamActive) return;
   matchPoller = setInterval(checkMatchStatus, 3000);
 }
 
@@ -298,6 +421,10 @@ async function checkMatchStatus() {
   if (!res.ok) return;
 
   const data = await res.json();
+  applyMatchStatus(data);
+}
+
+function applyMatchStatus(data) {
   if (data.matched) {
     currentMatchId = data.match_id || null;
     myReachedInCurrentMatch = !!data.i_reached;
@@ -334,36 +461,115 @@ async function checkMatchStatus() {
 // ==========================
 // NEARBY USERS
 // ==========================
-async function fetchNearbyUsers() {
-  if (!locationReady) return;
+function scheduleNearbyRefresh() {
+  clearTimeout(nearbyMoveTimer);
+  nearbyMoveTimer = setTimeout(() => {
+    if (!isMatched) fetchNearbyUsers();
+  }, NEARBY_MOVE_DEBOUNCE_MS);
+}
 
-  const res = await fetch(`/api/nearby?lat=${myLat}&lon=${myLon}`);
-  if (!res.ok) return;
+function clearNearbyMarkers() {
+  nearbyMarkers.forEach(m => map.removeLayer(m));
+  nearbyMarkers = [];
+  nearbyUserMarkers.forEach(m => map.removeLayer(m));
+  nearbyUserMarkers = new Map();
+  nearbyToken = null;
+  nearbyViewKey = null;
+}
 
-  const users = await res.json();
-  nearbyUsers = users.map(u => ({
+function decorateNearbyUser(u) {
+  return {
     ...u,
     vibes: u.vibe_tags ? u.vibe_tags.split(",").filter(Boolean) : [],
-    distance_km: (u.lat && u.lon) ? haversine(myLat, myLon, u.lat, u.lon) : null
-  }));
+    distance_km: (u.lat && u.lon) ? haversine(myLat, myLon, u.lat, u.lon) : (u.distance_km ?? null)
+  };
+}
 
-  nearbyMarkers.forEach(m => map.removeLayer(m));
-  nearbyMarkers = [];
+function removeNearbyUserMarker(userId) {
+  const marker = nearbyUserMarkers.get(userId);
+  if (marker) map.removeLayer(marker);
+  nearbyUserMarkers.delete(userId);
+}
 
-  nearbyUsers.forEach(user => {
-    const icon = L.divIcon({
-      html: `<div style="width:60px;height:60px;border-radius:50%;
-        background:rgba(255,215,0,0.25);
-        border:2px solid rgba(255,215,0,0.8)"></div>`,
-      iconSize: [60, 60],
-      className: ""
-    });
+function addNearbyUserMarker(user) {
+  removeNearbyUserMarker(user.id);
+  const icon = L.divIcon({
+    html: `<div style="width:60px;height:60px;border-radius:50%;
+      background:rgba(255,215,0,0.25);
+      border:2px solid rgba(255,215,0,0.8)"></div>`,
+    iconSize: [60, 60],
+    className: ""
+  });
+
+  const marker = L.marker([user.lat, user.lon], { icon }).addTo(map);
+  marker.on("click", () => openProfile(user));
+  nearbyUserMarkers.set(user.id, marker);
+}
 
-    const marker = L.marker([user.lat, user.lon], { icon }).addTo(map);
-    marker.on("click", () => openProfile(user));
-    nearbyMarkers.push(marker);
+function addNearbyClusterMarker(cluster, fullRecordsZoom) {
+  const size = Math.round(36 + Math.min(36, Math.log2(cluster.count) * 6));
+  const icon = L.divIcon({
+    html: `<div style="width:${size}px;height:${size}px;border-radius:50%;
+      display:flex;align-items:center;justify-content:center;
+      font-weight:700;color:#111;background:rgba(255,215,0,0.75);
+      border:2px solid rgba(255,215,0,1)">${cluster.count}</div>`,
+    iconSize: [size, size],
+    className: ""
   });
 
+  const title = cluster.intent ? `${cluster.count} live · mostly ${cluster.intent}` : `${cluster.count} live`;
+  const marker = L.marker([cluster.lat, cluster.lon], { icon, title }).addTo(map);
+  marker.on("click", () => {
+    map.setView([cluster.lat, cluster.lon], Math.min(map.getZoom() + 2, fullRecordsZoom));
+  });
+  nearbyMarkers.push(marker);
+}
+
+function applyNearbyDelta(data) {
+  const changed = [...data.added, ...data.updated].map(decorateNearbyUser);
+  const dropped = new Set([...data.removed, ...changed.map(u => u.id)]);
+  dropped.forEach(removeNearbyUserMarker);
+  // the member may have walked since the last list: refresh kept distances too
+  nearbyUsers = nearbyUsers
+    .filter(u => !dropped.has(u.id))
+    .map(u => ({ ...u, distance_km: haversine(myLat, myLon, u.lat, u.lon) }))
+    .concat(changed);
+  changed.forEach(addNearbyUserMarker);
+  // keep the server's ranking: best score first, nearest first on ties
+  nearbyUsers.sort((a, b) =>
+    ((b.score ?? 0) - (a.score ?? 0)) || ((a.distance_km ?? Infinity) - (b.distance_km ?? Infinity)));
+}
+
+async function fetchNearbyUsers() {
+  if (!locationReady || !map) return;
+
+  // zoomed out the server answers with clusters; full records only close in
+  const seq = ++nearbyFetchSeq;
+  const bbox = map.getBounds().pad(NEARBY_VIEWPORT_PAD).toBBoxString();
+  const zoom = String(map.getZoom());
+  const viewKey = `${bbox}|${zoom}`;
+  const params = new URLSearchParams({ bbox, zoom, lat: String(myLat), lon: String(myLon) });
+  // same viewport as the last list: only ask for what changed since
+  if (nearbyToken && viewKey === nearbyViewKey) params.set("since", nearbyToken);
+
+  const res = await fetch(`/api/nearby?${params}`);
+  if (!res.ok || seq !== nearbyFetchSeq) return;
+
+  const data = await res.json();
+  // a newer viewport was requested meanwhile, or a match started
+  if (seq !== nearbyFetchSeq || isMatched) return;
+
+  if (data.delta) {
+    applyNearbyDelta(data);
+  } else {
+    clearNearbyMarkers();
+    nearbyUsers = (data.users || []).map(decorateNearbyUser);
+    (data.clusters || []).forEach(cluster => addNearbyClusterMarker(cluster, data.full_records_zoom));
+    nearbyUsers.forEach(addNearbyUserMarker);
+  }
+  nearbyToken = data.token || null;
+  nearbyViewKey = viewKey;
+
   renderNearbyCards();
 }
 
@@ -445,7 +651,7 @@ async function loadProfileFeedback(userId) {
     }
 
     const reviews = payload.reviews || [];
-    if (feedbackSummary) feedbackSummary.innerText = `Past Feedback (${reviews.length})`;
+    if (feedbackSummary) feedbackSummary.innerText = `Past Feedback (${payload.count ?? reviews.length})`;
     if (!reviews.length) {
       feedbackWrap.innerHTML = `<div class="muted">No feedback yet.</div>`;
       return;
@@ -571,6 +777,10 @@ async function pollRequests() {
   if (!res.ok) return;
 
   const data = await res.json();
+  applyIncomingRequest(data);
+}
+
+function applyIncomingRequest(data) {
   if (data.type === "incoming" && data.data) {
     currentRequestId = data.data.id;
     incomingRequestData = data.data;
@@ -616,8 +826,7 @@ function enterMatchMode() {
     ov.classList.add("hidden");
   }
 
-  nearbyMarkers.forEach(m => map.removeLayer(m));
-  nearbyMarkers = [];
+  clearNearbyMarkers();
 
   showSection("match-view");
   setTimelineState({ matched: true, onWay: true, reached: false, ended: false });
@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# the app runs init_db() at import time, so point it at a scratch file first;
+# each test then gets its own database through the `app_module` fixture
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="spotlight-test-"), "import.db")
+os.environ.setdefault("SPOTLIGHT_OUTBOX_EMBEDDED_WORKER", "0")
+
+from spotlight_app import app as spotlight_app  # noqa: E402
+from spotlight_app import db, live_grid  # noqa: E402
+from spotlight_app.active_user_cache import ActiveUserCache  # noqa: E402
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module on a fresh database, with per-process caches reset."""
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+    monkeypatch.setattr(spotlight_app, "nearby_grid", live_grid.LiveGrid())
+    monkeypatch.setattr(spotlight_app, "active_user_cache", ActiveUserCache(db.auth_signal_path))
+    spotlight_app.app.testing = True
+    yield spotlight_app
+    db.get_pool().close()
+
+
+@pytest.fixture
+def conn(app_module):
+    connection = db.connect()
+    yield connection
+    connection.close()
+
+
+def make_user(conn, username, **fields):
+    """Insert an active member and return its id."""
+    row = {
+        "username": username,
+        "email": f"{username}@example.test",
+        "password_hash": "x",
+        "gender": "male",
+        "dob": "1990-01-01",
+        "bio": "hi",
+        "vibe_tags": "Coffee,Books",
+        "trust_score": 100,
+        "is_active": 1,
+        "is_matched": 0,
+        "created_at": time.time(),
+    }
+    row.update(fields)
+    cur = conn.execute(
+        f"INSERT INTO users ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+        tuple(row.values()),
+    )
+    conn.commit()
+    return cur.lastrowid
+
+
+def login(app_module, uid):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = uid
+    return client
+
+
+def admin_login(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["is_admin"] = True
+    return client
@@ -0,0 +1,62 @@
+import pytest
+
+from spotlight_app import active_user_cache
+from spotlight_app.active_user_cache import STATE_ACTIVE, STATE_BLOCKED, ActiveUserCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(active_user_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(**kwargs):
+        return ActiveUserCache(lambda: str(tmp_path / "auth.signal"), **kwargs)
+    return make
+
+
+def test_expired_entries_are_dropped(make_cache, clock):
+    cache = make_cache(ttl_seconds=30)
+    cache.put(1, STATE_ACTIVE)
+    assert cache.get(1) == STATE_ACTIVE
+    clock[0] += 31
+    assert cache.get(1) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_go_first(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.put(1, STATE_ACTIVE)
+    cache.put(2, STATE_ACTIVE)
+    assert cache.get(1) == STATE_ACTIVE  # 2 is now the oldest
+    cache.put(3, STATE_ACTIVE)
+    assert cache.stats()["size"] == 2
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == (STATE_ACTIVE, STATE_ACTIVE)
+
+
+def test_put_read_before_an_invalidation_is_dropped(make_cache, clock):
+    cache = make_cache()
+    assert cache.get(1) is None
+    generation = cache.generation  # a request reads ACTIVE from the database...
+    cache.invalidate()  # ...an admin blocks the user meanwhile...
+    cache.put(1, STATE_ACTIVE, generation)  # ...and the stale read comes back
+    assert cache.get(1) is None
+
+    generation = cache.generation
+    cache.put(1, STATE_BLOCKED, generation)
+    assert cache.get(1) == STATE_BLOCKED
+
+
+def test_put_is_dropped_after_another_worker_signals(make_cache, clock):
+    cache, other_worker = make_cache(check_interval=1), make_cache()
+    assert cache.get(1) is None
+    generation = cache.generation
+    other_worker.invalidate()
+    clock[0] += 2
+    assert cache.get(2) is None  # notices the signal and flushes
+    cache.put(1, STATE_ACTIVE, generation)
+    assert cache.get(1) is None
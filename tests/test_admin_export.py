@@ -0,0 +1,83 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from conftest import admin_login, make_user
+
+
+def _day(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def reports(conn):
+    reporter, target = make_user(conn, "reporter"), make_user(conn, "target")
+    created = [_day("2026-10-01 12:00"), _day("2026-10-02 00:00"), _day("2026-10-02 23:59"), _day("2026-10-03 00:00")]
+    for i, created_at in enumerate(created):
+        conn.execute(
+            "INSERT INTO reports (reporter_id, target_user_id, type, message, created_at) VALUES (?, ?, 'user', ?, ?)",
+            (reporter, target, f"report {i}", created_at),
+        )
+    conn.commit()
+    return created
+
+
+def _export(app_module, query):
+    response = admin_login(app_module).get(f"/admin/reports/export?{query}", buffered=False)
+    assert response.status_code == 200
+    chunks = list(response.response)
+    response.close()
+    return response, chunks
+
+
+def test_export_streams_csv_in_batches(app_module, reports, monkeypatch):
+    monkeypatch.setattr(app_module, "EXPORT_FETCH_SIZE", 1)
+    response, chunks = _export(app_module, "")
+
+    assert response.mimetype == "text/csv"
+    assert len(chunks) == 1 + len(reports)  # header, then one chunk per batch
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == app_module.EXPORT_COLUMNS
+    assert [r[5] for r in rows[1:]] == ["report 3", "report 2", "report 1", "report 0"]
+    assert rows[1][3:5] == ["reporter", "target"]
+
+
+def test_export_ndjson_gzip(app_module, reports, monkeypatch):
+    monkeypatch.setattr(app_module, "EXPORT_FETCH_SIZE", 2)
+    response, chunks = _export(app_module, "format=ndjson&gzip=1")
+
+    assert response.mimetype == "application/gzip"
+    assert "reports.ndjson.gz" in response.headers["Content-Disposition"]
+    lines = gzip.decompress(b"".join(chunks)).decode("utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["message"] for r in records] == ["report 3", "report 2", "report 1", "report 0"]
+    assert set(records[0]) == set(app_module.EXPORT_COLUMNS)
+
+
+@pytest.mark.parametrize("query, expected", [
+    # a date `to` covers that whole day; ranges are [from, to)
+    ("from=2026-10-02&to=2026-10-02", ["report 2", "report 1"]),
+    ("from=2026-10-02", ["report 3", "report 2", "report 1"]),
+    ("to=2026-10-01", ["report 0"]),
+])
+def test_export_date_filters(app_module, reports, query, expected):
+    _, chunks = _export(app_module, f"format=ndjson&{query}")
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line)["message"] for line in lines] == expected
+
+
+def test_export_unix_second_bounds(app_module, reports):
+    _, chunks = _export(app_module, f"format=ndjson&from={reports[1]}&to={reports[3]}")
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line)["message"] for line in lines] == ["report 2", "report 1"]
+
+
+@pytest.mark.parametrize("bound", ["nan", "inf", "-inf", "Infinity", "2026-13-01", "soon"])
+def test_export_rejects_bad_bounds(app_module, reports, bound):
+    response = admin_login(app_module).get(f"/admin/reports/export?from={bound}")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "invalid_date"
@@ -0,0 +1,31 @@
+from conftest import admin_login, make_user
+from spotlight_app import db
+
+
+def _avg_trust(conn):
+    stats = db.read_stats(conn)
+    return stats["trust_sum"] / stats["trust_scored"]
+
+
+def test_average_trust_skips_users_without_a_score(conn):
+    make_user(conn, "high", trust_score=120)
+    make_user(conn, "low", trust_score=90)
+    unscored = make_user(conn, "unscored", trust_score=None)
+    conn.commit()
+    expected = conn.execute("SELECT AVG(trust_score) FROM users").fetchone()[0]
+    assert _avg_trust(conn) == expected == 105.0  # not 103.3: NULL is not 100
+
+    conn.execute("UPDATE users SET trust_score=130 WHERE id=?", (unscored,))
+    conn.execute("UPDATE users SET trust_score=NULL WHERE username='low'")
+    conn.execute("DELETE FROM users WHERE username='high'")
+    conn.commit()
+    assert _avg_trust(conn) == 130.0
+    assert db.reconcile_stats(conn) == {}
+
+
+def test_dashboard_average_trust(app_module, conn):
+    make_user(conn, "scored", trust_score=90)
+    make_user(conn, "unscored", trust_score=None)
+    conn.commit()
+    page = admin_login(app_module).get("/admin").get_data(as_text=True)
+    assert ">90.0<" in page
@@ -0,0 +1,52 @@
+import threading
+
+from conftest import login, make_user
+
+
+def test_events_refused_past_stream_cap(app_module, conn, monkeypatch):
+    uid = make_user(conn, "streamer")
+    monkeypatch.setattr(app_module, "EVENTS_MAX_STREAMS", 1)
+    monkeypatch.setattr(app_module, "events_stream_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(app_module, "EVENTS_STREAM_SECONDS", 0)
+    client = login(app_module, uid)
+
+    first = client.get("/api/events", buffered=False)
+    assert first.status_code == 200
+    busy = client.get("/api/events")
+    assert busy.status_code == 503
+    assert busy.get_json()["fallback"] == "/api/sync"
+
+    # reading the stream to its end and closing it frees the slot
+    body = first.get_data(as_text=True)
+    first.close()
+    assert "event: user_info" in body
+    again = client.get("/api/events")
+    assert again.status_code == 200
+    again.close()
+
+
+def test_events_stream_holds_no_connection_between_ticks(app_module, conn, monkeypatch):
+    uid = make_user(conn, "ticker")
+    monkeypatch.setattr(app_module, "EVENTS_STREAM_SECONDS", 0)
+    pool = app_module.db.get_pool()
+    borrowed = []
+    acquire, release = pool.acquire, pool.release
+
+    def counting_acquire():
+        borrowed.append(1)
+        return acquire()
+
+    def counting_release(connection):
+        borrowed.pop()
+        release(connection)
+
+    monkeypatch.setattr(pool, "acquire", counting_acquire)
+    monkeypatch.setattr(pool, "release", counting_release)
+
+    response = login(app_module, uid).get("/api/events", buffered=False)
+    stream = iter(response.response)
+    assert next(stream).startswith(b"retry:")
+    assert borrowed == []
+    assert b"event: user_info" in next(stream)
+    assert borrowed == []
+    response.close()
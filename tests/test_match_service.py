@@ -0,0 +1,68 @@
+import threading
+import time
+
+from conftest import make_user
+from spotlight_app import db, match_service
+
+RECEIVERS = 8
+ROUNDS = 5
+
+
+def _race_accepts(sender, request_ids):
+    """Every receiver accepts its request from its own connection at once."""
+    outcomes = {}
+    barrier = threading.Barrier(len(request_ids))
+
+    def accept(receiver, request_id):
+        own = db.connect()
+        try:
+            barrier.wait()
+            outcomes[receiver] = match_service.accept_request(own, request_id, receiver, 0).status
+        finally:
+            own.close()
+
+    threads = [threading.Thread(target=accept, args=item) for item in request_ids.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_concurrent_accepts_match_the_sender_once(conn):
+    for round_no in range(ROUNDS):
+        sender = make_user(conn, f"sender{round_no}")
+        receivers = [make_user(conn, f"receiver{round_no}_{i}") for i in range(RECEIVERS)]
+        now = time.time()
+        request_ids = {}
+        for receiver in receivers:
+            cur = conn.execute(
+                "INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, 'pending', ?)",
+                (sender, receiver, now),
+            )
+            request_ids[receiver] = cur.lastrowid
+        conn.commit()
+
+        outcomes = _race_accepts(sender, request_ids)
+
+        winners = [r for r, status in outcomes.items() if status == match_service.MATCHED]
+        assert len(winners) == 1, outcomes
+        (winner,) = winners
+        losers = set(receivers) - {winner}
+        assert {outcomes[r] for r in losers} <= {match_service.NOT_FOUND, match_service.ALREADY_MATCHED}
+
+        matches = conn.execute(
+            "SELECT user1_id, user2_id, status FROM matches WHERE user1_id=? OR user2_id=?", (sender, sender)
+        ).fetchall()
+        assert [tuple(m) for m in matches] == [(sender, winner, "active")]
+        statuses = dict(conn.execute(
+            "SELECT receiver_id, status FROM requests WHERE sender_id=?", (sender,)
+        ).fetchall())
+        assert statuses == {r: ("accepted" if r == winner else "declined") for r in receivers}
+        unmatched = conn.execute(
+            f"SELECT COUNT(*) FROM users WHERE id IN ({','.join('?' * len(losers))}) AND is_matched=0",
+            tuple(losers),
+        ).fetchone()[0]
+        assert unmatched == len(losers)
+
+    assert db.check_active_matches(conn) == []
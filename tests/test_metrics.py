@@ -0,0 +1,25 @@
+import pytest
+
+from conftest import admin_login
+
+
+@pytest.mark.parametrize("header, status", [
+    ("Bearer s3cret", 200),
+    ("Bearer s3cre", 401),
+    ("Bearer s3cret ", 401),
+    ("s3cret", 401),
+    ("Bearer sécret", 401),
+    (None, 401),
+])
+def test_metrics_bearer_token(app_module, monkeypatch, header, status):
+    monkeypatch.setattr(app_module, "METRICS_TOKEN", "s3cret")
+    headers = {"Authorization": header} if header is not None else {}
+    response = app_module.app.test_client().get("/metrics", headers=headers)
+    assert response.status_code == status
+
+
+def test_metrics_closed_without_a_token(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "METRICS_TOKEN", "")
+    client = app_module.app.test_client()
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 401
+    assert admin_login(app_module).get("/metrics").status_code == 200
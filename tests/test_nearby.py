@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from conftest import login, make_user
+
+VIEWPORT = "bbox=77.58,12.96,77.60,12.98&zoom=16"
+
+
+def check_in(client, lat=12.97, lon=77.59, intent="Coffee"):
+    response = client.post("/api/checkin", json={"lat": lat, "lon": lon, "place": "Cafe", "intent": intent, "clue": "Red cap"})
+    assert response.status_code == 200
+
+
+@pytest.fixture(params=[True, False], ids=["grid", "rtree"])
+def grid_mode(request, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "LIVE_GRID_ENABLED", request.param)
+    return request.param
+
+
+def test_delta_right_after_full_fetch_is_empty(app_module, conn, grid_mode):
+    members = [make_user(conn, f"member{i}") for i in range(5)]
+    viewer = login(app_module, make_user(conn, "viewer"))
+    app_module._refresh_live_grid(conn)  # the grid's version predates the check-ins below
+    for uid in members:
+        check_in(login(app_module, uid))
+
+    full = viewer.get(f"/api/nearby?{VIEWPORT}").get_json()
+    assert len(full["users"]) == 5
+    delta = viewer.get(f"/api/nearby?{VIEWPORT}&since={full['token']}").get_json()
+    assert delta["delta"] is True
+    assert (delta["added"], delta["updated"], delta["removed"]) == ([], [], [])
+
+
+def test_full_fetch_includes_writes_made_by_other_workers(app_module, conn, grid_mode):
+    viewer = login(app_module, make_user(conn, "viewer"))
+    app_module._refresh_live_grid(conn)
+    # another process's check-in: committed, but never written through to this grid
+    uid = make_user(conn, "elsewhere")
+    now = time.time()
+    conn.execute(
+        "INSERT INTO spotlights (user_id, lat, lon, place, intent, clue, timestamp, expiry) VALUES (?, 12.97, 77.59, 'Park', 'Walk', 'Hat', ?, ?)",
+        (uid, now, now + 3600),
+    )
+    conn.commit()
+
+    full = viewer.get(f"/api/nearby?{VIEWPORT}").get_json()
+    assert [u["id"] for u in full["users"]] == [uid]
+    delta = viewer.get(f"/api/nearby?{VIEWPORT}&since={full['token']}").get_json()
+    assert (delta["added"], delta["updated"], delta["removed"]) == ([], [], [])
+
+    conn.execute("DELETE FROM spotlights WHERE user_id=?", (uid,))
+    conn.commit()
+    delta = viewer.get(f"/api/nearby?{VIEWPORT}&since={delta['token']}").get_json()
+    assert delta["removed"] == [uid]
+
+
+def test_stale_grid_is_rebuilt_by_one_request_at_a_time(app_module, conn, monkeypatch):
+    monkeypatch.setattr(app_module, "LIVE_GRID_ENABLED", True)
+    members = [make_user(conn, f"member{i}") for i in range(3)]
+    for uid in members:
+        check_in(login(app_module, uid))
+    viewer = login(app_module, make_user(conn, "viewer"))
+    app_module._refresh_live_grid(conn)
+    app_module.nearby_grid.loaded_at -= app_module.LIVE_GRID_REFRESH_SECONDS + 1  # stale
+
+    rebuild = app_module._rebuild_live_grid_locked
+    rebuilds = []
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_rebuild(connection):
+        rebuilds.append(1)
+        started.set()
+        assert finish.wait(10)
+        rebuild(connection)
+
+    monkeypatch.setattr(app_module, "_rebuild_live_grid_locked", slow_rebuild)
+
+    def first_request():
+        with app_module.app.app_context():
+            app_module._ensure_live_grid(app_module.db.get_db_connection())
+
+    rebuilder = threading.Thread(target=first_request)
+    rebuilder.start()
+    try:
+        assert started.wait(10)
+        # while that rebuild runs, other requests serve the previous snapshot
+        for _ in range(5):
+            assert len(viewer.get("/api/nearby?lat=12.97&lon=77.59").get_json()) == 3
+            full = viewer.get(f"/api/nearby?{VIEWPORT}").get_json()
+            assert len(full["users"]) == 3
+        assert rebuilds == [1]
+    finally:
+        finish.set()
+        rebuilder.join()
+    assert not app_module.nearby_grid.is_stale(app_module.LIVE_GRID_REFRESH_SECONDS)
+    viewer.get("/api/nearby?lat=12.97&lon=77.59")
+    assert rebuilds == [1]
+
+
+@pytest.mark.parametrize("changed", [
+    "bbox=77.585,12.96,77.60,12.98&zoom=16",  # panned
+    "bbox=77.58,12.96,77.60,12.98&zoom=17",  # zoomed
+    f"{VIEWPORT}&intent=Coffee",  # filtered
+    f"{VIEWPORT}&limit=3",
+])
+def test_token_from_another_view_gets_a_full_list(app_module, conn, grid_mode, changed):
+    members = [make_user(conn, f"member{i}") for i in range(4)]
+    for i, uid in enumerate(members):
+        check_in(login(app_module, uid), lon=77.582 + i * 0.004, intent="Coffee" if i % 2 else "Walk")
+    viewer = login(app_module, make_user(conn, "viewer"))
+
+    full = viewer.get(f"/api/nearby?{VIEWPORT}").get_json()
+    assert len(full["users"]) == 4
+    response = viewer.get(f"/api/nearby?{changed}&since={full['token']}").get_json()
+    assert response.get("delta") is not True
+    expected = viewer.get(f"/api/nearby?{changed}").get_json()
+    assert [u["id"] for u in response["users"]] == [u["id"] for u in expected["users"]]
+    if "token" in response:
+        # the fresh token belongs to the new view
+        delta = viewer.get(f"/api/nearby?{changed}&since={response['token']}").get_json()
+        assert (delta["delta"], delta["added"], delta["removed"]) == (True, [], [])
+
+
+def test_token_from_before_view_keys_gets_a_full_list(app_module, conn):
+    check_in(login(app_module, make_user(conn, "member")))
+    viewer = login(app_module, make_user(conn, "viewer"))
+    legacy = app_module._encode_cursor(0, time.time())
+    response = viewer.get(f"/api/nearby?{VIEWPORT}&since={legacy}").get_json()
+    assert response.get("delta") is not True
+    assert len(response["users"]) == 1
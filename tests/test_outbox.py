@@ -0,0 +1,97 @@
+import time
+
+from conftest import make_user
+from spotlight_app import outbox, push_dispatch
+
+
+def _drain(app_module, conn, handlers):
+    while outbox.process_batch(conn, handlers, "test", group_sizes=app_module.outbox_group_sizes)["claimed"]:
+        pass
+
+
+def test_broadcast_is_delivered_in_parts(app_module, conn, monkeypatch):
+    monkeypatch.setattr(app_module, "OUTBOX_FANOUT_CHUNK", 2)
+    monkeypatch.setattr(app_module, "_push_ready", lambda: True)
+    members = [make_user(conn, f"member{i}") for i in range(5)]
+    make_user(conn, "banned", is_active=0)
+    now = time.time()
+    for uid in members[:3]:
+        conn.execute(
+            "INSERT INTO push_subscriptions (user_id, endpoint, p256dh, auth, created_at) VALUES (?, ?, 'k', 'a', ?)",
+            (uid, f"https://push.example.test/{uid}", now),
+        )
+    job_id = push_dispatch.new_job_id()
+    push_dispatch.create_job(conn, job_id, "Hello", "Everyone")
+    app_module._enqueue_notification(conn, f"admin_push:{job_id}", "Hello", "Everyone", "admin_push", push_job_id=job_id)
+    conn.commit()
+
+    # web_push jobs have no handler here, so they are only queued, not sent
+    _drain(app_module, conn, {app_module.OUTBOX_KIND_NOTIFY: app_module._outbox_notify})
+
+    parts = conn.execute(
+        "SELECT dedupe_key, status FROM outbox WHERE kind='notify' AND dedupe_key LIKE 'notify:%' ORDER BY id"
+    ).fetchall()
+    assert len(parts) == 3  # 5 active members in parts of 2
+    assert {p["status"] for p in parts} == {"delivered"}
+    inbox = [r["user_id"] for r in conn.execute("SELECT user_id FROM app_notifications ORDER BY user_id")]
+    assert inbox == members
+    pushes = conn.execute("SELECT COUNT(*) FROM outbox WHERE kind='web_push'").fetchone()[0]
+    assert pushes == 3
+    job = push_dispatch.job_status(conn, job_id)
+    assert (job["targeted_users"], job["targeted_subscriptions"]) == (5, 3)
+
+
+def test_each_notify_job_commits_on_its_own(app_module, conn):
+    members = [make_user(conn, f"member{i}") for i in range(4)]
+    for uid in members:
+        app_module._enqueue_notification(conn, f"hello:{uid}", "Hi", "There", "match", user_ids=[uid])
+    conn.commit()
+
+    calls = []
+
+    def notify(connection, jobs, final_ids):
+        calls.append(len(jobs))
+        return app_module._outbox_notify(connection, jobs, final_ids)
+
+    _drain(app_module, conn, {app_module.OUTBOX_KIND_NOTIFY: notify})
+    assert calls == [1, 1, 1, 1]  # one handler call, and so one commit, per job
+    assert conn.execute("SELECT COUNT(*) FROM app_notifications").fetchone()[0] == 4
+
+
+def test_lease_outlasts_a_batch_of_timed_out_pushes(app_module, conn):
+    worker = app_module._outbox_worker(100)
+    # 100 pushes, 8 at a time, each allowed the full send timeout
+    assert worker.lease_seconds > 13 * app_module.PUSH_SEND_TIMEOUT_SECONDS
+
+    outbox.enqueue(conn, "slow", {}, dedupe_key="slow")
+    conn.commit()
+    now = time.time()
+    assert len(outbox.claim_batch(conn, "a", now=now, lease_seconds=worker.lease_seconds)) == 1
+    # a worker with the default lease must not reclaim the running batch
+    assert outbox.claim_batch(conn, "b", now=now + outbox.OUTBOX_LEASE_SECONDS + 1) == []
+    reclaimed = outbox.claim_batch(conn, "b", now=now + worker.lease_seconds + 1)
+    assert [job["dedupe_key"] for job in reclaimed] == ["slow"]
+
+
+def test_raising_push_handler_still_settles_the_broadcast(app_module, conn, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 1)
+    job_id = push_dispatch.new_job_id()
+    push_dispatch.create_job(conn, job_id, "Hello", "Everyone", targeted_users=2, targeted_subscriptions=2)
+    outbox.enqueue_many(
+        conn,
+        app_module.OUTBOX_KIND_WEB_PUSH,
+        [(f"web_push:{i}", {"subscription_id": i, "data": "{}", "push_job_id": job_id}) for i in (1, 2)],
+    )
+    conn.commit()
+
+    def broken(connection, jobs, final_ids):
+        raise RuntimeError("push service down")
+
+    totals = outbox.process_batch(
+        conn, {app_module.OUTBOX_KIND_WEB_PUSH: broken}, "test",
+        give_up_handlers=app_module.outbox_give_up_handlers,
+    )
+    assert totals["dead"] == 2
+    job = push_dispatch.job_status(conn, job_id)
+    assert job["status"] == "done"
+    assert job["failed_count"] == 2
@@ -0,0 +1,158 @@
+import time
+
+import pytest
+
+from conftest import login, make_user
+from spotlight_app import db, match_service
+
+# Each hot query is captured as the app actually runs it (through the
+# connection's trace callback) and its EXPLAIN QUERY PLAN must name the index
+# it was written for, so a schema or query edit can't quietly fall back to a
+# scan.
+
+
+def _plan(conn, sql):
+    return "\n".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+
+def _statement(statements, *markers):
+    found = [s for s in statements if all(m in s for m in markers)]
+    assert len(found) == 1, f"expected one statement with {markers}, got {found}"
+    return found[0]
+
+
+@pytest.fixture
+def traced(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    yield statements
+    conn.set_trace_callback(None)
+
+
+@pytest.fixture
+def traced_pool(app_module, monkeypatch):
+    """Statements run by routes on connections borrowed from the pool."""
+    statements = []
+    pool = db.get_pool()
+    acquire, release = pool.acquire, pool.release
+
+    def traced_acquire(*args, **kwargs):
+        connection = acquire(*args, **kwargs)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    def traced_release(connection):
+        connection.set_trace_callback(None)
+        release(connection)
+
+    monkeypatch.setattr(pool, "acquire", traced_acquire)
+    monkeypatch.setattr(pool, "release", traced_release)
+    return statements
+
+
+def _ended_match(conn, user1_id, user2_id, ended_at):
+    conn.execute(
+        "INSERT INTO matches (user1_id, user2_id, created_at, status, ended_at) VALUES (?, ?, ?, 'ended', ?)",
+        (user1_id, user2_id, ended_at - 60, ended_at),
+    )
+    conn.commit()
+
+
+def test_incoming_request_uses_pending_receiver_index(app_module, conn, traced):
+    sender, receiver = make_user(conn, "sender"), make_user(conn, "receiver")
+    conn.execute(
+        "INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, 'pending', ?)",
+        (sender, receiver, time.time()),
+    )
+    conn.commit()
+    traced.clear()
+
+    assert app_module._incoming_request_payload(conn, receiver)["type"] == "incoming"
+
+    plan = _plan(conn, _statement(traced, "FROM requests r"))
+    assert "idx_requests_receiver_pending" in plan
+    assert "idx_spotlights_user_expiry" in plan
+    assert "TEMP B-TREE" not in plan  # created_at order comes from the index
+
+
+def test_live_status_uses_user_expiry_index(app_module, conn, traced):
+    uid = make_user(conn, "live")
+    app_module._live_status_payload(conn, uid)
+
+    plan = _plan(conn, _statement(traced, "FROM spotlights"))
+    assert "idx_spotlights_user_expiry" in plan
+
+
+def test_latest_ended_match_probes_both_sides(app_module, conn, traced):
+    a, b, c = make_user(conn, "a"), make_user(conn, "b"), make_user(conn, "c")
+    now = time.time()
+    _ended_match(conn, a, b, now - 100)
+    _ended_match(conn, c, a, now - 10)
+    traced.clear()
+
+    assert app_module._latest_ended_match(conn, a)["user1_id"] == c
+
+    plan = _plan(conn, _statement(traced, "FROM matches"))
+    assert "SEARCH matches USING INDEX idx_matches_user1_ended" in plan
+    assert "SEARCH matches USING INDEX idx_matches_user2_ended" in plan
+
+
+def test_send_request_duplicate_check_uses_pair_index(app_module, conn, traced_pool):
+    sender, receiver = make_user(conn, "sender"), make_user(conn, "receiver")
+
+    response = login(app_module, sender).post("/api/send_request", json={"receiver_id": receiver})
+    assert response.status_code == 200
+
+    plan = _plan(conn, _statement(traced_pool, "FROM requests", "sender_id="))
+    assert "idx_requests_sender_receiver_status_created" in plan
+
+
+def test_accept_declines_other_requests_through_indexes(app_module, conn, traced):
+    a, b, c = make_user(conn, "a"), make_user(conn, "b"), make_user(conn, "c")
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, 'pending', ?)",
+        [(a, b, now), (c, b, now)],
+    )
+    conn.commit()
+    traced.clear()
+
+    result = match_service.accept_request(conn, 1, b, 0)
+    assert result.status == match_service.MATCHED
+
+    plan = _plan(conn, _statement(traced, "SET status='declined'"))
+    assert "MULTI-INDEX OR" in plan
+    assert "idx_requests_sender_receiver_status_created (sender_id=?)" in plan
+    assert "idx_requests_receiver_pending (receiver_id=?)" in plan
+
+
+def test_feedback_recent_review_uses_pair_index(app_module, conn, traced_pool):
+    reviewer, reviewed = make_user(conn, "reviewer"), make_user(conn, "reviewed")
+
+    response = login(app_module, reviewer).post("/api/submit_feedback", json={"reviewed_id": reviewed, "rating": 8})
+    assert response.status_code == 200
+
+    plan = _plan(conn, _statement(traced_pool, "FROM reviews", "reviewer_id="))
+    assert "idx_reviews_pair_created" in plan
+
+
+def test_end_match_lookups_are_indexed(app_module, conn, traced):
+    a, b = make_user(conn, "a"), make_user(conn, "b")
+    cur = conn.execute(
+        "INSERT INTO requests (sender_id, receiver_id, status, created_at) VALUES (?, ?, 'pending', ?)",
+        (a, b, time.time()),
+    )
+    conn.commit()
+    assert match_service.accept_request(conn, cur.lastrowid, b, 0).status == match_service.MATCHED
+    traced.clear()
+
+    assert match_service.end_match(conn, a, "plans changed").status == match_service.ENDED
+    active = _plan(conn, _statement(traced, "JOIN matches m ON m.id = u.active_match_id"))
+    assert "SEARCH m USING INTEGER PRIMARY KEY" in active
+
+    # the other side finds it already ended through the per-side ended indexes
+    traced.clear()
+    assert match_service.end_match(conn, b, "").status == match_service.ALREADY_ENDED
+    ended = _plan(conn, _statement(traced, "FROM matches", "status='ended'"))
+    assert "SEARCH matches USING INDEX idx_matches_user1_ended" in ended
+    assert "SEARCH matches USING INDEX idx_matches_user2_ended" in ended
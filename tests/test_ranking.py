@@ -0,0 +1,80 @@
+import random
+import time
+
+import pytest
+
+from spotlight_app import db, live_grid, ranking
+
+CENTER = (12.9716, 77.5946)
+NOW = time.time()
+
+requires_numpy = pytest.mark.skipif(ranking.numpy is None, reason="numpy is not installed")
+
+
+def _entry(user_id, lat, lon, vibes=("Coffee",), trust=100, meet_time=None):
+    return live_grid.LiveSpotlight(
+        user_id, lat, lon, "Cafe", "Coffee", meet_time, "Blue jacket", NOW + 3600,
+        f"member{user_id}", trust, "", "", "/profileimg/1.png", db.vibe_mask(list(vibes)), 1,
+    )
+
+
+def _tied_entries():
+    """Whole groups share a score; some groups also share a distance."""
+    rng = random.Random(7)
+    spots = [
+        CENTER,
+        (CENTER[0] + 0.01, CENTER[1]),
+        (CENTER[0] - 0.01, CENTER[1]),  # mirror of the one above: same distance
+        (CENTER[0] + 0.5, CENTER[1]),  # beyond the distance scale: closeness scores 0
+        (CENTER[0] + 0.6, CENTER[1]),
+    ]
+    user_ids = rng.sample(range(1, 1000), 40)
+    return [_entry(uid, *spots[i % len(spots)], trust=100 if i % 3 else 120) for i, uid in enumerate(user_ids)]
+
+
+def _rank_ids(entries, monkeypatch, numpy_module, **kwargs):
+    monkeypatch.setattr(ranking, "numpy", numpy_module)
+    ranked = ranking.rank(entries, *CENTER, NOW, vibe_mask=db.vibe_mask(["Coffee"]), distance_scale_km=10.0, **kwargs)
+    return [r.entry.user_id for r in ranked]
+
+
+def test_loop_breaks_ties_by_distance_then_user_id(monkeypatch):
+    far_a, far_b = _entry(9, CENTER[0] + 0.5, CENTER[1]), _entry(4, CENTER[0] + 0.6, CENTER[1])
+    here_a, here_b = _entry(7, *CENTER), _entry(3, *CENTER)
+    ids = _rank_ids([far_a, far_b, here_a, here_b], monkeypatch, None)
+    # the two far ones score the same; the nearer of them goes first
+    assert ids == [3, 7, 9, 4]
+
+
+@requires_numpy
+@pytest.mark.parametrize("limit", [None, 1, 3, 8, 9, 17, 39, 40])
+def test_arrays_and_loop_agree_on_ties(monkeypatch, limit):
+    entries = _tied_entries()
+    arrays = _rank_ids(entries, monkeypatch, ranking.numpy, limit=limit)
+    loop = _rank_ids(entries, monkeypatch, None, limit=limit)
+    assert arrays == loop
+    assert len(arrays) == (len(entries) if limit is None else limit)
+
+
+@requires_numpy
+def test_arrays_and_loop_agree_on_random_candidates(monkeypatch):
+    rng = random.Random(11)
+    vibes = list(db.VIBE_BITS)
+    meet_times = [time.strftime("%Y-%m-%dT%H:%M", time.localtime(NOW + m * 900)) for m in range(-8, 8)]
+    entries = [
+        _entry(
+            i + 1,
+            # a coarse grid of positions so many candidates tie exactly
+            CENTER[0] + rng.randint(-20, 20) * 0.005,
+            CENTER[1] + rng.randint(-20, 20) * 0.005,
+            vibes=rng.sample(vibes, rng.randint(1, 3)),
+            trust=rng.choice([60, 100, 140]),
+            meet_time=rng.choice(meet_times + [None]),
+        )
+        for i in range(3000)
+    ]
+    rng.shuffle(entries)
+    for limit in (None, 50):
+        arrays = _rank_ids(entries, monkeypatch, ranking.numpy, limit=limit, max_distance_km=8.0)
+        loop = _rank_ids(entries, monkeypatch, None, limit=limit, max_distance_km=8.0)
+        assert arrays == loop
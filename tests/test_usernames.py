@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import make_user
+
+
+@pytest.mark.parametrize("existing, expected", [
+    ([], "alex"),
+    (["alex"], "alex2"),
+    (["alex", "alex2", "alex4"], "alex3"),
+    # padded and non-canonical tails are other people's names, not suffixes
+    (["alex01"], "alex"),
+    (["alex", "alex02", "alex002"], "alex2"),
+    (["alex", "alex1"], "alex2"),
+    (["alexa", "alex_2"], "alex"),
+    (["alex", "alexa", "alex2b"], "alex2"),
+    (["alex", "alex2", "alex10"], "alex3"),
+])
+def test_unique_username_counts_canonical_suffixes_only(app_module, conn, existing, expected):
+    for name in existing:
+        make_user(conn, name)
+    assert app_module._build_unique_username(conn, "alex") == expected
+
+
+def test_unique_username_never_returns_a_taken_name(app_module, conn):
+    for name in ["alex", "alex01", "alex1", "alexa", "alex02"]:
+        make_user(conn, name)
+    for _ in range(12):
+        username = app_module._build_unique_username(conn, "alex!")
+        taken = conn.execute("SELECT 1 FROM users WHERE username=?", (username,)).fetchone()
+        assert taken is None, username
+        make_user(conn, username)